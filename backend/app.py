@@ -12,9 +12,11 @@ from routes.chat import chat_bp
 from routes.insights import insights_bp
 from routes.analytics import analytics_bp
 from routes.plans import plans_bp
+from routes.health import health_bp
+from services.recommendation_service import RecommendationService
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Total-Count', 'X-Next-Cursor', 'X-Dataset-Version'])
 
 from core.extensions import limiter
 limiter.init_app(app)
@@ -34,10 +36,38 @@ app.register_blueprint(chat_bp)
 app.register_blueprint(insights_bp)
 app.register_blueprint(analytics_bp)
 app.register_blueprint(plans_bp)
+app.register_blueprint(health_bp)
+
+# Build the recommendation engine in the background at startup so the first
+# request doesn't wait for it; /readyz turns 200 once it is loaded.
+if os.environ.get("ENGINE_WARMUP", "1") != "0":
+    RecommendationService.warm_up()
+
+# A reload can swap the engine mid-request; each request sticks to the
+# generation it started on and reports that generation's dataset version.
+@app.before_request
+def pin_engine_generation():
+    service = RecommendationService._instance
+    if service is not None:
+        service.pin_engine()
+
+@app.after_request
+def add_dataset_version(response):
+    service = RecommendationService._instance
+    if service is not None and service.engine.dataset_version:
+        response.headers['X-Dataset-Version'] = service.engine.dataset_version
+    return response
+
+@app.teardown_request
+def unpin_engine_generation(exc):
+    RecommendationService.unpin_engine()
 
 @app.route('/')
 def home():
     return "Eat Smart AI Plans API is running!"
 
 if __name__ == '__main__':
+    # Under gunicorn the dataset watch is started per worker (gunicorn.conf.py)
+    if float(os.environ.get("ENGINE_RELOAD_POLL_SECONDS", 0)) > 0:
+        RecommendationService.watch_dataset(float(os.environ["ENGINE_RELOAD_POLL_SECONDS"]))
     app.run(debug=True)
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 SUPABASE_URL = os.environ.get("SUPABASE_URL") or os.environ.get("VITE_SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("VITE_SUPABASE_ANON_KEY") or os.environ.get("SUPABASE_SERVICE_KEY") or os.environ.get("SUPABASE_KEY")
+# Comma-separated emails allowed to call state-changing admin routes
+ADMIN_EMAILS = {e.strip().lower() for e in os.environ.get("ADMIN_EMAILS", "").split(",") if e.strip()}
 
 def require_auth(f):
     @wraps(f)
@@ -44,3 +46,13 @@ def require_auth(f):
             
         return f(*args, **kwargs)
     return decorated_function
+
+def require_admin(f):
+    # require_auth, and the user's email must be listed in ADMIN_EMAILS
+    @wraps(f)
+    @require_auth
+    def decorated_function(*args, **kwargs):
+        if (g.user_email or '').lower() not in ADMIN_EMAILS:
+            return jsonify({"error": "Admin access required"}), 403
+        return f(*args, **kwargs)
+    return decorated_function
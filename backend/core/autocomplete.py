@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Keys are stored as fixed-width UTF-8 bytes; longer prefixes are checked
+# against the full name after the binary search.
+KEY_BYTES = 24
+# Extra candidates taken before de-duplicating identical names; grown by
+# the same factor while too few distinct names survive.
+OVERFETCH = 4
+
+
+def normalize_name(name):
+    return ' '.join(str(name).lower().split())
+
+
+def popularity_scores(names):
+    """
+    Popularity proxy in [0, 1): the dataset carries no ratings, so recipes
+    whose name words are common across the catalog ("chicken curry") rank
+    above one-off names. Replace with a real rating when one is available.
+    """
+    words = pd.Series([normalize_name(n).split() for n in names], dtype=object).explode()
+    counts = words.map(words.value_counts()).astype(np.float64)
+    per_name = np.log1p(counts.groupby(level=0).mean().fillna(0.0)).reindex(range(len(names)), fill_value=0.0).to_numpy()
+    top = per_name.max() if len(per_name) else 0.0
+    return per_name / (top + 1.0) if top > 0 else per_name
+
+
+class AutocompleteIndex:
+    """
+    Sorted array of word-start suffixes of every recipe name ("chicken curry"
+    -> "chicken curry", "curry"), so a prefix is two binary searches. Matches
+    rank by popularity, with a bonus when the prefix starts the name.
+    """
+    def __init__(self, names, popularity):
+        self.names = [normalize_name(n) for n in names]
+        self.popularity = np.asarray(popularity, dtype=np.float64)
+
+        keys, rows, at_start = [], [], []
+        for row, name in enumerate(self.names):
+            start = 0
+            for i, word in enumerate(name.split(' ')):
+                if word:
+                    keys.append(name[start:].encode('utf-8')[:KEY_BYTES])
+                    rows.append(row)
+                    at_start.append(i == 0)
+                start += len(word) + 1
+
+        keys = np.array(keys, dtype=f'S{KEY_BYTES}')
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.rows = np.array(rows, dtype=np.int32)[order]
+        self.scores = self.popularity[self.rows] + np.array(at_start, dtype=np.float64)[order]
+
+    def complete(self, prefix, limit=10):
+        """
+        Row positions of up to `limit` recipes with a name word starting with prefix, best first.
+        """
+        prefix = normalize_name(prefix)
+        if not prefix or limit <= 0:
+            return np.empty(0, dtype=np.int32)
+
+        encoded = prefix.encode('utf-8')
+        key = encoded[:KEY_BYTES]
+        lo = np.searchsorted(self.keys, key, side='left')
+        hi = np.searchsorted(self.keys, key + b'\xff', side='left')
+        if lo == hi:
+            return np.empty(0, dtype=np.int32)
+
+        rows, scores = self.rows[lo:hi], self.scores[lo:hi]
+        if len(encoded) > KEY_BYTES:
+            keep = np.array([prefix in self.names[r] for r in rows], dtype=bool)
+            rows, scores = rows[keep], scores[keep]
+
+        # Popular names are the most duplicated, so widen the cut until it
+        # holds `limit` distinct names or covers every match.
+        take = limit * OVERFETCH
+        while True:
+            take = min(len(rows), take)
+            if take < len(rows):
+                best = np.argpartition(-scores, take - 1)[:take]
+                ranked = rows[best][np.lexsort((rows[best], -scores[best]))]
+            else:
+                ranked = rows[np.lexsort((rows, -scores))]
+
+            results, seen = [], set()
+            for row in ranked.tolist():
+                name = self.names[row]
+                if name in seen:
+                    continue
+                seen.add(name)
+                results.append(row)
+                if len(results) == limit:
+                    break
+            if len(results) == limit or take == len(rows):
+                break
+            take *= OVERFETCH
+        return np.array(results, dtype=np.int32)
@@ -0,0 +1,322 @@
+import itertools
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Numeric columns are narrowed to these at load time; integer columns get the
+# smallest signed dtype that holds their range (Food.com has outlier minutes).
+FLOAT_DTYPE = np.float32
+INT_DTYPES = [np.int16, np.int32, np.int64]
+
+
+def smallest_int_dtype(values):
+    values = np.asarray(values)
+    if len(values) == 0:
+        return INT_DTYPES[0]
+    lo, hi = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def compact_frame(df, float_columns, int_columns):
+    """
+    Copy of df with float_columns as float32 and int_columns as the smallest
+    integer dtype that fits.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col in float_columns:
+            values = values.astype(FLOAT_DTYPE)
+        elif col in int_columns:
+            values = values.astype(np.int64)
+            values = values.astype(smallest_int_dtype(values))
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _strings_nbytes(strings):
+    return int(sum(sys.getsizeof(s) for s in strings))
+
+
+def flatten_lists(lists):
+    """
+    (lengths, items) for a list-of-lists column or an InternedLists.
+    """
+    if isinstance(lists, InternedLists):
+        return lists.flat()
+    lists = list(lists)
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    items = np.empty(int(lengths.sum()), dtype=object)
+    items[:] = list(itertools.chain.from_iterable(lists))
+    return lengths, items
+
+
+class InternedLists:
+    """
+    A list-of-strings column (tags, ingredients) stored as the distinct strings
+    once plus int32 ids into them, flattened with int64 row offsets: row i is
+    vocabulary[ids[offsets[i]:offsets[i + 1]]]. Replaces one Python list of
+    string references per row.
+    """
+    def __init__(self, vocabulary, ids, offsets):
+        self.vocabulary = list(vocabulary)
+        self.ids = ids
+        self.offsets = offsets
+
+    @classmethod
+    def from_lists(cls, lists):
+        builder = InternedListsBuilder()
+        builder.extend(lists)
+        return builder.finish()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def row(self, i):
+        vocabulary = self.vocabulary
+        return [vocabulary[j] for j in self.ids[self.offsets[i]:self.offsets[i + 1]].tolist()]
+
+    def take(self, rows):
+        return [self.row(i) for i in rows]
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def flat(self):
+        """
+        (lengths, items): per-row list lengths and every item as one object array.
+        """
+        return np.diff(self.offsets), np.asarray(self.vocabulary, dtype=object)[self.ids]
+
+    def joined(self, sep=' '):
+        """
+        One sep-joined string per row.
+        """
+        return [sep.join(items) for items in self]
+
+    @property
+    def nbytes(self):
+        return int(self.ids.nbytes + self.offsets.nbytes) + _strings_nbytes(self.vocabulary)
+
+
+class TextColumn:
+    """
+    Many strings stored as one UTF-8 buffer plus int64 offsets; substring
+    search runs bytes.find over the whole buffer instead of per-row objects.
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        builder = BlobBuilder()
+        builder.extend(str(s).encode('utf-8') for s in strings)
+        return cls(*builder.finish())
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self.get(i) for i in range(len(self)))
+
+    def contains(self, needle):
+        """
+        Boolean row mask of strings containing needle (literal, case-sensitive).
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        needle = str(needle).encode('utf-8')
+        if not needle:
+            mask[:] = True
+            return mask
+        data = self.blob.tobytes()
+        hits = []
+        pos = data.find(needle)
+        while pos != -1:
+            # Skip to the next row once a row has matched
+            row = int(np.searchsorted(self.offsets, pos, side='right')) - 1
+            if pos + len(needle) <= self.offsets[row + 1]:
+                hits.append(row)
+                pos = data.find(needle, int(self.offsets[row + 1]))
+            else:
+                pos = data.find(needle, pos + 1)
+        mask[hits] = True
+        return mask
+
+    @property
+    def nbytes(self):
+        return int(self.blob.nbytes + self.offsets.nbytes)
+
+
+class JsonRows:
+    """
+    Read-only sequence over JSON documents stored back to back in one uint8
+    buffer with int64 offsets (e.g. the serialized meal cards). Item i is
+    decoded on access, so a process holds the buffer (memory-mapped from the
+    snapshot) instead of one dict per row; every access returns a fresh object.
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return json.loads(self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes())
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return int(self.blob.nbytes + self.offsets.nbytes)
+
+
+class GrowableArray:
+    """
+    Append-only numpy array for columns whose final length is not known up
+    front (chunked CSV ingestion). Capacity can be reserved from an estimate
+    and otherwise doubles; both grow and the final trim resize the buffer in
+    place (realloc), so the old and new buffers are not held side by side.
+    """
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def reserve(self, capacity):
+        if capacity > len(self._data):
+            # No views of the buffer exist until finish(), so skip numpy's reference check
+            self._data.resize(capacity, refcheck=False)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            self.reserve(max(end, 2 * len(self._data)))
+        self._data[self._size:end] = values
+        self._size = end
+
+    def finish(self):
+        """
+        The appended values as an array of exactly len(self) items; the builder
+        must not be extended afterwards.
+        """
+        if self._size != len(self._data):
+            self._data.resize(self._size, refcheck=False)
+        return self._data
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+class BlobBuilder:
+    """
+    Appends byte strings into one uint8 buffer plus row lengths; finish()
+    returns (blob, offsets) as used by TextColumn and JsonRows.
+    """
+    def __init__(self):
+        self._blob = GrowableArray(np.uint8, capacity=1 << 16)
+        self._lengths = GrowableArray(np.int64)
+
+    def __len__(self):
+        return len(self._lengths)
+
+    @property
+    def nbytes(self):
+        return len(self._blob)
+
+    def reserve(self, rows, nbytes):
+        self._lengths.reserve(rows)
+        self._blob.reserve(nbytes)
+
+    def extend(self, fragments):
+        fragments = list(fragments)
+        self._lengths.extend([len(f) for f in fragments])
+        self._blob.extend(np.frombuffer(b''.join(fragments), dtype=np.uint8))
+
+    def finish(self):
+        return self._blob.finish(), _offsets(self._lengths.finish())
+
+
+class InternedListsBuilder:
+    """
+    Builds an InternedLists one batch of rows at a time. Ids follow first
+    appearance across all batches, so the result is the same however the
+    rows were split.
+    """
+    def __init__(self):
+        self._index = {}
+        self._vocabulary = []
+        self._ids = GrowableArray(np.int32, capacity=1 << 14)
+        self._lengths = GrowableArray(np.int64)
+
+    def extend(self, lists):
+        lists = list(lists)
+        self._lengths.extend(np.fromiter(map(len, lists), dtype=np.int64, count=len(lists)))
+        flat = pd.Series([item for items in lists for item in items], dtype=object).astype(str)
+        # Factorize the batch, then map its (few) distinct strings to global ids
+        codes, uniques = pd.factorize(flat)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for j, item in enumerate(uniques):
+            idx = self._index.get(item)
+            if idx is None:
+                idx = self._index[item] = len(self._vocabulary)
+                self._vocabulary.append(item)
+            mapping[j] = idx
+        self._ids.extend(mapping[codes])
+
+    def finish(self):
+        return InternedLists(self._vocabulary, self._ids.finish(), _offsets(self._lengths.finish()))
+
+
+def column_bytes(df, extra=None):
+    """
+    {column: bytes} for a DataFrame (object columns count their Python
+    objects, approximately) plus any extra {name: object with nbytes}.
+    """
+    usage = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            # Lists count their items too (pandas' deep usage stops at the list)
+            usage[col] = sum(sys.getsizeof(v) + (_strings_nbytes(v) if isinstance(v, list) else 0) for v in values) \
+                + values.nbytes
+        else:
+            usage[col] = int(values.nbytes)
+    for name, value in (extra or {}).items():
+        usage[name] = int(value.nbytes)
+    return usage
+
+
+def format_column_bytes(before, after):
+    """
+    Log lines comparing two column_bytes reports.
+    """
+    def mb(value):
+        return '-' if value is None else f"{value / 1e6:.2f} MB"
+
+    lines = [f"{'column':<20}{'before':>12}{'after':>12}"]
+    for col in dict.fromkeys(list(before) + list(after)):
+        lines.append(f"{col:<20}{mb(before.get(col)):>12}{mb(after.get(col)):>12}")
+    lines.append(f"{'total':<20}{mb(sum(before.values())):>12}{mb(sum(after.values())):>12}")
+    return "\n".join(lines)
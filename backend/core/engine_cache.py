@@ -0,0 +1,168 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build lock
+    fcntl = None
+
+import numpy as np
+from scipy import sparse
+
+# Bump whenever the on-disk layout, the parsing rules or the meal card format
+# change so stale snapshots are ignored instead of being loaded into a newer engine.
+SNAPSHOT_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', '.engine_cache')
+
+
+class Snapshot:
+    """
+    Parsed engine state read back from disk.
+    arrays: dense numpy columns, matrices: CSR matrices, objects: JSON-able lists, meta: dict.
+    """
+    def __init__(self, path, meta, arrays, matrices, objects):
+        self.path = path
+        self.meta = meta
+        self.arrays = arrays
+        self.matrices = matrices
+        self.objects = objects
+
+
+def source_fingerprint(path, chunk_size=1 << 20):
+    """
+    SHA-256 of the source file contents. Snapshots are keyed by this so a
+    changed CSV is always re-parsed.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_version(fingerprint):
+    """
+    Short dataset id reported in responses and bound into page cursors.
+    """
+    return fingerprint[:12]
+
+
+def snapshot_path(cache_dir, fingerprint):
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"v{SNAPSHOT_VERSION}-{fingerprint[:16]}")
+
+
+@contextlib.contextmanager
+def build_lock(path):
+    """
+    Exclusive lock (path + '.lock') held while building the snapshot at path,
+    so workers that start or reload on the same dataset together parse it
+    once: the rest wait, then read the snapshot the first one wrote. Does not
+    lock if the lock file can't be created (read-only cache dir, no fcntl).
+    """
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        lock_file = open(path + '.lock', 'a')
+    except OSError:
+        lock_file = None
+    if lock_file is None or fcntl is None:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_snapshot(path, meta, arrays=None, matrices=None, objects=None):
+    """
+    Writes a snapshot directory atomically: everything goes to a temp dir
+    first and is renamed into place, so concurrent workers never read a
+    half-written snapshot.
+    """
+    arrays = arrays or {}
+    matrices = matrices or {}
+    objects = objects or {}
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(arr))
+
+        # CSR matrices are stored as their three component arrays so they can
+        # be loaded without going through scipy's zip-based save_npz.
+        for name, matrix in matrices.items():
+            matrix = sparse.csr_matrix(matrix)
+            np.save(os.path.join(tmp_dir, f"{name}.data.npy"), matrix.data)
+            np.save(os.path.join(tmp_dir, f"{name}.indices.npy"), matrix.indices)
+            np.save(os.path.join(tmp_dir, f"{name}.indptr.npy"), matrix.indptr)
+
+        with open(os.path.join(tmp_dir, 'objects.json'), 'w', encoding='utf-8') as f:
+            json.dump(objects, f)
+
+        meta = dict(meta)
+        meta.update({
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.time(),
+            "arrays": sorted(arrays),
+            "matrices": {name: list(m.shape) for name, m in matrices.items()},
+        })
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(tmp_dir, path)
+        except OSError:
+            # Another worker finished first; its snapshot is equivalent.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def read_snapshot(path, mmap=False):
+    """
+    Returns a Snapshot, or None if the directory is missing, from another
+    snapshot version, or unreadable.
+    With mmap, arrays and CSR parts are read-only memory maps of the .npy
+    files: pages are loaded on first touch and live in the OS page cache, so
+    every worker process mapping the same snapshot shares one physical copy.
+    """
+    mmap_mode = 'r' if mmap else None
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in meta.get("arrays", [])}
+
+        matrices = {}
+        for name, shape in meta.get("matrices", {}).items():
+            matrices[name] = sparse.csr_matrix((
+                np.load(os.path.join(path, f"{name}.data.npy"), mmap_mode=mmap_mode),
+                np.load(os.path.join(path, f"{name}.indices.npy"), mmap_mode=mmap_mode),
+                np.load(os.path.join(path, f"{name}.indptr.npy"), mmap_mode=mmap_mode),
+            ), shape=tuple(shape))
+
+        with open(os.path.join(path, 'objects.json'), encoding='utf-8') as f:
+            objects = json.load(f)
+
+        return Snapshot(path, meta, arrays, matrices, objects)
+    except Exception as e:
+        print(f"Ignoring unreadable engine snapshot at {path}: {e}")
+        return None
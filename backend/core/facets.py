@@ -0,0 +1,51 @@
+import numpy as np
+
+# Food.com tags grouped into the facets the meals page shows. Anything not
+# listed under diet/cuisine (and not a structural tag) is a plain "tags" facet.
+DIET_FACETS = [
+    'vegan', 'vegetarian', 'gluten-free', 'dairy-free', 'egg-free', 'nut-free', 'low-carb', 'low-fat',
+    'low-calorie', 'low-sodium', 'low-cholesterol', 'high-protein', 'high-fiber', 'paleo', 'kosher',
+    'diabetic', 'healthy',
+]
+CUISINE_FACETS = [
+    'american', 'north-american', 'mexican', 'tex-mex', 'southwestern-united-states', 'italian', 'french',
+    'greek', 'spanish', 'german', 'european', 'mediterranean', 'middle-eastern', 'moroccan', 'african',
+    'caribbean', 'asian', 'chinese', 'japanese', 'korean', 'thai', 'vietnamese', 'indian',
+]
+# Food.com category-header tags that sit on nearly every recipe.
+STRUCTURAL_TAGS = [
+    'time-to-make', 'course', 'main-ingredient', 'preparation', 'occasion', 'cuisine', 'dietary',
+    'equipment', 'number-of-servings', 'taste-mood', 'low-in-something', 'technique',
+]
+DEFAULT_FACET_LIMIT = 10
+FACET_GROUPS = ('diet', 'cuisine', 'tags')
+
+
+def empty_facets():
+    """
+    facet_counts' shape with no values, for searches without a dataset.
+    """
+    return {name: [] for name in FACET_GROUPS}
+
+
+def facet_counts(tag_index, rows=None, limit=DEFAULT_FACET_LIMIT):
+    """
+    {"diet": [...], "cuisine": [...], "tags": [...]} with up to `limit`
+    {"value", "count"} entries each, counted over `rows` (None = all rows)
+    from the per-tag bitmaps.
+    """
+    counts = tag_index.counts_within(rows)
+    grouped = set(DIET_FACETS) | set(CUISINE_FACETS) | set(STRUCTURAL_TAGS)
+
+    def group(tags):
+        ids = np.array([tag_index.vocabulary[t] for t in tags if t in tag_index.vocabulary], dtype=np.int64)
+        if len(ids) == 0:
+            return []
+        ids = ids[np.argsort(-counts[ids], kind='stable')][:limit]
+        return [{"value": tag_index.tags[i], "count": int(counts[i])} for i in ids if counts[i] > 0]
+
+    return {
+        "diet": group(DIET_FACETS),
+        "cuisine": group(CUISINE_FACETS),
+        "tags": [{"value": tag, "count": count} for tag, count in tag_index.top(limit, counts, exclude=grouped)],
+    }
@@ -0,0 +1,107 @@
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+
+from core.compact import flatten_lists
+
+# Allergy names users type -> ingredient words that should exclude a recipe.
+# Matching is on whole normalized tokens, so "nut" no longer hits nutmeg or coconut.
+ALLERGEN_SYNONYMS = {
+    'nut': ['nut', 'almond', 'walnut', 'pecan', 'cashew', 'hazelnut', 'pistachio', 'macadamia', 'peanut', 'praline', 'marzipan', 'nutella'],
+    'tree nut': ['almond', 'walnut', 'pecan', 'cashew', 'hazelnut', 'pistachio', 'macadamia', 'pine nut', 'marzipan'],
+    'peanut': ['peanut'],
+    'dairy': ['milk', 'cheese', 'butter', 'cream', 'yogurt', 'ghee', 'whey', 'buttermilk', 'parmesan', 'mozzarella', 'cheddar', 'ricotta', 'sour cream'],
+    'lactose': ['milk', 'cheese', 'cream', 'yogurt', 'buttermilk', 'ricotta'],
+    'gluten': ['wheat', 'flour', 'bread', 'breadcrumb', 'pasta', 'noodle', 'barley', 'rye', 'couscous', 'semolina', 'tortilla', 'cracker'],
+    'wheat': ['wheat', 'flour', 'bread', 'breadcrumb', 'pasta', 'noodle', 'couscous', 'semolina'],
+    'egg': ['egg', 'mayonnaise'],
+    'shellfish': ['shrimp', 'prawn', 'crab', 'lobster', 'clam', 'mussel', 'oyster', 'scallop', 'crawfish'],
+    'fish': ['fish', 'salmon', 'tuna', 'cod', 'tilapia', 'halibut', 'trout', 'anchovy', 'sardine', 'mackerel'],
+    'soy': ['soy', 'tofu', 'edamame', 'tempeh', 'miso', 'soybean'],
+    'sesame': ['sesame', 'tahini'],
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_token(token):
+    # Cheap singularisation so "walnuts"/"walnut" and "berries"/"berry" share a token.
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [normalize_token(t) for t in _TOKEN_RE.findall(str(text).lower())]
+
+
+class IngredientIndex:
+    """
+    Inverted index from normalized ingredient token to the sorted int32 rows
+    of engine.data whose ingredients contain it. Allergen exclusion is a
+    union of postings subtracted from the candidate mask.
+    """
+    def __init__(self, ingredients_lists, synonyms=None):
+        # ingredients_lists: per-row lists of ingredients, or an InternedLists
+        lengths, items = flatten_lists(ingredients_lists)
+        self.n_rows = len(lengths)
+        self.synonyms = {tuple(tokenize(k)): [tokenize(s) for s in v] for k, v in (synonyms or {}).items()}
+
+        rows = np.repeat(np.arange(self.n_rows, dtype=np.int64), lengths)
+        codes, uniques = pd.factorize(pd.Series(items, dtype=object))
+
+        # Tokenize each distinct ingredient string once, then fan out to rows.
+        self.tokens = {}
+        unique_tokens = []
+        for ingredient in uniques:
+            unique_tokens.append([self.tokens.setdefault(t, len(self.tokens)) for t in set(tokenize(ingredient))])
+        token_counts = np.array([len(t) for t in unique_tokens], dtype=np.int64)
+        token_flat = np.fromiter(itertools.chain.from_iterable(unique_tokens), dtype=np.int64, count=int(token_counts.sum()))
+        token_offsets = np.concatenate([[0], np.cumsum(token_counts)])
+
+        per_item = token_counts[codes]
+        starts = np.repeat(token_offsets[codes] - np.concatenate([[0], np.cumsum(per_item)[:-1]]), per_item)
+        pair_tokens = token_flat[starts + np.arange(per_item.sum(), dtype=np.int64)]
+        pair_rows = np.repeat(rows, per_item)
+
+        # Unique (token, row) pairs sorted by token, then split into postings.
+        keys = np.unique(pair_tokens * max(self.n_rows, 1) + pair_rows)
+        key_tokens, key_rows = np.divmod(keys, max(self.n_rows, 1))
+        bounds = np.searchsorted(key_tokens, np.arange(len(self.tokens) + 1))
+        rows32 = key_rows.astype(np.int32)
+        self.postings = [rows32[bounds[i]:bounds[i + 1]] for i in range(len(self.tokens))]
+
+    def _rows_with_tokens(self, tokens):
+        result = None
+        for token in tokens:
+            token_id = self.tokens.get(token)
+            if token_id is None:
+                return np.empty(0, dtype=np.int32)
+            postings = self.postings[token_id]
+            result = postings if result is None else np.intersect1d(result, postings, assume_unique=True)
+        return result if result is not None else np.empty(0, dtype=np.int32)
+
+    def expand(self, term):
+        """
+        The allergen itself plus any synonyms, as token lists.
+        """
+        tokens = tokenize(term)
+        return [tokens] + self.synonyms.get(tuple(tokens), [])
+
+    def _postings_for(self, allergies):
+        return [self._rows_with_tokens(tokens)
+                for allergy in allergies if str(allergy).strip()
+                for tokens in self.expand(allergy)]
+
+    def exclude(self, mask, allergies):
+        """
+        Clears allergen rows from a boolean row mask in place and returns it.
+        Postings are scattered straight into the mask, no union is materialized.
+        """
+        for rows in self._postings_for(allergies):
+            mask[rows] = False
+        return mask
@@ -0,0 +1,75 @@
+import numpy as np
+
+# Masks selecting fewer than 1/SPARSE_MASK_RATIO of the rows are scored on a gathered subset.
+SPARSE_MASK_RATIO = 8
+# Upper bound on distance-matrix cells materialized at once by masked_top_k_batch.
+BATCH_BLOCK_ELEMENTS = 4_000_000
+
+
+def squared_norms(features):
+    return np.einsum('ij,ij->i', features, features)
+
+
+def masked_top_k(features, sq_norms, query, mask, k):
+    """
+    Rows of `features` nearest to `query` (Euclidean), restricted to rows where
+    `mask` is True, ordered by distance. Returns (rows, distances).
+
+    Uses ||f||^2 - 2 f.q + ||q||^2 with precomputed row norms and picks the top
+    k with argpartition, so there is no per-request model fit. Broad masks are
+    scored over the whole matrix with excluded rows pushed to +inf (no subset
+    copy); narrow masks only gather the few rows they select.
+    """
+    query = np.asarray(query, dtype=features.dtype).ravel()
+    n_selected = int(np.count_nonzero(mask))
+    k = min(k, n_selected)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    q2 = float(query @ query)
+    if n_selected * SPARSE_MASK_RATIO < len(mask):
+        rows = np.flatnonzero(mask)
+        d2 = sq_norms[rows] - 2.0 * (features[rows] @ query) + q2
+    else:
+        rows = None
+        d2 = np.where(mask, sq_norms - 2.0 * (features @ query) + q2, np.inf)
+
+    top = np.argpartition(d2, k - 1)[:k] if k < len(d2) else np.arange(len(d2))
+    top = top[np.argsort(d2[top], kind='stable')]
+    distances = np.sqrt(np.maximum(d2[top], 0.0))
+    return (top if rows is None else rows[top]), distances
+
+
+def masked_top_k_batch(features, sq_norms, queries, mask, k, block_elements=BATCH_BLOCK_ELEMENTS):
+    """
+    masked_top_k for several queries sharing one mask. The selected rows are
+    gathered once and scored against a block of queries with a single matrix
+    product. Returns (rows, distances), each shaped (n_queries, k).
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=features.dtype))
+    selected = np.flatnonzero(mask)
+    k = min(k, len(selected))
+    if k <= 0 or len(queries) == 0:
+        empty = np.empty((len(queries), 0))
+        return empty.astype(np.int64), empty
+
+    sub = features[selected]
+    sub_norms = sq_norms[selected]
+    block = max(1, block_elements // len(selected))
+    all_rows, all_distances = [], []
+
+    for start in range(0, len(queries), block):
+        q = queries[start:start + block]
+        # (n_selected, n_block) squared distances
+        d2 = sub_norms[:, None] - 2.0 * (sub @ q.T) + np.einsum('ij,ij->i', q, q)[None, :]
+        top = np.argpartition(d2, k - 1, axis=0)[:k] if k < len(selected) else \
+            np.broadcast_to(np.arange(len(selected))[:, None], d2.shape).copy()
+        top_d2 = np.take_along_axis(d2, top, axis=0)
+        order = np.argsort(top_d2, axis=0, kind='stable')
+        top = np.take_along_axis(top, order, axis=0)
+        top_d2 = np.take_along_axis(top_d2, order, axis=0)
+
+        all_rows.append(selected[top.T])
+        all_distances.append(np.sqrt(np.maximum(top_d2.T, 0.0)))
+
+    return np.vstack(all_rows), np.vstack(all_distances)
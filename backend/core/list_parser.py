@@ -0,0 +1,143 @@
+import ast
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# Cells the bulk paths can handle. Anything else (escaped characters, quotes
+# inside strings, NaN, truncated rows) goes through the per-cell fallback.
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+NUMERIC_LIST_RE = re.compile(rf'\[\s*(?:{_NUMBER}(?:\s*,\s*{_NUMBER})*)?\s*\]')
+STRING_LIST_RE = re.compile(r"\[(?:'[^'\"\\]*'(?:,\s*'[^'\"\\]*')*)?\]")
+
+
+class ParsedColumn:
+    """
+    A column of lists stored flat: row i owns values[offsets[i]:offsets[i + 1]].
+    fallback_rows counts cells that needed the slow per-cell parser.
+    """
+    def __init__(self, values, offsets, fallback_rows=0, rows=None):
+        self.values = values
+        self.offsets = offsets
+        self.fallback_rows = fallback_rows
+        self._rows = rows
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def column(self, idx, default=0.0):
+        """
+        Element idx of every row as a float array, `default` where the row is too short.
+        """
+        starts = self.offsets[:-1]
+        present = self.lengths() > idx
+        out = np.full(len(self), default, dtype=np.float64)
+        out[present] = self.values[starts[present] + idx]
+        return out
+
+    def rows(self):
+        """
+        Back to one Python list per row.
+        """
+        if self._rows is not None:
+            return self._rows
+        values = self.values.tolist() if isinstance(self.values, np.ndarray) else self.values
+        offsets = self.offsets.tolist()
+        return [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def _literal_eval_list(val):
+    try:
+        parsed = ast.literal_eval(str(val))
+    except Exception:
+        return []
+    return list(parsed) if isinstance(parsed, (list, tuple)) else []
+
+
+def _to_offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _ranges(starts, lengths):
+    # Concatenation of arange(start, start + length) for every pair, without a Python loop.
+    base = np.repeat(starts - _to_offsets(lengths)[:-1], lengths)
+    return base + np.arange(lengths.sum(), dtype=np.int64)
+
+
+def parse_float_lists(values):
+    """
+    Parses a column like "[51.5, 0.0, 13.0]" into a flat float64 ParsedColumn.
+    Well-formed cells are split and converted in bulk; the rest use literal_eval.
+    """
+    cells = pd.Series(values, dtype=object).astype(str).str.strip()
+    n = len(cells)
+    fast = cells.str.fullmatch(NUMERIC_LIST_RE.pattern).fillna(False).to_numpy(dtype=bool)
+
+    bodies = cells[fast].str.slice(1, -1).str.replace(' ', '', regex=False)
+    lengths = np.zeros(n, dtype=np.int64)
+    non_empty = (bodies != '').to_numpy(dtype=bool)
+    lengths[fast] = np.where(non_empty, bodies.str.count(',').to_numpy() + 1, 0)
+
+    try:
+        fast_values = np.array(','.join(bodies[non_empty]).split(','), dtype=np.float64) if non_empty.any() \
+            else np.empty(0, dtype=np.float64)
+    except ValueError:
+        # Something the regex let through that float() rejects; parse everything slowly.
+        fast[:] = False
+        lengths[:] = 0
+        fast_values = np.empty(0, dtype=np.float64)
+
+    slow_idx = np.flatnonzero(~fast)
+    slow_rows = {}
+    for i in slow_idx:
+        parsed = []
+        for item in _literal_eval_list(cells.iat[i]):
+            try:
+                parsed.append(float(item))
+            except (TypeError, ValueError):
+                parsed = []
+                break
+        slow_rows[i] = parsed
+        lengths[i] = len(parsed)
+
+    offsets = _to_offsets(lengths)
+    if not slow_rows:
+        return ParsedColumn(fast_values, offsets)
+
+    flat = np.empty(offsets[-1], dtype=np.float64)
+    flat[_ranges(offsets[:-1][fast], lengths[fast])] = fast_values
+    for i, parsed in slow_rows.items():
+        flat[offsets[i]:offsets[i + 1]] = parsed
+    return ParsedColumn(flat, offsets, fallback_rows=len(slow_rows))
+
+
+def parse_string_lists(values):
+    """
+    Parses a column like "['a', 'b']" into a flat ParsedColumn of Python strings.
+    Cells without quotes/escapes inside the items are rewritten as JSON and
+    decoded with a single json.loads call for the whole column. strict=False
+    lets raw tabs/newlines through, as literal_eval does.
+    """
+    cells = pd.Series(values, dtype=object).astype(str).str.strip()
+    fast = cells.str.fullmatch(STRING_LIST_RE.pattern).fillna(False).to_numpy(dtype=bool)
+
+    rows = [None] * len(cells)
+    fast_idx = np.flatnonzero(fast)
+    if len(fast_idx):
+        payload = '[' + ','.join(cells[fast].str.replace("'", '"', regex=False)) + ']'
+        for i, row in zip(fast_idx.tolist(), json.loads(payload, strict=False)):
+            rows[i] = row
+
+    slow_idx = np.flatnonzero(~fast)
+    for i in slow_idx.tolist():
+        rows[i] = [str(item) for item in _literal_eval_list(cells.iat[i])]
+
+    offsets = _to_offsets([len(r) for r in rows])
+    flat = [item for row in rows for item in row]
+    return ParsedColumn(flat, offsets, fallback_rows=len(slow_idx), rows=rows)
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+
+# /proc/<pid>/smaps_rollup lines (kB) summed into each reported figure.
+SMAPS_FIELDS = {
+    'rss': ['Rss'],
+    'pss': ['Pss'],
+    'shared': ['Shared_Clean', 'Shared_Dirty'],
+    'private': ['Private_Clean', 'Private_Dirty'],
+    'swap': ['Swap'],
+}
+
+
+def parse_smaps_rollup(text):
+    """
+    {"rss", "pss", "shared", "private", "swap"} in bytes from smaps_rollup text.
+    """
+    values = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+            values[parts[0][:-1]] = int(parts[1]) * 1024
+    return {key: sum(values.get(field, 0) for field in fields) for key, fields in SMAPS_FIELDS.items()}
+
+
+def process_memory(pid='self'):
+    """
+    Resident memory of a process split into pages shared with other processes
+    (copy-on-write pages inherited from a preloading master, page cache of
+    memory-mapped snapshot files) and private pages, in bytes. Linux only;
+    None where /proc is unavailable. pss is None on kernels without smaps_rollup.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            return parse_smaps_rollup(f.read())
+    except OSError:
+        pass
+    try:
+        # statm: size resident shared ... in pages; "shared" is file-backed resident pages
+        with open(f'/proc/{pid}/statm') as f:
+            pages = [int(v) for v in f.read().split()]
+    except OSError:
+        return None
+    page = os.sysconf('SC_PAGE_SIZE')
+    rss, shared = pages[1] * page, pages[2] * page
+    return {"rss": rss, "pss": None, "shared": shared, "private": rss - shared, "swap": 0}
+
+
+def is_mapped(array):
+    """
+    True if a numpy array is (a view of) a memory-mapped file.
+    """
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def array_memory(arrays):
+    """
+    {"mapped", "private"}: bytes of the arrays backed by memory-mapped files vs heap arrays.
+    """
+    totals = {"mapped": 0, "private": 0}
+    for array in arrays:
+        totals["mapped" if is_mapped(array) else "private"] += int(array.nbytes)
+    return totals
+
+
+def memory_report(label, engine=None):
+    """
+    One log line with this process's resident/shared/private memory and,
+    with an engine, how much of its array state is mapped from the snapshot.
+    """
+    def mb(value):
+        return "n/a" if value is None else f"{value / 1e6:.1f} MB"
+
+    memory = process_memory()
+    if memory is None:
+        line = f"[{label}] pid {os.getpid()}: process memory not available on this platform"
+    else:
+        line = (f"[{label}] pid {os.getpid()}: rss {mb(memory['rss'])} (shared {mb(memory['shared'])}, "
+                f"private {mb(memory['private'])}, pss {mb(memory['pss'])})")
+    if engine is not None:
+        arrays = array_memory(engine.numeric_arrays())
+        line += f"; engine arrays {mb(arrays['mapped'])} mapped from snapshot, {mb(arrays['private'])} in heap"
+    return line
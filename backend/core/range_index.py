@@ -0,0 +1,83 @@
+import numpy as np
+
+# Numeric columns that accept min_<col>/max_<col> filters.
+RANGE_COLUMNS = ['calories', 'protein', 'carbs', 'fats', 'minutes']
+
+
+def parse_range_args(args, columns=RANGE_COLUMNS):
+    """
+    {column: (lo, hi)} from min_<col>/max_<col> request args; either bound
+    may be None. Raises ValueError for non-numeric or inverted bounds.
+    """
+    ranges = {}
+    for col in columns:
+        lo, hi = args.get(f'min_{col}'), args.get(f'max_{col}')
+        if lo in (None, '') and hi in (None, ''):
+            continue
+        try:
+            lo = None if lo in (None, '') else float(lo)
+            hi = None if hi in (None, '') else float(hi)
+        except (TypeError, ValueError):
+            raise ValueError(f"min_{col}/max_{col} must be numbers")
+        if lo is not None and hi is not None and lo > hi:
+            raise ValueError(f"min_{col} is greater than max_{col}")
+        ranges[col] = (lo, hi)
+    return ranges
+
+
+class RangeIndex:
+    """
+    Per-column sorted values plus the row order that sorts them, so an
+    inclusive [lo, hi] range is two binary searches. Multi-column filters
+    start from the narrowest range and check the others on its rows only.
+    """
+    def __init__(self, columns):
+        self.n_rows = 0
+        self.values = {}
+        self.sorted_values = {}
+        self.order = {}
+        for name, values in columns.items():
+            values = np.asarray(values, dtype=np.float64)
+            order = np.argsort(values, kind='stable').astype(np.int32)
+            self.n_rows = len(values)
+            self.values[name] = values
+            self.order[name] = order
+            self.sorted_values[name] = values[order]
+
+    def _bounds(self, name, lo, hi):
+        sorted_values = self.sorted_values[name]
+        start = 0 if lo is None else np.searchsorted(sorted_values, lo, side='left')
+        end = len(sorted_values) if hi is None else np.searchsorted(sorted_values, hi, side='right')
+        return start, max(start, end)
+
+    def rows(self, ranges):
+        """
+        Sorted int32 rows whose values fall inside every (lo, hi) range.
+        """
+        if not ranges:
+            return np.arange(self.n_rows, dtype=np.int32)
+        for name in ranges:
+            if name not in self.values:
+                raise KeyError(f"No range index for column '{name}'")
+
+        bounds = {name: self._bounds(name, lo, hi) for name, (lo, hi) in ranges.items()}
+        narrowest = min(bounds, key=lambda name: bounds[name][1] - bounds[name][0])
+        start, end = bounds[narrowest]
+        rows = self.order[narrowest][start:end]
+
+        for name, (lo, hi) in ranges.items():
+            if name == narrowest or len(rows) == 0:
+                continue
+            values = self.values[name][rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if lo is not None:
+                keep &= values >= lo
+            if hi is not None:
+                keep &= values <= hi
+            rows = rows[keep]
+        return np.sort(rows)
+
+    def mask(self, ranges):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.rows(ranges)] = True
+        return mask
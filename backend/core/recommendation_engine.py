@@ -1,29 +1,93 @@
 import pandas as pd
-from sklearn.neighbors import NearestNeighbors
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
 import numpy as np
 import os
-import ast
 import random
 import requests
 import json
+import time
+import zlib
 from dotenv import load_dotenv
 from services.ai_service import AIService
+from core import engine_cache, knn, list_parser
+from core.tag_index import TagIndex, popcount, unpack
+from core.search_index import TfidfSearchIndex, TypoTolerantSearch, LatentSearchIndex, top_k
+from core.facets import facet_counts, empty_facets
+from core import bm25
+from core.similar import build_similar_table
+from core.autocomplete import AutocompleteIndex, popularity_scores
+from core.range_index import RangeIndex, RANGE_COLUMNS
+from core.weekly_planner import WeeklyPlanner, DAYS, MEAL_SLOTS, SLOT_TAGS, EXCLUDED_TAGS, day_cost
+from core.ingredient_index import IngredientIndex, ALLERGEN_SYNONYMS
+from core.compact import (InternedLists, InternedListsBuilder, BlobBuilder, GrowableArray, TextColumn, JsonRows, FLOAT_DTYPE,
+                          compact_frame, column_bytes, format_column_bytes)
 
 # Load environment variables from root .env
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
 load_dotenv(dotenv_path)
 
 class RecommendationEngine:
-    def __init__(self):
+    # Columns kept on self.data after parsing; these are also what the
+    # on-disk snapshot persists, so both load paths produce the same frame.
+    NUMERIC_COLUMNS = ['id', 'minutes', 'calories', 'protein', 'carbs', 'fats']
+    TEXT_COLUMNS = ['name']
+    # Stored as float32 / the smallest integer dtype that fits
+    FLOAT_COLUMNS = ['calories', 'protein', 'carbs', 'fats']
+    INT_COLUMNS = ['id', 'minutes']
+
+    def __init__(self, data_path=None, cache_dir=None):
         self.data = None
-        self.model = None
+        # Tags and ingredients as interned ids + offsets (see core.compact), and
+        # the lowercased name/ingredients/tags text the admin search scans
+        self.tag_lists = None
+        self.ingredient_lists = None
+        self.search_text = None
         self.scaler = None
         self.tfidf = None
         self.tfidf_matrix = None
+        self.tfidf_term_rows = None
+        self.char_tfidf = None
+        self.char_tfidf_matrix = None
+        self.char_tfidf_term_rows = None
+        self.latent_vectors = None
+        self.latent_components = None
+        self.bm25_vocabulary = None
+        self.bm25_postings = None
+        self.bm25_scale = None
+        self.similar_rows = None
+        self.similar_scores = None
+        self.features = None
+        self.feature_sq_norms = None
+        self.dataset_version = None
+        self.load_seconds = None
+        self.loaded_from = None
+        self.tag_index = None
+        self.ingredient_index = None
+        self.search_index = None
+        self.search_indexes = {}
+        self.popularity = None
+        self.autocomplete_index = None
+        self.range_index = None
+        self.planner = WeeklyPlanner()
+        self.meal_cards = []
+        self.id_to_row = {}
+        self.meal_cards_blob = None
+        self.meal_cards_offsets = None
         self.feature_columns = ['calories', 'protein', 'carbs', 'fats']
+
+        # 2. Local Dataset (Food.com small_data.csv) unless overridden
+        self.data_path = data_path or os.path.join(os.path.dirname(__file__), '..', 'data', 'small_data.csv')
+        self.cache_dir = cache_dir or os.environ.get("ENGINE_CACHE_DIR") or engine_cache.DEFAULT_CACHE_DIR
+        # Memory-map snapshot arrays so every worker process shares one physical copy
+        self.mmap_snapshot = os.environ.get("ENGINE_MMAP", "1") != "0"
+        # Char-trigram index over recipe names for typo-tolerant search ("chiken curry")
+        self.typo_tolerant = os.environ.get("SEARCH_TYPO_TOLERANCE", "1") != "0"
+        # TruncatedSVD projection of the TF-IDF matrix for the 'latent' search mode (0 disables)
+        self.latent_dims = int(os.environ.get("LATENT_SEARCH_DIMS", self.LATENT_DIMS))
+        # Rows per CSV chunk when building from the dataset; bounds peak memory while parsing
+        self.csv_chunk_rows = int(os.environ.get("ENGINE_CSV_CHUNK_ROWS", self.CSV_CHUNK_ROWS))
         
         # Initialize Supabase Credentials
         self.supabase_url = os.environ.get("VITE_SUPABASE_URL")
@@ -32,72 +96,52 @@ class RecommendationEngine:
         self.load_data()
 
     def load_data(self):
+        load_started = time.perf_counter()
         try:
             # 1. Try Loading from Supabase first (OPTIONAL - skipped for this update to prioritize local file)
             # (Keeping logic commented or secondary if you want to migrate later)
             
-            # 2. Load Local Dataset (Food.com small_data.csv)
-            data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'small_data.csv')
-            
-            if not os.path.exists(data_path):
-                print(f"Dataset not found at {data_path}.")
+            if not os.path.exists(self.data_path):
+                print(f"Dataset not found at {self.data_path}.")
                 self.data = pd.DataFrame()
                 return
 
-            print("Loading dataset... this may take a moment.")
-            # Read only properly formatted lines to avoid parsing errors if any
-            self.data = pd.read_csv(data_path)
-            
-            # --- PARSING FOOD.COM DATASET ---
-            # Columns: id, name, nutrition, steps, ingredients, tags, ...
-            
-            # 1. Parse Nutrition (Stringified List -> Columns)
-            # valid format: [calories, total_fat_pdv, sugar_pdv, sodium_pdv, protein_pdv, sat_fat_pdv, carbs_pdv]
-            print("Parsing nutrition data...")
-            
-            # Helper to safely parse lists
-            def safe_parse_list(val):
-                try: return ast.literal_eval(str(val))
-                except: return []
+            # Parsed state is cached on disk keyed by the CSV hash, so restarts
+            # skip the literal_eval pass and the scaler/TF-IDF fitting.
+            fingerprint = engine_cache.source_fingerprint(self.data_path)
+            snapshot_dir = engine_cache.snapshot_path(self.cache_dir, fingerprint)
+            self.dataset_version = engine_cache.dataset_version(fingerprint)
 
-            # Apply parsing
-            self.data['nutrition_parsed'] = self.data['nutrition'].apply(safe_parse_list)
-            
-            # Extract Macros & Convert PDV to Grams (Approximate)
-            # PDV Assumptions: Protein 50g, Fat 78g, Carbs 275g (based on 2000 cal diet standards used in this dataset)
-            
-            def get_macro(lst, idx, conv_factor):
-                if len(lst) > idx:
-                    pdv = float(lst[idx])
-                    return (pdv / 100) * conv_factor
-                return 0.0
-
-            self.data['calories'] = self.data['nutrition_parsed'].apply(lambda x: float(x[0]) if len(x)>0 else 0)
-            self.data['fats'] = self.data['nutrition_parsed'].apply(lambda x: get_macro(x, 1, 78)) # Total Fat
-            self.data['protein'] = self.data['nutrition_parsed'].apply(lambda x: get_macro(x, 4, 50)) # Protein
-            self.data['carbs'] = self.data['nutrition_parsed'].apply(lambda x: get_macro(x, 6, 275)) # Carbs (Total)
-
-            # 2. Clean Text Data
-            self.data['name'] = self.data['name'].astype(str).str.title()
-            
-            # Parse steps and ingredients for frontend display
-            self.data['steps_list'] = self.data['steps'].apply(safe_parse_list)
-            self.data['ingredients_list'] = self.data['ingredients'].apply(safe_parse_list)
-            self.data['tags_list'] = self.data['tags'].apply(safe_parse_list)
-
-            # Create search tags string
-            self.data['combined_text'] = (
-                self.data['name'] + " " + 
-                self.data['ingredients'].astype(str) + " " + 
-                self.data['tags'].astype(str)
-            ).str.lower()
-            
-            # Drop rows with broken nutrition or very low calories (snacks/drinks)
-            # We want main meals for the planner, so filter out < 200 cal items
-            self.data = self.data[self.data['calories'] > 200].copy()
-            self.data.reset_index(drop=True, inplace=True)
-            
-            self._prepare_features()
+            started = time.perf_counter()
+            snapshot = engine_cache.read_snapshot(snapshot_dir, mmap=self.mmap_snapshot)
+            if snapshot is None:
+                with engine_cache.build_lock(snapshot_dir):
+                    # Another process may have built it while we waited for the lock
+                    started = time.perf_counter()
+                    snapshot = engine_cache.read_snapshot(snapshot_dir, mmap=self.mmap_snapshot)
+                    if snapshot is None:
+                        self._parse_dataset()
+                        self._prepare_features()
+                        self._write_snapshot(snapshot_dir)
+                        self.loaded_from = 'csv'
+            if snapshot is not None:
+                self._restore_snapshot(snapshot)
+                print(f"Recommendation Engine restored {len(self.data)} recipes from snapshot "
+                      f"in {time.perf_counter() - started:.2f}s.")
+                if self.typo_tolerant and self.char_tfidf_matrix is None:
+                    # Snapshot written with typo tolerance off; fit in memory only
+                    self._fit_char_tfidf()
+                if self.latent_dims and self.latent_vectors is None:
+                    self._fit_latent()
+                if self.bm25_postings is None:
+                    self._fit_bm25()
+                if self.similar_rows is None:
+                    self._build_similar_table()
+                self._load_meal_cards()
+                self.loaded_from = 'snapshot'
+
+            self._build_indexes()
+            self.load_seconds = round(time.perf_counter() - load_started, 3)
             
         except Exception as e:
             print(f"Error initializing Recommendation Engine: {e}")
@@ -105,20 +149,279 @@ class RecommendationEngine:
             traceback.print_exc()
             self.data = pd.DataFrame()
 
+    def _parse_dataset(self):
+        """
+        Streams the CSV in chunks of self.csv_chunk_rows rows. Each chunk is
+        parsed, filtered and appended to the compact columns (and its meal
+        cards serialized) before the next one is read, so peak memory is the
+        compact result plus one raw chunk instead of the whole raw file.
+        """
+        print("Loading dataset... this may take a moment.")
+        started = time.perf_counter()
+        total_bytes = os.path.getsize(self.data_path)
+        numeric = {col: GrowableArray(FLOAT_DTYPE if col in self.FLOAT_COLUMNS else np.int64)
+                   for col in self.NUMERIC_COLUMNS}
+        names = []
+        tag_lists = InternedListsBuilder()
+        ingredient_lists = InternedListsBuilder()
+        search_text = BlobBuilder()
+        meal_cards = BlobBuilder()
+        before = {}
+        rows_read = cells = fallbacks = 0
+
+        with open(self.data_path, 'rb') as f:
+            for chunk in pd.read_csv(f, chunksize=self.csv_chunk_rows):
+                chunk_rows = len(chunk)
+                rows_read += chunk_rows
+                chunk, parsed = self._parse_chunk(chunk)
+                cells += sum(len(col) for col in parsed.values())
+                fallbacks += sum(col.fallback_rows for col in parsed.values())
+                for col, size in column_bytes(chunk).items():
+                    before[col] = before.get(col, 0) + size
+
+                for col in self.NUMERIC_COLUMNS:
+                    numeric[col].extend(chunk[col].to_numpy())
+                names.extend(chunk['name'].tolist())
+                tag_lists.extend(chunk['tags_list'])
+                ingredient_lists.extend(chunk['ingredients_list'])
+                search_text.extend(text.encode('utf-8') for text in chunk['combined_text'])
+                meal_cards.extend(self._meal_card_fragments(chunk))
+
+                position = f.tell()
+                if rows_read == chunk_rows and 0 < position < total_bytes:
+                    # First chunk: preallocate for the whole file, extrapolating from its share of the bytes
+                    scale = total_bytes / position * 1.05
+                    for column in numeric.values():
+                        column.reserve(int(len(chunk) * scale))
+                    for blob in (search_text, meal_cards):
+                        blob.reserve(int(len(chunk) * scale), int(blob.nbytes * scale))
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                print(f"Ingested {rows_read:,} rows ({min(position / max(total_bytes, 1), 1.0):.0%}), "
+                      f"kept {len(names):,}: {rows_read / elapsed:,.0f} rows/s, {position / 1e6 / elapsed:.1f} MB/s.")
+                del chunk, parsed
+
+        elapsed = time.perf_counter() - started
+        print(f"Parsed {cells} list cells from {rows_read:,} rows in {elapsed:.2f}s "
+              f"({cells / max(elapsed, 1e-9):,.0f} cells/s, {fallbacks} via fallback parser).")
+
+        columns = {col: numeric[col].finish() for col in self.NUMERIC_COLUMNS}
+        columns['name'] = names
+        self.data = compact_frame(pd.DataFrame(columns), self.FLOAT_COLUMNS, self.INT_COLUMNS)
+        self.tag_lists = tag_lists.finish()
+        self.ingredient_lists = ingredient_lists.finish()
+        self.search_text = TextColumn(*search_text.finish())
+        self.meal_cards_blob, self.meal_cards_offsets = meal_cards.finish()
+        self._load_meal_cards()
+        after = column_bytes(self.data, {
+            'tags (interned)': self.tag_lists,
+            'ingredients (interned)': self.ingredient_lists,
+            'search_text (buffer)': self.search_text,
+            'meal_cards (json)': self.meal_cards,
+        })
+        print("Recipe data memory by column:\n" + format_column_bytes(before, after))
+
+    def _parse_chunk(self, chunk):
+        """
+        One raw CSV chunk -> (the kept rows with macro, list and search text
+        columns added, {source column: ParsedColumn}).
+        """
+        # --- PARSING FOOD.COM DATASET ---
+        # Columns: id, name, nutrition, steps, ingredients, tags, ...
+        
+        # 1. Parse Nutrition (Stringified List -> Columns)
+        # valid format: [calories, total_fat_pdv, sugar_pdv, sodium_pdv, protein_pdv, sat_fat_pdv, carbs_pdv]
+        # Whole columns are parsed in bulk; only malformed cells hit literal_eval
+        nutrition = list_parser.parse_float_lists(chunk['nutrition'])
+        
+        # Extract Macros & Convert PDV to Grams (Approximate)
+        # PDV Assumptions: Protein 50g, Fat 78g, Carbs 275g (based on 2000 cal diet standards used in this dataset)
+        chunk['calories'] = nutrition.column(0)
+        chunk['fats'] = nutrition.column(1) / 100 * 78 # Total Fat
+        chunk['protein'] = nutrition.column(4) / 100 * 50 # Protein
+        chunk['carbs'] = nutrition.column(6) / 100 * 275 # Carbs (Total)
+
+        # Drop rows with broken nutrition or very low calories (snacks/drinks)
+        # We want main meals for the planner, so filter out < 200 cal items.
+        # Done before the list columns are parsed so dropped rows skip that work.
+        chunk = chunk[chunk['calories'] > 200].reset_index(drop=True)
+        # Narrowed here so the meal cards show exactly what the frame holds
+        chunk = chunk.astype({col: FLOAT_DTYPE for col in self.FLOAT_COLUMNS})
+
+        # 2. Clean Text Data
+        chunk['name'] = chunk['name'].astype(str).str.title()
+        
+        # Parse steps and ingredients for frontend display
+        parsed = {'nutrition': nutrition}
+        for source, target in [('steps', 'steps_list'), ('ingredients', 'ingredients_list'), ('tags', 'tags_list')]:
+            parsed[source] = list_parser.parse_string_lists(chunk[source])
+            chunk[target] = parsed[source].rows()
+
+        # Create search tags string
+        chunk['combined_text'] = (
+            chunk['name'] + " " + 
+            chunk['ingredients'].astype(str) + " " + 
+            chunk['tags'].astype(str)
+        ).str.lower()
+        return chunk, parsed
+
+    def _build_indexes(self):
+        """
+        In-memory lookup structures derived from self.data. Cheap enough to
+        rebuild on every load, so they are not part of the snapshot.
+        """
+        started = time.perf_counter()
+        self.feature_sq_norms = knn.squared_norms(self.features)
+        self.id_to_row = dict(zip(self.data['id'].tolist(), range(len(self.data))))
+        self.tag_index = TagIndex(self.tag_lists)
+        self.ingredient_index = IngredientIndex(self.ingredient_lists, synonyms=ALLERGEN_SYNONYMS)
+        self.search_index = TfidfSearchIndex(self.tfidf, self.tfidf_matrix, self.tfidf_term_rows)
+        if self.typo_tolerant and self.char_tfidf_matrix is not None:
+            chars = TfidfSearchIndex(self.char_tfidf, self.char_tfidf_matrix, self.char_tfidf_term_rows)
+            self.search_index = TypoTolerantSearch(self.search_index, chars)
+        self.search_indexes = {'sparse': self.search_index}
+        if self.latent_dims and self.latent_vectors is not None:
+            self.search_indexes['latent'] = LatentSearchIndex(self.tfidf, self.latent_components, self.latent_vectors)
+        if self.bm25_postings is not None:
+            self.search_indexes['bm25'] = bm25.BM25Index(self.bm25_vocabulary, self.bm25_postings, self.bm25_scale)
+        names = self.data['name'].tolist()
+        self.popularity = popularity_scores(names)
+        self.autocomplete_index = AutocompleteIndex(names, self.popularity)
+        self.range_index = RangeIndex({col: self.data[col].to_numpy() for col in RANGE_COLUMNS})
+        print(f"Built tag index ({len(self.tag_index.tags)} tags) and ingredient index "
+              f"({len(self.ingredient_index.tokens)} tokens) in {time.perf_counter() - started:.2f}s.")
+
+    def numeric_arrays(self):
+        """
+        The engine's large numpy arrays (CSR matrices as their three parts), for memory reporting.
+        """
+        arrays = [self.features, self.latent_vectors, self.latent_components, self.similar_rows,
+                  self.similar_scores, self.meal_cards_blob, self.meal_cards_offsets]
+        for lists in (self.tag_lists, self.ingredient_lists):
+            if lists is not None:
+                arrays += [lists.ids, lists.offsets]
+        if self.search_text is not None:
+            arrays += [self.search_text.blob, self.search_text.offsets]
+        for matrix in (self.tfidf_matrix, self.tfidf_term_rows, self.char_tfidf_matrix,
+                       self.char_tfidf_term_rows, self.bm25_postings):
+            if matrix is not None:
+                arrays += [matrix.data, matrix.indices, matrix.indptr]
+        return [array for array in arrays if array is not None]
+
+    def _write_snapshot(self, snapshot_dir):
+        if self.tfidf_matrix is None:
+            return
+        try:
+            arrays = {col: self.data[col].to_numpy() for col in self.NUMERIC_COLUMNS}
+            arrays.update({
+                "scaler_mean": self.scaler.mean_,
+                "scaler_scale": self.scaler.scale_,
+                "scaler_var": self.scaler.var_,
+                "tfidf_idf": self.tfidf.idf_,
+                "features": self.features,
+                "meal_cards_blob": self.meal_cards_blob,
+                "meal_cards_offsets": self.meal_cards_offsets,
+                "tag_ids": self.tag_lists.ids,
+                "tag_offsets": self.tag_lists.offsets,
+                "ingredient_ids": self.ingredient_lists.ids,
+                "ingredient_offsets": self.ingredient_lists.offsets,
+                "search_text_blob": self.search_text.blob,
+                "search_text_offsets": self.search_text.offsets,
+            })
+            objects = {col: self.data[col].tolist() for col in self.TEXT_COLUMNS}
+            objects["tag_vocabulary"] = self.tag_lists.vocabulary
+            objects["ingredient_vocabulary"] = self.ingredient_lists.vocabulary
+            objects["tfidf_vocabulary"] = {term: int(idx) for term, idx in self.tfidf.vocabulary_.items()}
+            # Search indexes read the term -> rows transposes; storing them lets
+            # workers map them from the snapshot instead of transposing privately.
+            matrices = {"tfidf_matrix": self.tfidf_matrix, "tfidf_term_rows": self.tfidf_term_rows}
+            if self.char_tfidf_matrix is not None:
+                arrays["char_tfidf_idf"] = self.char_tfidf.idf_
+                objects["char_tfidf_vocabulary"] = {term: int(idx) for term, idx in self.char_tfidf.vocabulary_.items()}
+                matrices["char_tfidf_matrix"] = self.char_tfidf_matrix
+                matrices["char_tfidf_term_rows"] = self.char_tfidf_term_rows
+            if self.latent_vectors is not None:
+                arrays["latent_vectors"] = self.latent_vectors
+                arrays["latent_components"] = self.latent_components
+            if self.bm25_postings is not None:
+                arrays["bm25_scale"] = np.array([self.bm25_scale])
+                objects["bm25_vocabulary"] = self.bm25_vocabulary
+                matrices["bm25_postings"] = self.bm25_postings
+            if self.similar_rows is not None:
+                arrays["similar_rows"] = self.similar_rows
+                arrays["similar_scores"] = self.similar_scores
+
+            engine_cache.write_snapshot(
+                snapshot_dir,
+                meta={"source": os.path.basename(self.data_path), "rows": len(self.data)},
+                arrays=arrays,
+                matrices=matrices,
+                objects=objects,
+            )
+            print(f"Engine snapshot written to {snapshot_dir}")
+        except Exception as e:
+            print(f"Warning: could not write engine snapshot: {e}")
+
+    def _restore_snapshot(self, snapshot):
+        arrays, objects = snapshot.arrays, snapshot.objects
+
+        columns = {col: arrays[col] for col in self.NUMERIC_COLUMNS}
+        columns.update({col: objects[col] for col in self.TEXT_COLUMNS})
+        self.data = pd.DataFrame(columns)[self.NUMERIC_COLUMNS + self.TEXT_COLUMNS]
+        self.tag_lists = InternedLists(objects["tag_vocabulary"], arrays["tag_ids"], arrays["tag_offsets"])
+        self.ingredient_lists = InternedLists(objects["ingredient_vocabulary"], arrays["ingredient_ids"], arrays["ingredient_offsets"])
+        self.search_text = TextColumn(arrays["search_text_blob"], arrays["search_text_offsets"])
+
+        self.scaler = StandardScaler()
+        self.scaler.mean_ = arrays["scaler_mean"]
+        self.scaler.scale_ = arrays["scaler_scale"]
+        self.scaler.var_ = arrays["scaler_var"]
+        self.scaler.n_features_in_ = len(self.feature_columns)
+        self.scaler.n_samples_seen_ = len(self.data)
+        self.features = arrays["features"]
+
+        self.tfidf = TfidfVectorizer(stop_words='english', max_features=5000, vocabulary=objects["tfidf_vocabulary"])
+        self.tfidf.idf_ = arrays["tfidf_idf"]
+        self.tfidf_matrix = snapshot.matrices["tfidf_matrix"]
+        self.tfidf_term_rows = snapshot.matrices["tfidf_term_rows"]
+
+        if "char_tfidf_matrix" in snapshot.matrices:
+            self.char_tfidf = self._char_vectorizer(vocabulary=objects["char_tfidf_vocabulary"])
+            self.char_tfidf.idf_ = arrays["char_tfidf_idf"]
+            self.char_tfidf_matrix = snapshot.matrices["char_tfidf_matrix"]
+            self.char_tfidf_term_rows = snapshot.matrices["char_tfidf_term_rows"]
+
+        if "latent_vectors" in arrays:
+            self.latent_vectors = arrays["latent_vectors"]
+            self.latent_components = arrays["latent_components"]
+
+        if "bm25_postings" in snapshot.matrices:
+            self.bm25_vocabulary = objects["bm25_vocabulary"]
+            self.bm25_postings = snapshot.matrices["bm25_postings"]
+            self.bm25_scale = float(arrays["bm25_scale"][0])
+
+        if "similar_rows" in arrays:
+            self.similar_rows = arrays["similar_rows"]
+            self.similar_scores = arrays["similar_scores"]
+
+        self.meal_cards_blob = arrays["meal_cards_blob"]
+        self.meal_cards_offsets = arrays["meal_cards_offsets"]
+
     def _prepare_features(self):
         try:
-            # Prepare features for KNN
+            # Standardized macro features; KNN retrieval is knn.masked_top_k over these
             self.scaler = StandardScaler()
-            self.features = self.scaler.fit_transform(self.data[self.feature_columns])
-            
-            # We use a smaller sample for KNN fitting if dataset is huge to save memory/time,
-            # or just fit all if possible. 40k is manageable.
-            self.model = NearestNeighbors(n_neighbors=20, algorithm='brute', metric='euclidean')
-            self.model.fit(self.features)
+            self.features = self.scaler.fit_transform(self.data[self.feature_columns].to_numpy(dtype=np.float64))
             
             # TF-IDF for Text Search (using subset to save memory if needed)
             self.tfidf = TfidfVectorizer(stop_words='english', max_features=5000)
-            self.tfidf_matrix = self.tfidf.fit_transform(self.data['combined_text'])
+            self.tfidf_matrix = self.tfidf.fit_transform(self.search_text)
+            self.tfidf_term_rows = self.tfidf_matrix.T.tocsr()
+            if self.typo_tolerant:
+                self._fit_char_tfidf()
+            if self.latent_dims:
+                self._fit_latent()
+            self._fit_bm25()
+            self._build_similar_table()
             
             print(f"Recommendation Engine initialized successfully with {len(self.data)} recipes.")
             
@@ -127,6 +430,46 @@ class RecommendationEngine:
             import traceback
             traceback.print_exc()
 
+    def _char_vectorizer(self, vocabulary=None):
+        return TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 3), dtype=np.float32, vocabulary=vocabulary)
+
+    def _fit_char_tfidf(self):
+        self.char_tfidf = self._char_vectorizer()
+        self.char_tfidf_matrix = self.char_tfidf.fit_transform(self.data['name'])
+        self.char_tfidf_term_rows = self.char_tfidf_matrix.T.tocsr()
+
+    def _fit_latent(self):
+        started = time.perf_counter()
+        dims = min(self.latent_dims, self.tfidf_matrix.shape[0] - 1, self.tfidf_matrix.shape[1] - 1)
+        if dims < 1:
+            return
+        svd = TruncatedSVD(n_components=dims, random_state=0)
+        vectors = svd.fit_transform(self.tfidf_matrix)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.latent_vectors = (vectors / norms).astype(np.float32)
+        self.latent_components = svd.components_.astype(np.float32)
+        print(f"Fitted {dims}-dim latent search vectors in {time.perf_counter() - started:.2f}s "
+              f"({self.latent_vectors.nbytes / 1e6:.1f} MB).")
+
+    def _fit_bm25(self):
+        started = time.perf_counter()
+        fields = {
+            'name': self.data['name'].astype(str).tolist(),
+            'ingredients': self.ingredient_lists.joined(),
+            'tags': self.tag_lists.joined(),
+        }
+        self.bm25_vocabulary, self.bm25_postings, self.bm25_scale = bm25.build_postings(fields)
+        print(f"Built BM25F postings ({len(self.bm25_vocabulary)} terms, {self.bm25_postings.nnz} entries) "
+              f"in {time.perf_counter() - started:.2f}s.")
+
+    def _build_similar_table(self):
+        # Offline-style job: every recipe's top-K "more like this" neighbors,
+        # computed once per dataset and kept in the snapshot
+        started = time.perf_counter()
+        self.similar_rows, self.similar_scores = build_similar_table(self.features, self.tfidf_matrix)
+        print(f"Built similar-recipes table {self.similar_rows.shape} in {time.perf_counter() - started:.2f}s.")
+
     def _get_meal_image(self, name, tags):
         """
         Assigns a high-quality stock image based on keywords.
@@ -155,6 +498,34 @@ class RecommendationEngine:
         
         return img
 
+    ACTIVITY_MULTIPLIERS = {
+        'sedentary': 1.2,
+        'lightly_active': 1.375,
+        'moderately_active': 1.55,
+        'very_active': 1.725,
+        'extra_active': 1.9
+    }
+    GOAL_CALORIE_OFFSETS = {'weight-loss': -500, 'weight-gain': 500, 'muscle-gain': 250}
+    # Share of calories from (protein, fats, carbs)
+    MACRO_SPLITS = {
+        'muscle-gain': (0.35, 0.25, 0.40),
+        'weight-loss': (0.40, 0.30, 0.30),
+        'weight-gain': (0.30, 0.30, 0.40),
+    }
+    DEFAULT_MACRO_SPLIT = (0.30, 0.30, 0.40)
+    DIET_TAGS = {'keto': 'low-carb', 'vegan': 'vegan', 'vegetarian': 'vegetarian', 'paleo': 'paleo'}
+    CANDIDATE_POOL = 80
+    # Replacement meals returned per swap request by default
+    SWAP_LIMIT = 5
+    # 'knn': KNN candidates + LLM weekly selection
+    # 'planner': KNN candidates + local WeeklyPlanner optimizer (no LLM calls)
+    SUPPORTED_MODELS = ('knn', 'planner')
+    SEARCH_LIMIT = 20
+    # Deepest ranked position served by paginated search
+    SEARCH_DEPTH = 1000
+    LATENT_DIMS = 128
+    CSV_CHUNK_ROWS = 10000
+
     def calculate_bmr(self, weight, height, age, gender):
         if str(gender).lower() == 'male':
             return (10 * weight) + (6.25 * height) - (5 * age) + 5
@@ -162,24 +533,50 @@ class RecommendationEngine:
             return (10 * weight) + (6.25 * height) - (5 * age) - 161
 
     def calculate_tdee(self, bmr, activity_level):
-        multipliers = {
-            'sedentary': 1.2,
-            'lightly_active': 1.375,
-            'moderately_active': 1.55,
-            'very_active': 1.725,
-            'extra_active': 1.9
+        return bmr * self.ACTIVITY_MULTIPLIERS.get(activity_level, 1.2)
+
+    def calculate_targets(self, profiles):
+        """
+        Daily targets for a list of parsed profiles (see _parse_profile), as
+        arrays with one entry per profile: bmr, tdee, calories, protein, fats, carbs (grams).
+        """
+        age = np.array([p['age'] for p in profiles], dtype=np.float64)
+        weight = np.array([p['weight'] for p in profiles], dtype=np.float64)
+        height = np.array([p['height'] for p in profiles], dtype=np.float64)
+        is_male = np.array([str(p['gender']).lower() == 'male' for p in profiles], dtype=bool)
+        activity = np.array([self.ACTIVITY_MULTIPLIERS.get(p['activity_level'], 1.2) for p in profiles], dtype=np.float64)
+        offsets = np.array([self.GOAL_CALORIE_OFFSETS.get(p['goal'], 0) for p in profiles], dtype=np.float64)
+        splits = np.array([self.MACRO_SPLITS.get(p['goal'], self.DEFAULT_MACRO_SPLIT) for p in profiles], dtype=np.float64).reshape(-1, 3)
+
+        bmr = (10 * weight) + (6.25 * height) - (5 * age) + np.where(is_male, 5, -161)
+        tdee = bmr * activity
+        calories = tdee + offsets
+        return {
+            "bmr": bmr,
+            "tdee": tdee,
+            "calories": calories,
+            "protein": calories * splits[:, 0] / 4,
+            "fats": calories * splits[:, 1] / 9,
+            "carbs": calories * splits[:, 2] / 4,
         }
-        return bmr * multipliers.get(activity_level, 1.2)
 
     def recommend(self, user_data):
-        # Default Logic
-        best_model = 'knn'
+        # Per-request model_type, else the deployment default
+        requested = user_data.get('model_type') if isinstance(user_data, dict) else None
+        best_model = requested or os.environ.get("RECOMMENDATION_MODEL", 'knn')
+        if best_model not in self.SUPPORTED_MODELS: best_model = 'knn'
         
         result = self._run_recommendation_logic(user_data, model_type=best_model)
         
         if "error" not in result:
             result["model_used"] = best_model
             result["model_confidence"] = "High"
+
+            if best_model == 'planner':
+                # The planner path never waits on OpenAI
+                result["ai_insight"] = "Your plan is ready!"
+                result["strategy_tip"] = "Stay consistent."
+                return result
             
             # --- AI ENHANCEMENT ---
             try:
@@ -193,227 +590,148 @@ class RecommendationEngine:
             
         return result
 
-    def _run_recommendation_logic(self, user_data, model_type='knn'):
+    def recommend_batch(self, profiles):
+        """
+        Week plans for many profiles in one call, filled by the local planner
+        (no LLM calls). Profiles with the same diet/allergy filters share one
+        mask and one distance computation against the feature matrix.
+        """
         if self.data.empty: return {"error": "Data not loaded"}
         try:
-            # Parse User Data
-            def safe_get(key, type_func):
-                val = user_data.get(key)
-                try: return type_func(val)
-                except: return None
-
-            age = safe_get('age', int)
-            weight = safe_get('weight', float)
-            height = safe_get('height', float)
-            if age is None or weight is None or height is None: return {"error": "Invalid numeric values"}
-
-            gender = user_data.get('gender', 'male')
-            goal = user_data.get('goal', 'maintenance')
-            activity_level = user_data.get('activity_level', 'sedentary')
-            diet_type = str(user_data.get('diet_type', 'any')).lower()
-            allergies = user_data.get('allergies', [])
-            
-            # --- CALCULATE TARGETS ---
-            bmr = self.calculate_bmr(weight, height, age, gender)
-            tdee = self.calculate_tdee(bmr, activity_level)
-            target_calories = tdee
-            
-            if goal == 'weight-loss': target_calories -= 500
-            elif goal == 'weight-gain': target_calories += 500
-            elif goal == 'muscle-gain': target_calories += 250
+            parsed = [self._parse_profile(p) for p in profiles]
+            results = [{"error": "Invalid numeric values"} for _ in profiles]
+            valid = [i for i, p in enumerate(parsed) if p is not None]
+            if not valid:
+                return {"results": results, "groups": 0}
 
-            # Macro Splits
-            if goal == 'muscle-gain': p_ratio, f_ratio, c_ratio = 0.35, 0.25, 0.40
-            elif goal == 'weight-loss': p_ratio, f_ratio, c_ratio = 0.40, 0.30, 0.30
-            elif goal == 'weight-gain': p_ratio, f_ratio, c_ratio = 0.30, 0.30, 0.40
-            else: p_ratio, f_ratio, c_ratio = 0.30, 0.30, 0.40
+            targets = self.calculate_targets([parsed[i] for i in valid])
+            queries = self._meal_queries(targets)
 
-            target_protein_g = (target_calories * p_ratio) / 4
-            target_fats_g = (target_calories * f_ratio) / 9
-            target_carbs_g = (target_calories * c_ratio) / 4
+            groups = {}
+            for j, i in enumerate(valid):
+                key = (self._diet_search_term(parsed[i]['diet_type']), tuple(sorted(set(parsed[i]['allergies']))))
+                groups.setdefault(key, []).append(j)
 
-            # --- PRE-FILTERING ---
-            # Instead of filtering DataFrame copies (slow), we use boolean masks or search
-            mask = pd.Series([True] * len(self.data))
-            
-            # 1. Diet Type Filtering (Search in tags)
-            if diet_type != 'any' and diet_type != 'none':
-                # Map some common terms
-                if diet_type == 'keto': search_term = 'low-carb' 
-                elif diet_type == 'vegan': search_term = 'vegan'
-                elif diet_type == 'vegetarian': search_term = 'vegetarian'
-                elif diet_type == 'paleo': search_term = 'paleo'
-                else: search_term = diet_type
-                
-                mask = mask & self.data['tags_list'].apply(lambda x: search_term in [t.lower() for t in x])
+            for (search_term, allergies), members in groups.items():
+                mask = self._filter_mask(search_term, allergies)
+                neighbor_rows, _ = knn.masked_top_k_batch(
+                    self.features, self.feature_sq_norms, queries[members], mask, self.CANDIDATE_POOL)
 
-            # 2. Allergy Filtering
-            if allergies:
-                for allergy in allergies:
-                    a_term = allergy.lower()
-                    mask = mask & ~self.data['combined_text'].str.contains(a_term, regex=False)
+                for j, rows in zip(members, neighbor_rows):
+                    i = valid[j]
+                    candidates = self.data.iloc[rows]
+                    week_plan, preview_meals, reasoning = self._build_week_plan(
+                        profiles[i], candidates, model_type='planner', daily_target=self._daily_target(targets, j))
+                    results[i] = self._plan_response(targets, j, week_plan, preview_meals, reasoning)
+                    results[i]["model_used"] = 'planner'
 
-            filtered_indices = self.data[mask].index
-            
-            if len(filtered_indices) == 0:
-                print("Warning: Filters too strict, returning random safe selection")
-                filtered_indices = self.data.index[:100] # Fallback
-            
-            filtered_data = self.data.loc[filtered_indices]
+            return {"results": results, "groups": len(groups)}
 
-            # --- KNN MATCHING ---
-            # Scale target query
-            # We target "Per Meal" stats = Day / 3
-            query = np.array([[target_calories / 3, target_protein_g / 3, target_carbs_g / 3, target_fats_g / 3]]) 
-            query_scaled = self.scaler.transform(query)
-            
-            # Find neighbors within the FILTERED subset
-            # Since our model is fit on the WHOLE dataset, we can find neighbors globally 
-            # and then intersect with filtered_indices to find the best valid ones.
-            # However, for efficiency with 40k rows, we can just subset the features if memory allows.
-            
-            features_subset = self.features[filtered_indices]
-            
-            # Fit specific temporary NN for this filtered user group
-            # (Fast enough for 40k rows)
-            n_neighbors = min(80, len(filtered_data))
-            temp_model = NearestNeighbors(n_neighbors=n_neighbors, algorithm='brute', metric='euclidean')
-            temp_model.fit(features_subset)
-            
-            distances, indices = temp_model.kneighbors(query_scaled, n_neighbors=n_neighbors)
-            
-            # Get the actual rows
-            candidates = filtered_data.iloc[indices[0]].copy()
+        except Exception as e:
+            print(f"Error in batch recommendation logic: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"error": str(e)}
 
-            # --- AI-DRIVEN WEEKLY SELECTION ---
-            week_plan = {}
-            weekly_reasoning = ""
-            
-            try:
-                ai_result = AIService.get_instance().generate_weekly_plan(user_data, candidates)
-                if ai_result:
-                    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                    
-                    def format_row(row):
-                         return {
-                            "id": str(row['id']),
-                            "name": row['name'],
-                            "calories": int(row['calories']),
-                            "protein": int(row['protein']),
-                            "carbs": int(row['carbs']),
-                            "fats": int(row['fats']),
-                            "image": self._get_meal_image(row['name'], str(row['tags_list'])),
-                            "time": f"{row['minutes']} min",
-                            "tags": row['tags_list'][:4],
-                            "ingredients": row['ingredients_list'],
-                            "steps": row['steps_list']
-                        }
+    def _parse_profile(self, user_data):
+        """
+        Normalized profile dict, or None if age/weight/height are not numeric.
+        """
+        # Parse User Data
+        def safe_get(key, type_func):
+            val = user_data.get(key)
+            try: return type_func(val)
+            except: return None
 
-                    def get_meal_by_id(mid, meal_type_hint):
-                        # 1. Try fetching by ID
-                        try:
-                            if mid:
-                                target_id = int(float(str(mid)))
-                                match = candidates[candidates['id'] == target_id]
-                                if not match.empty: 
-                                    row = match.iloc[0]
-                                    return format_row(row)
-                        except Exception as e:
-                            print(f"Error parsing ID {mid}: {e}")
-                        
-                        # 2. Fallback: Find strictly by tag/type in candidates, or just random
-                        filtered = [r for _, r in candidates.iterrows() if meal_type_hint.lower() in str(r['tags_list']).lower()]
-                        if not filtered:
-                            filtered = [r for _, r in candidates.iterrows()]
-                        
-                        if filtered:
-                            import random
-                            row = random.choice(filtered)
-                            return format_row(row)
-                        
-                        return None 
-
-                    for day in days:
-                        day_plan = ai_result.get(day)
-                        if day_plan:
-                            week_plan[day] = {
-                                "breakfast": get_meal_by_id(day_plan.get("breakfast_id"), "breakfast"),
-                                "lunch": get_meal_by_id(day_plan.get("lunch_id"), "lunch"),
-                                "dinner": get_meal_by_id(day_plan.get("dinner_id"), "dinner")
-                            }
-                    
-                    weekly_reasoning = ai_result.get("reasoning", "")
-                    print(f"Weekly AI Plan Generated: {weekly_reasoning}")
-                else:
-                    print("AI returned None, falling back.")
+        if not isinstance(user_data, dict): return None
 
-            except Exception as e:
-                print(f"AI Weekly Generation failed: {e}")
-
-            # Gather unique meals for the "Preview" list
-            unique_meals_map = {}
-            if week_plan:
-                for day, day_meals in week_plan.items():
-                    for m_type in ['breakfast', 'lunch', 'dinner']:
-                        meal = day_meals.get(m_type)
-                        if meal:
-                            unique_meals_map[meal['id']] = meal
+        age = safe_get('age', int)
+        weight = safe_get('weight', float)
+        height = safe_get('height', float)
+        if age is None or weight is None or height is None: return None
+
+        allergies = user_data.get('allergies', []) or []
+        if isinstance(allergies, str): allergies = allergies.split(',')
+
+        return {
+            "age": age,
+            "weight": weight,
+            "height": height,
+            "gender": user_data.get('gender', 'male'),
+            "goal": user_data.get('goal', 'maintenance'),
+            "activity_level": user_data.get('activity_level', 'sedentary'),
+            "diet_type": str(user_data.get('diet_type', 'any')).lower(),
+            "allergies": [str(a).strip().lower() for a in allergies if str(a).strip()],
+        }
+
+    def _diet_search_term(self, diet_type):
+        if diet_type == 'any' or diet_type == 'none': return None
+        # Map some common terms
+        return self.DIET_TAGS.get(diet_type, diet_type)
+
+    def _filter_mask(self, search_term, allergies):
+        """
+        Boolean row mask for a diet tag (already mapped) and allergy list.
+        """
+        # Instead of filtering DataFrame copies (slow), we use boolean masks or search
+        mask = np.ones(len(self.data), dtype=bool)
+        
+        # 1. Diet Type Filtering (Search in tags)
+        if search_term:
+            mask &= self.tag_index.mask(search_term)
+
+        # 2. Allergy Filtering (whole ingredient tokens + synonyms, e.g. "nuts" -> walnut, pecan...)
+        if allergies:
+            self.ingredient_index.exclude(mask, allergies)
+
+        if not mask.any():
+            print("Warning: Filters too strict, returning random safe selection")
+            mask[:100] = True # Fallback
+        return mask
+
+    def _meal_queries(self, targets):
+        # We target "Per Meal" stats = Day / 3, scaled like the feature matrix
+        query = np.column_stack([targets["calories"], targets["protein"], targets["carbs"], targets["fats"]]) / 3
+        return self.scaler.transform(query)
+
+    def _daily_target(self, targets, i):
+        # Same order as feature_columns / the planner: calories, protein, carbs, fats
+        return np.array([targets["calories"][i], targets["protein"][i], targets["carbs"][i], targets["fats"][i]])
+
+    def _plan_response(self, targets, i, week_plan, preview_meals, weekly_reasoning):
+        return {
+            "target_calories": int(targets["calories"][i]),
+            "bmr": int(targets["bmr"][i]),
+            "tdee": int(targets["tdee"][i]),
+            "week_plan": week_plan, 
+            "ai_reasoning": weekly_reasoning,
+            "meals": preview_meals # Shows all unique meals selected
+        }
+
+    def _run_recommendation_logic(self, user_data, model_type='knn'):
+        if self.data.empty: return {"error": "Data not loaded"}
+        try:
+            profile = self._parse_profile(user_data)
+            if profile is None: return {"error": "Invalid numeric values"}
             
-            # Convert to list for frontend "meals" array (used for visual cards)
-            # Limit to maybe 9 to show variety but not overwhelm? Or all.
-            preview_meals = list(unique_meals_map.values())
+            # --- CALCULATE TARGETS ---
+            targets = self.calculate_targets([profile])
+
+            # --- PRE-FILTERING ---
+            mask = self._filter_mask(self._diet_search_term(profile['diet_type']), profile['allergies'])
+
+            # --- KNN MATCHING ---
+            # Nearest neighbours within the FILTERED subset, computed against the
+            # precomputed scaled matrix with the mask applied (no per-request fit)
+            query_scaled = self._meal_queries(targets)
+            neighbor_rows, _ = knn.masked_top_k(self.features, self.feature_sq_norms, query_scaled[0], mask, self.CANDIDATE_POOL)
             
-            # --- FALLBACK IF WEEK PLAN FAILED ---
-            if not week_plan or not preview_meals:
-                # ... (Heuristic Logic Reuse)
-                # For brevity, let's just pick top 3 from candidates if AI failed completely
-                # This ensures we always return *something*
-                
-                # ... (Basic Heuristic Implementation Inline)
-                breakfasts = [r for _, r in candidates.iterrows() if 'breakfast' in str(r['tags_list'])]
-                lunches = [r for _, r in candidates.iterrows() if 'lunch' in str(r['tags_list'])]
-                dinners = [r for _, r in candidates.iterrows() if 'dinner' not in str(r['tags_list']) and 'lunch' not in str(r['tags_list'])]
-                
-                # Fill if empty
-                if not breakfasts: breakfasts = [candidates.iloc[0]]
-                if not lunches: lunches = [candidates.iloc[1]] if len(candidates)>1 else [candidates.iloc[0]]
-                if not dinners: dinners = [candidates.iloc[2]] if len(candidates)>2 else [candidates.iloc[0]]
-                
-                def fmt(row):
-                   return {
-                        "id": str(row['id']),
-                        "name": row['name'],
-                        "calories": int(row['calories']),
-                        "protein": int(row['protein']),
-                        "carbs": int(row['carbs']),
-                        "fats": int(row['fats']),
-                        "image": self._get_meal_image(row['name'], str(row['tags_list'])),
-                        "time": f"{row['minutes']} min",
-                        "tags": row['tags_list'][:4],
-                        "ingredients": row['ingredients_list'],
-                        "steps": row['steps_list']
-                    }
-
-                preview_meals = [fmt(breakfasts[0]), fmt(lunches[0]), fmt(dinners[0])]
-                
-                # Construct a basic rotating week plan for fallback
-                days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                week_plan = {}
-                for day in days:
-                    week_plan[day] = {
-                        "breakfast": preview_meals[0],
-                        "lunch": preview_meals[1],
-                        "dinner": preview_meals[2]
-                    }
-
-            return {
-                "target_calories": int(target_calories),
-                "bmr": int(bmr),
-                "tdee": int(tdee),
-                "week_plan": week_plan, 
-                "ai_reasoning": weekly_reasoning,
-                "meals": preview_meals # Shows all unique meals selected
-            }
+            # Get the actual rows
+            candidates = self._candidate_frame(neighbor_rows)
+
+            week_plan, preview_meals, weekly_reasoning = self._build_week_plan(
+                user_data, candidates, model_type=model_type, daily_target=self._daily_target(targets, 0))
+            return self._plan_response(targets, 0, week_plan, preview_meals, weekly_reasoning)
             
         except Exception as e:
             print(f"Error in recommendation logic: {e}")
@@ -421,76 +739,457 @@ class RecommendationEngine:
             traceback.print_exc()
             return {"error": str(e)}
 
-    def search_meals(self, query=None, tag=None):
-        if self.data.empty: return []
-        
-        # Start with full dataset
-        filtered_df = self.data
+    def _build_week_plan(self, user_data, candidates, model_type='knn', daily_target=None):
+        """
+        Fills Monday-Sunday breakfast/lunch/dinner from the KNN candidates.
+        Returns (week_plan, preview_meals, reasoning).
+        """
+        if model_type == 'planner':
+            return self._plan_week_locally(candidates, daily_target)
 
-        # Apply Tag Filter if provided
-        if tag and tag.lower() != 'all':
-            tag_lower = tag.lower()
-            # Check if tag is in the tags list (case-insensitive partial match for robustness)
-            mask = filtered_df['tags_list'].apply(lambda tags: any(tag_lower in t.lower() for t in tags))
-            filtered_df = filtered_df[mask]
+        # --- AI-DRIVEN WEEKLY SELECTION ---
+        week_plan = {}
+        weekly_reasoning = ""
         
-        if filtered_df.empty:
-            return []
+        try:
+            ai_result = AIService.get_instance().generate_weekly_plan(user_data, candidates)
+            if ai_result:
+                days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+                
+                candidate_rows = set(candidates.index)
 
-        if not query:
-            # Return random sample from filtered results
-            n = min(20, len(filtered_df))
-            return self._format_results(filtered_df.sample(n))
-            
-        # TF-IDF Search within filtered results
-        # Note: self.tfidf_matrix is for the WHOLE dataset.
-        # We need to filter indices.
-        
-        # Optim optimization: If we are just filtering by tag without query, logic above handles it.
-        # If we have query AND tag, doing cosine sim on whole matrix is fast, then we just pick those that match the filter.
-        
-        query_vec = self.tfidf.transform([query])
-        sim_scores = cosine_similarity(query_vec, self.tfidf_matrix)
-        
-        # Get enough candidates to likely satisfy the filter
-        # e.g. top 100, then filter by tag
-        top_indices = sim_scores.argsort()[0][::-1]
+                def get_meal_by_id(mid, meal_type_hint):
+                    # 1. Try fetching by ID (only ids from the candidate pool are accepted)
+                    pos = self.row_for_id(mid) if mid else None
+                    if pos in candidate_rows:
+                        return self.meal_cards[pos]
+                    
+                    # 2. Fallback: Find strictly by tag/type in candidates, or just random
+                    filtered = [pos for pos, tags in zip(candidates.index, candidates['tags_list']) if meal_type_hint.lower() in str(tags).lower()]
+                    if not filtered:
+                        filtered = list(candidates.index)
+                    
+                    if filtered:
+                        import random
+                        return self.meal_cards[random.choice(filtered)]
+                    
+                    return None 
+
+                for day in days:
+                    day_plan = ai_result.get(day)
+                    if day_plan:
+                        week_plan[day] = {
+                            "breakfast": get_meal_by_id(day_plan.get("breakfast_id"), "breakfast"),
+                            "lunch": get_meal_by_id(day_plan.get("lunch_id"), "lunch"),
+                            "dinner": get_meal_by_id(day_plan.get("dinner_id"), "dinner")
+                        }
+                
+                weekly_reasoning = ai_result.get("reasoning", "")
+                print(f"Weekly AI Plan Generated: {weekly_reasoning}")
+            else:
+                print("AI returned None, falling back.")
+
+        except Exception as e:
+            print(f"AI Weekly Generation failed: {e}")
+
+        # Gather unique meals for the "Preview" list
+        unique_meals_map = {}
+        if week_plan:
+            for day, day_meals in week_plan.items():
+                for m_type in ['breakfast', 'lunch', 'dinner']:
+                    meal = day_meals.get(m_type)
+                    if meal:
+                        unique_meals_map[meal['id']] = meal
         
-        results = []
-        count = 0
-        tag_lower = tag.lower() if tag else None
+        # Convert to list for frontend "meals" array (used for visual cards)
+        # Limit to maybe 9 to show variety but not overwhelm? Or all.
+        preview_meals = list(unique_meals_map.values())
         
-        for idx in top_indices:
-            if count >= 20: break
-            
-            # Check if this index is in our filtered_df (if tag applied)
-            # Or simpler: access row by iloc[idx] then check tag
-            row = self.data.iloc[idx]
+        # --- FALLBACK IF WEEK PLAN FAILED ---
+        if not week_plan or not preview_meals:
+            # ... (Heuristic Logic Reuse)
+            # For brevity, let's just pick top 3 from candidates if AI failed completely
+            # This ensures we always return *something*
             
-            if tag_lower and tag_lower != 'all':
-                if not any(tag_lower in t.lower() for t in row['tags_list']):
-                    continue
+            # ... (Basic Heuristic Implementation Inline)
+            positions = candidates.index.tolist()
+            tag_strings = [str(t) for t in candidates['tags_list']]
+            breakfasts = [pos for pos, t in zip(positions, tag_strings) if 'breakfast' in t]
+            lunches = [pos for pos, t in zip(positions, tag_strings) if 'lunch' in t]
+            dinners = [pos for pos, t in zip(positions, tag_strings) if 'dinner' not in t and 'lunch' not in t]
             
-            results.append(row)
-            count += 1
+            # Fill if empty
+            if not breakfasts: breakfasts = [positions[0]]
+            if not lunches: lunches = [positions[1]] if len(positions)>1 else [positions[0]]
+            if not dinners: dinners = [positions[2]] if len(positions)>2 else [positions[0]]
+
+            preview_meals = [self.meal_cards[breakfasts[0]], self.meal_cards[lunches[0]], self.meal_cards[dinners[0]]]
             
-        # Convert list of rows back to DataFrame-like structure or just format directly
-        return self._format_results(pd.DataFrame(results))
-
-    def _format_results(self, df):
-        results = []
-        for _, row in df.iterrows():
-            results.append({
-                "id": str(row['id']),
-                "name": row['name'],
-                "calories": int(row['calories']),
-                "protein": int(row['protein']),
-                "carbs": int(row['carbs']),
-                "fats": int(row['fats']),
-                "image": self._get_meal_image(row['name'], str(row['tags_list'])),
-                "time": f"{row['minutes']} min",
-                "tags": row['tags_list'][:4],
-                "ingredients": row['ingredients_list'],
-                "steps": row['steps_list']
-            })
-        return results
+            # Construct a basic rotating week plan for fallback
+            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+            week_plan = {}
+            for day in days:
+                week_plan[day] = {
+                    "breakfast": preview_meals[0],
+                    "lunch": preview_meals[1],
+                    "dinner": preview_meals[2]
+                }
+
+        return week_plan, preview_meals, weekly_reasoning
+
+    def _plan_week_locally(self, candidates, daily_target):
+        """
+        Week plan from the deterministic WeeklyPlanner (tens of ms, no LLM).
+        """
+        started = time.perf_counter()
+        rows = candidates.index.to_numpy()
+        excluded = self.tag_index.rows_have(EXCLUDED_TAGS, rows)
+        suitability = np.column_stack([self.tag_index.rows_have(SLOT_TAGS[slot], rows) & ~excluded for slot in MEAL_SLOTS])
+
+        plan = self.planner.plan(candidates[self.feature_columns].to_numpy(), suitability, daily_target)
+
+        # Format each chosen recipe once, in order of first appearance
+        chosen = list(dict.fromkeys(plan.ravel().tolist()))
+        meals = dict(zip(chosen, self._format_results(candidates.index[chosen])))
+        week_plan = {day: {slot: meals[plan[d, s]] for s, slot in enumerate(MEAL_SLOTS)} for d, day in enumerate(DAYS)}
+        preview_meals = [meals[pos] for pos in chosen]
+
+        daily = candidates[self.feature_columns].to_numpy()[plan].sum(axis=1).mean(axis=0)
+        reasoning = (f"Planned locally in {(time.perf_counter() - started) * 1000:.0f} ms with {len(chosen)} distinct recipes: "
+                     f"about {daily[0]:.0f} kcal and {daily[1]:.0f}g protein per day "
+                     f"(targets {daily_target[0]:.0f} kcal, {daily_target[1]:.0f}g).")
+        return week_plan, preview_meals, reasoning
+
+    def swap_meal(self, week_plan, day, slot, user_data=None, limit=None):
+        """
+        Replacement meals for week_plan[day][slot] that keep the day's totals
+        near target, without an LLM call.
+        week_plan: {day: {breakfast, lunch, dinner}} of meal cards (a /recommend
+        week_plan or a saved plan_data). user_data: optional profile; with
+        age/weight/height the daily target is calculate_targets', else it comes
+        from "target_calories", else it is the day's current totals. Its
+        diet_type/allergies filter the candidates either way.
+        Returns {"day", "slot", "current", "target", "day_totals", "candidates"}
+        ({"error"} without a dataset); raises ValueError for a bad plan, day or slot.
+        """
+        if self.data.empty: return {"error": "Data not loaded"}
+        if not isinstance(week_plan, dict) or not week_plan:
+            raise ValueError("A week plan is required")
+        day_key = next((d for d in week_plan if str(d).lower() == str(day or '').strip().lower()), None)
+        if day_key is None:
+            raise ValueError(f"Day '{day}' is not in the plan")
+        slot = str(slot or '').strip().lower()
+        if slot not in MEAL_SLOTS:
+            raise ValueError(f"Slot must be one of: {', '.join(MEAL_SLOTS)}")
+        if not isinstance(week_plan[day_key], dict):
+            raise ValueError(f"Day '{day_key}' has no meals")
+
+        # Rows already used across the week (the slot being replaced doesn't count)
+        week_uses = {}
+        for d, meals in week_plan.items():
+            if not isinstance(meals, dict):
+                continue
+            for s in MEAL_SLOTS:
+                meal = meals.get(s)
+                row = self.row_for_id(meal.get('id')) if isinstance(meal, dict) else None
+                if row is not None and not (d == day_key and s == slot):
+                    week_uses[row] = week_uses.get(row, 0) + 1
+
+        fixed = np.zeros(len(self.feature_columns))
+        exclude_rows = []
+        current, current_row, current_macros = None, None, np.zeros(len(self.feature_columns))
+        for s in MEAL_SLOTS:
+            meal = week_plan[day_key].get(s)
+            if not isinstance(meal, dict):
+                continue
+            macros, row = self._meal_macros(meal)
+            if row is not None:
+                exclude_rows.append(row)
+            if s == slot:
+                current, current_row, current_macros = meal, row, macros
+            else:
+                fixed += macros
+
+        user_data = user_data if isinstance(user_data, dict) else {}
+        profile = self._parse_profile(user_data)
+        if profile is not None:
+            target = self._daily_target(self.calculate_targets([profile]), 0)
+            diet_type, allergies = profile['diet_type'], profile['allergies']
+        else:
+            allergies = user_data.get('allergies', []) or []
+            if isinstance(allergies, str): allergies = allergies.split(',')
+            allergies = [str(a).strip().lower() for a in allergies if str(a).strip()]
+            diet_type = str(user_data.get('diet_type', 'any')).lower()
+            if user_data.get('target_calories'):
+                try:
+                    calories = float(user_data['target_calories'])
+                except (TypeError, ValueError):
+                    raise ValueError("target_calories must be a number")
+                target = self.daily_target_for_calories(calories, user_data.get('goal'))
+            else:
+                target = fixed + current_macros
+                if target[0] <= 0:
+                    raise ValueError("The day is empty; send a profile or target_calories to fill it")
+
+        rows, totals, costs = self.swap_candidates(
+            slot, fixed, target, exclude_rows, diet_type, allergies, week_uses, limit or self.SWAP_LIMIT)
+        return {
+            "day": day_key,
+            "slot": slot,
+            "current": self.meal_cards[current_row] if current_row is not None else current,
+            "target": self._macro_totals(target),
+            "day_totals": self._macro_totals(fixed + current_macros),
+            "candidates": [
+                dict(self.meal_cards[row], day_totals=self._macro_totals(total), deviation=round(float(cost), 4))
+                for row, total, cost in zip(rows.tolist(), totals, costs)
+            ],
+        }
+
+    def swap_candidates(self, slot, fixed, daily_target, exclude_rows=(), diet_type=None, allergies=None,
+                        week_uses=None, limit=SWAP_LIMIT):
+        """
+        Replacement rows for one slot of a planned day. fixed: (4,) macros of
+        the day's other slots; daily_target: (4,) calories/protein/carbs/fats.
+        The KNN neighbours of the macros the slot needs (target minus fixed),
+        within the diet/allergy filters and slot-suitable recipes while enough
+        exist, are re-ranked by the planner's day cost plus its variety penalty
+        for week_uses {row: uses}. Returns (rows, day_totals (m, 4), costs), best first.
+        """
+        mask = self._filter_mask(self._diet_search_term(diet_type or 'any'), allergies or [])
+        mask[list(exclude_rows)] = False
+        suitable = mask & self._slot_mask(slot)
+        if np.count_nonzero(suitable) >= limit:
+            mask = suitable
+
+        fixed = np.asarray(fixed, dtype=np.float64)
+        target = np.asarray(daily_target, dtype=np.float64)
+        query = self.scaler.transform(np.maximum(target - fixed, 0.0).reshape(1, -1))[0]
+        rows, _ = knn.masked_top_k(self.features, self.feature_sq_norms, query, mask, self.CANDIDATE_POOL)
+
+        totals = fixed + self.row_macros(rows)
+        uses = np.array([(week_uses or {}).get(int(row), 0) for row in rows], dtype=np.float64)
+        costs = day_cost(totals, target, self.planner.macro_weights) + self.planner.variety_weight * uses
+        order = np.lexsort((rows, costs))[:limit]
+        return rows[order], totals[order], costs[order]
+
+    def _slot_mask(self, slot):
+        bits = np.bitwise_or.reduce([self.tag_index.bitmap(tag) for tag in SLOT_TAGS[slot]])
+        for tag in EXCLUDED_TAGS:
+            bits = bits & ~self.tag_index.bitmap(tag)
+        return unpack(bits, len(self.data))
+
+    def _meal_macros(self, meal):
+        """
+        ((4,) macros, row) for a plan meal card; the dataset's values when the id
+        is known, else the card's own numbers (row None).
+        """
+        row = self.row_for_id(meal.get('id'))
+        if row is not None:
+            return self.row_macros([row])[0], row
+        macros = []
+        for col in self.feature_columns:
+            try:
+                macros.append(float(meal.get(col) or 0))
+            except (TypeError, ValueError):
+                macros.append(0.0)
+        return np.array(macros), None
+
+    def row_macros(self, rows):
+        """
+        (len(rows), 4) calories/protein/carbs/fats for row positions.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return np.column_stack([self.range_index.values[col][rows] for col in self.feature_columns])
+
+    def daily_target_for_calories(self, calories, goal=None):
+        """
+        (4,) daily calories/protein/carbs/fats for a calorie target, split like calculate_targets.
+        """
+        protein, fats, carbs = self.MACRO_SPLITS.get(goal, self.DEFAULT_MACRO_SPLIT)
+        return np.array([calories, calories * protein / 4, calories * carbs / 4, calories * fats / 9])
+
+    def _macro_totals(self, macros):
+        return {col: int(round(float(v))) for col, v in zip(self.feature_columns, macros)}
+
+    def search_meals(self, query=None, tag=None, ranges=None):
+        return self._format_results(self.search_rows(query, tag, ranges))
+
+    def search_rows(self, query=None, tag=None, ranges=None):
+        """
+        Row positions of the search hits (at most SEARCH_LIMIT), best first.
+        """
+        return self.search_ranking(query, tag, self.SEARCH_LIMIT, ranges)[0].tolist()
+
+    def search_ranking(self, query=None, tag=None, depth=None, ranges=None, mode=None):
+        """
+        (rows, total): up to `depth` (default SEARCH_DEPTH) int32 row positions
+        in ranked order, and how many rows match in total.
+        ranges: optional {column: (lo, hi)} inclusive numeric filters (see RANGE_COLUMNS).
+        mode: 'sparse' (default, TF-IDF terms), 'latent' (SVD vectors) or 'bm25'
+        (BM25F over name/ingredients/tags), see search_modes().
+        """
+        rows, total, _ = self.search_with_facets(query, tag, depth, ranges, mode=mode)
+        return rows, total
+
+    def search_with_facets(self, query=None, tag=None, depth=None, ranges=None, facet_limit=None, mode=None):
+        """
+        search_ranking plus, when facet_limit is given, diet/cuisine/tag facet
+        counts over the whole match set (not just the ranked depth).
+        Returns (rows, total, facets); facets is None without facet_limit.
+        """
+        depth = depth or self.SEARCH_DEPTH
+        no_hits = np.empty(0, dtype=np.int32)
+        if self.data.empty: return no_hits, 0, self._facets(no_hits, facet_limit)
+        index = self._search_index_for(mode)
+
+        # Apply Tag Filter if provided
+        tag_mask = None
+        total = len(self.data)
+        if tag and tag.lower() != 'all':
+            # Any tag containing the filter (case-insensitive partial match for robustness)
+            bits = self.tag_index.bitmap_containing(tag)
+            total = popcount(bits)
+            if total == 0:
+                return no_hits, 0, self._facets(no_hits, facet_limit)
+            tag_mask = unpack(bits, len(self.data))
+
+        # Numeric ranges come from the pre-sorted range index, ANDed with the tag mask
+        if ranges:
+            range_mask = self.range_index.mask(ranges)
+            tag_mask = range_mask if tag_mask is None else tag_mask & range_mask
+            total = int(np.count_nonzero(tag_mask))
+            if total == 0:
+                return no_hits, 0, self._facets(no_hits, facet_limit)
+
+        if not query:
+            # Seeded shuffle of the filtered results, keyed by dataset and tag
+            # so the same browse request (and every page of it) is stable
+            matched = np.flatnonzero(tag_mask) if tag_mask is not None else None
+            rows = matched if matched is not None else np.arange(len(self.data))
+            seed = zlib.crc32(f"{self.dataset_version}:{str(tag or '').lower()}".encode('utf-8'))
+            picks = np.random.default_rng(seed).choice(len(rows), min(depth, len(rows)), replace=False)
+            return rows[picks].astype(np.int32), total, self._facets(matched, facet_limit)
+
+        # Only rows sharing a query term are scored; the tag mask is applied
+        # to those hits before the top-k selection.
+        matched, scores = index.matches(query, tag_mask, min_hits=self.SEARCH_LIMIT)
+        rows = top_k(matched, scores, depth)[0]
+        return rows.astype(np.int32), len(matched), self._facets(matched, facet_limit)
+
+    def search_modes(self):
+        return list(self.search_indexes)
+
+    def _search_index_for(self, mode):
+        if not mode:
+            return self.search_index
+        index = self.search_indexes.get(mode)
+        if index is None:
+            raise ValueError(f"Unknown search mode '{mode}'; available: {', '.join(self.search_modes())}")
+        return index
+
+    def _facets(self, rows, limit):
+        if limit is None:
+            return None
+        if self.tag_index is None:
+            # No dataset loaded: same groups, nothing in them
+            return empty_facets()
+        return facet_counts(self.tag_index, rows, limit)
+
+    def autocomplete_rows(self, prefix, limit=10):
+        """
+        Row positions of recipes with a name word starting with prefix, most popular first.
+        """
+        if self.autocomplete_index is None: return []
+        return self.autocomplete_index.complete(prefix, limit).tolist()
+
+    def similar_meals(self, row, limit=None):
+        """
+        (rows, scores) of the precomputed most similar recipes to a row, best first. O(limit).
+        """
+        if self.similar_rows is None: return [], []
+        limit = limit or self.similar_rows.shape[1]
+        return self.similar_rows[row, :limit].tolist(), self.similar_scores[row, :limit].astype(float).tolist()
+
+    def _format_results(self, rows):
+        """
+        Meal cards for row positions (a list, or a DataFrame slice of self.data),
+        decoded from the prebuilt JSON fragments.
+        """
+        if isinstance(rows, pd.DataFrame): rows = rows.index
+        return [self.meal_cards[i] for i in rows]
+
+    def row_for_id(self, meal_id):
+        """
+        Row position of a recipe id (int or numeric string), or None.
+        """
+        try:
+            return self.id_to_row.get(int(float(str(meal_id))))
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    def lookup_rows(self, meal_ids):
+        """
+        Row positions for the ids that exist (in request order) and the ids that don't.
+        """
+        rows, missing = [], []
+        for mid in meal_ids:
+            pos = self.row_for_id(mid)
+            if pos is None:
+                missing.append(mid)
+            else:
+                rows.append(pos)
+        return rows, missing
+
+    def meal_card_json(self, row):
+        return self.meal_cards_blob[self.meal_cards_offsets[row]:self.meal_cards_offsets[row + 1]].tobytes()
+
+    def meal_cards_json(self, rows):
+        """
+        JSON array of the prebuilt cards for row positions, assembled from the
+        pre-serialized fragments without re-encoding.
+        """
+        blob, offsets = self.meal_cards_blob, self.meal_cards_offsets
+        return b'[' + b','.join(blob[offsets[i]:offsets[i + 1]].tobytes() for i in rows) + b']'
+
+    def _candidate_frame(self, rows):
+        """
+        self.data rows plus their tags_list, the shape the LLM prompt and the
+        heuristic week-plan fallback read.
+        """
+        candidates = self.data.iloc[rows].copy()
+        candidates['tags_list'] = self.tag_lists.take(rows)
+        return candidates
+
+    def _load_meal_cards(self):
+        # Cards are decoded per access from the serialized fragments
+        self.meal_cards = JsonRows(self.meal_cards_blob, self.meal_cards_offsets)
+
+    def _meal_card_fragments(self, chunk):
+        """
+        Response-ready cards for the rows of a parsed chunk, serialized as
+        compact JSON; appended in row order they make up meal_cards_blob, so
+        steps never need to be kept for the whole dataset.
+        """
+        macros = {col: chunk[col].to_numpy().astype(np.int64).tolist() for col in ['calories', 'protein', 'carbs', 'fats']}
+        names = chunk['name'].tolist()
+        tags = chunk['tags_list'].tolist()
+        images = [self._get_meal_image(name, str(t)) for name, t in zip(names, tags)]
+
+        return [
+            json.dumps({
+                "id": str(rid),
+                "name": name,
+                "calories": cal,
+                "protein": protein,
+                "carbs": carbs,
+                "fats": fats,
+                "image": image,
+                "time": f"{minutes} min",
+                "tags": t[:4],
+                "ingredients": ingredients,
+                "steps": steps
+            }, separators=(',', ':')).encode('utf-8')
+            for rid, name, cal, protein, carbs, fats, image, minutes, t, ingredients, steps in zip(
+                chunk['id'].tolist(), names, macros['calories'], macros['protein'], macros['carbs'], macros['fats'],
+                images, chunk['minutes'].tolist(), tags, chunk['ingredients_list'].tolist(), chunk['steps_list'].tolist())
+        ]
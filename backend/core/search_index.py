@@ -0,0 +1,190 @@
+import numpy as np
+from scipy import sparse
+
+# Char-trigram fallback: weight of trigram similarity when blended with word
+# similarity, the weakest trigram match worth returning, and the most posting
+# entries one fallback query may touch (rarest trigrams are kept first).
+CHAR_WEIGHT = 0.5
+MIN_CHAR_SCORE = 0.2
+MAX_CHAR_POSTINGS = 250_000
+# Latent search: rows less similar than this to the query are not matches.
+MIN_LATENT_SCORE = 0.3
+
+
+def top_k(rows, scores, k):
+    """
+    The k best (rows, scores) by descending score, ties broken by row.
+    argpartition keeps this linear in the number of hits.
+    """
+    if k <= 0:
+        return rows[:0], scores[:0]
+    if len(rows) > k:
+        # Everything tied with the k-th score survives so ties resolve by row.
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        keep = scores >= kth
+        rows, scores = rows[keep], scores[keep]
+    order = np.lexsort((rows, -scores))[:k]
+    return rows[order], scores[order]
+
+
+def masked(rows, scores, mask):
+    if mask is None:
+        return rows, scores
+    keep = mask[rows]
+    return rows[keep], scores[keep]
+
+
+def blend(first, second):
+    """
+    Sum of two sparse (rows, scores) score sets over the union of their rows.
+    """
+    rows = np.concatenate([first[0], second[0]])
+    if len(rows) == 0:
+        return rows, np.empty(0, dtype=np.float64)
+    rows, inverse = np.unique(rows, return_inverse=True)
+    scores = np.zeros(len(rows), dtype=np.float64)
+    np.add.at(scores, inverse, np.concatenate([first[1], second[1]]))
+    return rows, scores
+
+
+class SearchIndex:
+    """
+    Ranking on top of matches(query, mask, min_hits) -> (rows, scores).
+    """
+    def rank(self, query, k, mask=None, min_hits=None):
+        """
+        (rows, total): row positions of the k best matches and how many rows matched.
+        """
+        rows, scores = self.matches(query, mask, k if min_hits is None else min_hits)
+        return top_k(rows, scores, k)[0], len(rows)
+
+    def search(self, query, k, mask=None):
+        return self.rank(query, k, mask)[0]
+
+
+class TfidfSearchIndex(SearchIndex):
+    """
+    Ranks recipes by cosine similarity to a query over the engine's TF-IDF
+    matrix. Rows are L2-normalized, so cosine is a dot product, and only the
+    postings of the query's terms are touched (term -> rows CSR transpose).
+    term_rows: that transpose when already built (e.g. mapped from the
+    engine snapshot); computed from matrix otherwise.
+    """
+    def __init__(self, vectorizer, matrix, term_rows=None):
+        self.vectorizer = vectorizer
+        self.vocabulary = getattr(vectorizer, 'vocabulary_', None) or vectorizer.vocabulary
+        self.analyzer = vectorizer.build_analyzer()
+        self.n_rows = matrix.shape[0]
+        self.term_rows = sparse.csr_matrix(matrix).T.tocsr() if term_rows is None else term_rows
+        self.posting_lengths = np.diff(self.term_rows.indptr)
+
+    @property
+    def nbytes(self):
+        return self.term_rows.data.nbytes + self.term_rows.indices.nbytes + self.term_rows.indptr.nbytes
+
+    def score(self, query, max_postings=None):
+        """
+        (rows, scores) for every row sharing at least one term with the query.
+        With max_postings, only the highest-weight terms whose postings fit
+        the budget are scored (always at least one).
+        """
+        q = self.vectorizer.transform([query])
+        if q.nnz == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        terms, weights = q.indices, q.data
+        if max_postings is not None:
+            order = np.argsort(-weights, kind='stable')
+            within = np.cumsum(self.posting_lengths[terms[order]]) <= max_postings
+            keep = order[within] if within[0] else order[:1]
+            terms, weights = terms[keep], weights[keep]
+
+        hits = (sparse.csr_matrix(weights.reshape(1, -1)) @ self.term_rows[terms]).tocsr()
+        return hits.indices.astype(np.int64), hits.data.astype(np.float64)
+
+    def has_unknown_terms(self, query):
+        """
+        True if the query has a (non stop word) term outside the vocabulary.
+        """
+        return any(term not in self.vocabulary for term in self.analyzer(query))
+
+    def matches(self, query, mask=None, min_hits=None):
+        """
+        (rows, scores) of every match, optionally restricted to rows where
+        mask is True. min_hits is only used by TypoTolerantSearch.
+        """
+        return masked(*self.score(query), mask)
+
+
+class TypoTolerantSearch(SearchIndex):
+    """
+    Word TF-IDF search with a char-trigram fallback over recipe names. When
+    the query has words outside the word vocabulary, or too few word hits
+    survive the mask, trigram similarity is blended in so "chiken curry"
+    still finds chicken curry. Trigram work is capped at max_postings.
+    """
+    def __init__(self, words, chars, char_weight=CHAR_WEIGHT, min_char_score=MIN_CHAR_SCORE,
+                 max_postings=MAX_CHAR_POSTINGS):
+        self.words = words
+        self.chars = chars
+        self.char_weight = char_weight
+        self.min_char_score = min_char_score
+        self.max_postings = max_postings
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes + self.chars.nbytes
+
+    def matches(self, query, mask=None, min_hits=None):
+        """
+        Same as TfidfSearchIndex.matches. The fallback kicks in when fewer
+        than min_hits word hits survive the mask.
+        """
+        rows, scores = self.words.matches(query, mask)
+        if len(rows) >= (min_hits or 0) and not self.words.has_unknown_terms(query):
+            return rows, scores
+
+        char_rows, char_scores = masked(*self.chars.score(query, self.max_postings), mask)
+        keep = char_scores >= self.min_char_score
+        return blend((rows, scores), (char_rows[keep], char_scores[keep] * self.char_weight))
+
+
+class LatentSearchIndex(SearchIndex):
+    """
+    Ranks by cosine similarity in a TruncatedSVD projection of the TF-IDF
+    space, so related recipes ("stir fry" / "wok") match without sharing a
+    term. vectors: (n_rows, dims) float32 unit rows; components: (dims,
+    n_terms) float32 used to project queries. Every row is scored with one
+    dense matrix-vector product.
+    """
+    def __init__(self, vectorizer, components, vectors, min_score=MIN_LATENT_SCORE):
+        self.vectorizer = vectorizer
+        self.components = components
+        self.vectors = vectors
+        self.min_score = min_score
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + self.components.nbytes
+
+    def embed(self, query):
+        """
+        Unit latent vector for a query, or None if it has no known terms.
+        """
+        q = self.vectorizer.transform([query])
+        if q.nnz == 0:
+            return None
+        vector = np.asarray(q @ self.components.T, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def score(self, query):
+        vector = self.embed(query)
+        if vector is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        scores = self.vectors @ vector
+        rows = np.flatnonzero(scores >= self.min_score)
+        return rows, scores[rows].astype(np.float64)
+
+    def matches(self, query, mask=None, min_hits=None):
+        return masked(*self.score(query), mask)
@@ -0,0 +1,53 @@
+import numpy as np
+from scipy import sparse
+from sklearn.neighbors import NearestNeighbors
+
+# Neighbors kept per recipe, macro-nearest candidates re-ranked per recipe,
+# and the share of the blended score that comes from TF-IDF similarity.
+SIMILAR_K = 20
+CANDIDATES = 100
+TEXT_WEIGHT = 0.5
+BLOCK_ROWS = 4096
+
+
+def build_similar_table(features, tfidf_matrix, k=SIMILAR_K, candidates=CANDIDATES, text_weight=TEXT_WEIGHT,
+                        block_rows=BLOCK_ROWS):
+    """
+    Top-k "more like this" neighbors for every row.
+    features: (n, d) scaled macro features (the KNN space); tfidf_matrix: (n, terms) L2-normalized.
+    Candidates are each row's nearest recipes by macros (kd-tree), re-ranked by
+    text_weight * tfidf cosine + (1 - text_weight) / (1 + macro distance).
+    Returns (rows int32 (n, k), scores float16 (n, k)), best first.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    n = len(features)
+    k = min(k, n - 1)
+    if k < 1:
+        return np.empty((n, 0), dtype=np.int32), np.empty((n, 0), dtype=np.float16)
+    c = min(max(candidates, k), n - 1)
+
+    tree = NearestNeighbors(n_neighbors=c + 1, algorithm='kd_tree').fit(features)
+    tfidf = sparse.csr_matrix(tfidf_matrix)
+    table_rows = np.empty((n, k), dtype=np.int32)
+    table_scores = np.empty((n, k), dtype=np.float16)
+
+    for start in range(0, n, block_rows):
+        block = np.arange(start, min(n, start + block_rows))
+        distances, neighbors = tree.kneighbors(features[block])
+
+        # Drop the row itself (not always column 0 when duplicates tie)
+        keep = np.argsort(neighbors == block[:, None], axis=1, kind='stable')[:, :c]
+        neighbors = np.take_along_axis(neighbors, keep, axis=1)
+        distances = np.take_along_axis(distances, keep, axis=1)
+
+        text = tfidf[np.repeat(block, c)].multiply(tfidf[neighbors.ravel()]).sum(axis=1)
+        text = np.asarray(text).reshape(len(block), c)
+        scores = text_weight * text + (1.0 - text_weight) / (1.0 + distances)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        table_rows[block] = np.take_along_axis(np.take_along_axis(neighbors, top, axis=1), order, axis=1)
+        table_scores[block] = np.take_along_axis(top_scores, order, axis=1)
+
+    return table_rows, table_scores
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from core.compact import flatten_lists
+
+# Set bits per byte value, for counting rows in a packed bitmap.
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def pack(mask):
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+
+def unpack(bits, n_rows):
+    return np.unpackbits(bits, count=n_rows).astype(bool)
+
+
+def popcount(bits):
+    return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+
+class TagIndex:
+    """
+    Inverted index from lowercased tag to a packed row bitmap (one bit per
+    row of engine.data). Built once at load time so tag filters are bitmap
+    lookups and ANDs instead of scans over tags_list.
+    """
+    def __init__(self, tags_lists):
+        # tags_lists: per-row lists of tags, or an InternedLists
+        lengths, items = flatten_lists(tags_lists)
+        self.n_rows = len(lengths)
+        n_bytes = (self.n_rows + 7) // 8
+
+        flat = pd.Series(items, dtype=object).astype(str).str.lower()
+        rows = np.repeat(np.arange(self.n_rows, dtype=np.int64), lengths)
+        tag_ids, self.tags = pd.factorize(flat)
+        self.tags = list(self.tags)
+        self.vocabulary = {tag: i for i, tag in enumerate(self.tags)}
+
+        self.bitmaps = np.zeros((len(self.tags), n_bytes), dtype=np.uint8)
+        order = np.argsort(tag_ids, kind='stable')
+        bounds = np.searchsorted(tag_ids[order], np.arange(len(self.tags) + 1))
+        for tag_id in range(len(self.tags)):
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[rows[order[bounds[tag_id]:bounds[tag_id + 1]]]] = True
+            self.bitmaps[tag_id] = np.packbits(mask)
+        self.counts = np.array([popcount(b) for b in self.bitmaps], dtype=np.int64)
+
+        # Row -> tag ids (flat + offsets) for counting tags over small row subsets
+        self.row_tag_ids = tag_ids.astype(np.int32)
+        self.row_tag_offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    def empty(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def bitmap(self, tag):
+        """
+        Rows carrying exactly this tag (case-insensitive).
+        """
+        tag_id = self.vocabulary.get(str(tag).lower())
+        return self.empty() if tag_id is None else self.bitmaps[tag_id]
+
+    def bitmap_containing(self, fragment):
+        """
+        Rows with any tag containing `fragment`, e.g. "carb" -> low-carb, high-carb...
+        Only the tag vocabulary is scanned, not the rows.
+        """
+        fragment = str(fragment).lower()
+        tag_ids = [i for i, tag in enumerate(self.tags) if fragment in tag]
+        if not tag_ids:
+            return self.empty()
+        return np.bitwise_or.reduce(self.bitmaps[tag_ids], axis=0)
+
+    def mask(self, tag):
+        return unpack(self.bitmap(tag), self.n_rows)
+
+    def count(self, tag):
+        tag_id = self.vocabulary.get(str(tag).lower())
+        return 0 if tag_id is None else int(self.counts[tag_id])
+
+    def rows_have(self, tags, rows):
+        """
+        For each row in `rows`, whether it carries any of `tags`; reads bits directly
+        instead of unpacking whole bitmaps.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        tag_ids = [self.vocabulary[t] for t in (str(t).lower() for t in tags) if t in self.vocabulary]
+        if not tag_ids:
+            return np.zeros(len(rows), dtype=bool)
+        packed = np.bitwise_or.reduce(self.bitmaps[tag_ids][:, rows >> 3], axis=0)
+        return ((packed >> (7 - (rows & 7))) & 1).astype(bool)
+
+    def counts_within(self, rows=None):
+        """
+        Per-tag row counts over a subset of rows (None = all rows). Small
+        subsets gather each row's tag ids; large ones AND every tag bitmap
+        with the subset's bitmap and popcount.
+        """
+        if rows is None:
+            return self.counts.copy()
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.row_tag_offsets[rows]
+        lengths = self.row_tag_offsets[rows + 1] - starts
+        n_entries = int(lengths.sum())
+
+        # A gathered tag id costs roughly as much as a few bitmap bytes
+        if n_entries * 4 < self.bitmaps.size:
+            shift = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+            ids = self.row_tag_ids[shift + np.arange(n_entries, dtype=np.int64)]
+            return np.bincount(ids, minlength=len(self.tags)).astype(np.int64)
+
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        subset = pack(mask)
+        return _POPCOUNT[self.bitmaps & subset].sum(axis=1, dtype=np.int64)
+
+    def top(self, n, counts=None, exclude=()):
+        """
+        [(tag, count)] for the n most frequent tags (over `counts`, default all rows).
+        """
+        counts = self.counts if counts is None else counts
+        excluded = [self.vocabulary[t] for t in exclude if t in self.vocabulary]
+        if excluded:
+            counts = counts.copy()
+            counts[excluded] = 0
+        order = np.argsort(-counts, kind='stable')[:n]
+        return [(self.tags[i], int(counts[i])) for i in order if counts[i] > 0]
@@ -0,0 +1,164 @@
+import math
+
+import numpy as np
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MEAL_SLOTS = ['breakfast', 'lunch', 'dinner']
+
+# Food.com tags that make a recipe suitable for each slot, and tags that make
+# it a poor fit for any slot (used only while alternatives exist).
+SLOT_TAGS = {
+    'breakfast': ['breakfast', 'brunch'],
+    'lunch': ['lunch', 'main-dish', 'salads', 'sandwiches', 'soups-stews'],
+    'dinner': ['dinner', 'main-dish', 'dinner-party', 'one-dish-meal'],
+}
+EXCLUDED_TAGS = ['desserts', 'dessert', 'beverages', 'cocktails']
+
+# Relative weight of calories, protein, carbs, fats in the daily deviation cost.
+MACRO_WEIGHTS = np.array([2.0, 1.0, 0.5, 0.5])
+# Cost added per extra use of the same recipe; spreads picks across the pool.
+VARIETY_WEIGHT = 0.02
+MAX_REPEATS = 2
+
+
+def day_cost_scale(target, macro_weights=MACRO_WEIGHTS):
+    """
+    Per-macro factor of day_cost for a target; callers scoring many days
+    against one target compute it once.
+    """
+    return np.asarray(macro_weights, dtype=np.float64) / np.maximum(np.asarray(target, dtype=np.float64), 1.0) ** 2
+
+
+def day_cost(totals, target, macro_weights=MACRO_WEIGHTS, scale=None):
+    """
+    The planner's daily objective: squared deviation of calories/protein/
+    carbs/fats totals from the daily target, relative to the target and weighted.
+    scale: precomputed day_cost_scale(target, macro_weights).
+    """
+    target = np.asarray(target, dtype=np.float64)
+    if scale is None:
+        scale = day_cost_scale(target, macro_weights)
+    return ((np.asarray(totals, dtype=np.float64) - target) ** 2 * scale).sum(axis=-1)
+
+
+class WeeklyPlanner:
+    """
+    Deterministic non-LLM week planner. Fills 7 x 3 slots from a candidate pool
+    so each day's calorie/macro totals land near the daily targets, no recipe
+    is used more than `max_repeats` times or twice in one day, and slots prefer
+    meal-type-suitable recipes. Greedy construction followed by local search
+    (single-slot replacements and same-slot swaps between days).
+    """
+    def __init__(self, max_repeats=MAX_REPEATS, max_passes=20, macro_weights=MACRO_WEIGHTS,
+                 variety_weight=VARIETY_WEIGHT):
+        self.max_repeats = max_repeats
+        self.max_passes = max_passes
+        self.macro_weights = np.asarray(macro_weights, dtype=np.float64)
+        self.variety_weight = variety_weight
+
+    def plan(self, macros, suitability, daily_target):
+        """
+        macros: (n, 4) calories/protein/carbs/fats per candidate.
+        suitability: (n, 3) bool, breakfast/lunch/dinner fit per candidate.
+        daily_target: (4,) daily calories/protein/carbs/fats.
+        Returns a (7, 3) array of candidate positions.
+        """
+        macros = np.asarray(macros, dtype=np.float64)
+        target = np.asarray(daily_target, dtype=np.float64)
+        n = len(macros)
+        if n == 0:
+            raise ValueError("No candidates to plan from")
+
+        self._macros = macros
+        self._target = target
+        self._scale = day_cost_scale(target, self.macro_weights)
+        self._cap = max(self.max_repeats, math.ceil(len(DAYS) * len(MEAL_SLOTS) / n))
+        self._distinct_days = n >= len(MEAL_SLOTS)
+
+        allowed = np.asarray(suitability, dtype=bool).copy()
+        for s in range(len(MEAL_SLOTS)):
+            if not allowed[:, s].any():
+                allowed[:, s] = True
+        self._allowed = allowed
+
+        plan = self._greedy()
+        self._local_search(plan)
+        return plan
+
+    def _day_cost(self, totals):
+        return day_cost(totals, self._target, scale=self._scale)
+
+    def _feasible(self, plan, uses, d, s, current=None):
+        ok = self._allowed[:, s] & (uses < self._cap)
+        if current is not None:
+            ok[current] = True
+        if self._distinct_days:
+            others = [plan[d, j] for j in range(len(MEAL_SLOTS)) if j != s and plan[d, j] >= 0]
+            ok[others] = False
+        if not ok.any():
+            ok = uses < self._cap
+        return ok
+
+    def _greedy(self):
+        n_days, n_slots = len(DAYS), len(MEAL_SLOTS)
+        plan = np.full((n_days, n_slots), -1, dtype=np.int64)
+        uses = np.zeros(len(self._macros), dtype=np.int64)
+        per_meal = self._target / n_slots
+
+        for d in range(n_days):
+            totals = np.zeros(4)
+            for s in range(n_slots):
+                # Assume the slots still open for the day will hit the per-meal average.
+                projected = totals + self._macros + (n_slots - 1 - s) * per_meal
+                cost = self._day_cost(projected) + self.variety_weight * (2 * uses + 1)
+                cost[~self._feasible(plan, uses, d, s)] = np.inf
+                choice = int(np.argmin(cost))
+                plan[d, s] = choice
+                uses[choice] += 1
+                totals += self._macros[choice]
+        self._uses = uses
+        return plan
+
+    def _local_search(self, plan):
+        uses = self._uses
+        totals = self._macros[plan].sum(axis=1)
+
+        for _ in range(self.max_passes):
+            improved = False
+
+            # 1. Replace one slot with the best feasible candidate.
+            for d in range(len(DAYS)):
+                for s in range(len(MEAL_SLOTS)):
+                    current = plan[d, s]
+                    base = totals[d] - self._macros[current]
+                    uses[current] -= 1
+                    cost = self._day_cost(base + self._macros) + self.variety_weight * (2 * uses + 1)
+                    cost[~self._feasible(plan, uses, d, s, current)] = np.inf
+                    choice = int(np.argmin(cost))
+                    if cost[choice] < cost[current] - 1e-12:
+                        plan[d, s] = choice
+                        totals[d] = base + self._macros[choice]
+                        improved = True
+                    uses[plan[d, s]] += 1
+
+            # 2. Swap the same slot between two days (recipe use counts unchanged).
+            for s in range(len(MEAL_SLOTS)):
+                for d1 in range(len(DAYS)):
+                    for d2 in range(d1 + 1, len(DAYS)):
+                        a, b = plan[d1, s], plan[d2, s]
+                        if a == b:
+                            continue
+                        if self._distinct_days and (b in np.delete(plan[d1], s) or a in np.delete(plan[d2], s)):
+                            continue
+                        delta = self._macros[b] - self._macros[a]
+                        before = self._day_cost(totals[d1]) + self._day_cost(totals[d2])
+                        after = self._day_cost(totals[d1] + delta) + self._day_cost(totals[d2] - delta)
+                        if after < before - 1e-12:
+                            plan[d1, s], plan[d2, s] = b, a
+                            totals[d1] += delta
+                            totals[d2] -= delta
+                            improved = True
+
+            if not improved:
+                break
+        return plan
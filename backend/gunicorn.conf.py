@@ -0,0 +1,43 @@
+import gc
+import os
+
+from core.memory_report import memory_report
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+
+# Import the app and build the recommendation engine once in the master, so
+# forked workers share its pages copy-on-write instead of each building a
+# private copy. GUNICORN_PRELOAD=0 goes back to per-worker engines (which
+# still share the memory-mapped snapshot arrays through the page cache).
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+# Seconds between checks of the dataset file; when it changes each worker
+# builds the new engine in the background and swaps it in (0 disables).
+# Replace the file atomically (write elsewhere, then rename over it). The same
+# check carries POST /admin/reload to every worker, so it's on by default
+# when there is more than one.
+reload_poll_seconds = float(os.environ.get("ENGINE_RELOAD_POLL_SECONDS", 5 if workers > 1 else 0))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from services.recommendation_service import RecommendationService
+    # The app's startup warmup is already building it; wait so no thread is
+    # mid-build when the workers fork.
+    service = RecommendationService.wait_until_loaded()
+    # Move everything built so far into the permanent generation: the cyclic
+    # GC never scans (and so never writes to) these objects in the workers,
+    # which keeps their pages shared after fork.
+    gc.freeze()
+    server.log.info(memory_report("master", service.get_engine()))
+
+
+def post_worker_init(worker):
+    from services.recommendation_service import RecommendationService
+    engine = RecommendationService._instance.get_engine() if RecommendationService._instance else None
+    worker.log.info(memory_report(f"worker {worker.age}", engine))
+    if reload_poll_seconds > 0:
+        # Threads don't survive fork, so the watch runs in each worker, not the master
+        RecommendationService.watch_dataset(reload_poll_seconds)
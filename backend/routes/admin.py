@@ -1,7 +1,11 @@
 from flask import Blueprint, jsonify, request
+from core.range_index import parse_range_args
+from core.memory_report import process_memory, array_memory
+from core.extensions import limiter
+from core.auth import require_admin
 from services.recommendation_service import RecommendationService
-import pandas as pd
 import numpy as np
+import os
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -24,27 +28,23 @@ def get_stats():
         total_meals = int(len(df))
         avg_calories = int(df['calories'].mean()) if not df.empty else 0
         
-        # Tag Analysis for "Cuisines" / Categories
-        # We'll flatten the tags_list and count
-        all_tags = []
-        for tags in df['tags_list']:
-            all_tags.extend(tags)
-            
-        tag_series = pd.Series(all_tags)
-        top_tags = tag_series.value_counts().head(10).to_dict()
+        # Tag Analysis for "Cuisines" / Categories (precomputed bitmap counts)
+        top_tags = dict(engine.tag_index.top(10))
         
-        # Simple Diet Stats (based on keyword presence)
+        # Simple Diet Stats (precomputed tag bitmap counts)
         diet_keywords = ['vegan', 'vegetarian', 'gluten-free', 'dairy-free', 'keto', 'low-carb']
         diet_stats = {}
         for diet in diet_keywords:
-            count = df['tags_list'].apply(lambda x: diet in x).sum()
-            diet_stats[diet] = int(count)
+            diet_stats[diet] = engine.tag_index.count(diet)
 
         return jsonify({
             "total_meals": total_meals,
             "avg_calories": avg_calories,
             "top_tags": top_tags,
-            "diet_stats": diet_stats
+            "diet_stats": diet_stats,
+            "search_cache": service.search_cache_stats(),
+            "search_indexes": service.search_index_stats(),
+            "memory": {"process": process_memory(), "engine_arrays": array_memory(engine.numeric_arrays())}
         })
         
     except Exception as e:
@@ -66,31 +66,36 @@ def get_meals_list():
         per_page = int(request.args.get('per_page', 20))
         search = request.args.get('search', '').lower()
         
-        # Filter
-        filtered_df = df
+        try:
+            ranges = parse_range_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Filter (numeric ranges from the pre-sorted range index, then a
+        # substring scan over the lowercased name/ingredients/tags buffer)
+        rows = engine.range_index.rows(ranges) if ranges else np.arange(len(df))
         if search:
-            mask = df['combined_text'].astype(str).str.contains(search, case=False, na=False)
-            filtered_df = df[mask]
+            rows = rows[engine.search_text.contains(search)[rows]]
             
-        total_items = len(filtered_df)
+        total_items = len(rows)
         total_pages = (total_items + per_page - 1) // per_page
         
         # Slice
         start = (page - 1) * per_page
         end = start + per_page
-        sliced_df = filtered_df.iloc[start:end]
+        sliced_rows = rows[start:end].tolist()
         
-        # Format
+        # Format from the prebuilt cards
         meals = []
-        for _, row in sliced_df.iterrows():
+        for card in engine._format_results(sliced_rows):
             meals.append({
-                "id": str(row['id']),
-                "name": row['name'],
-                "calories": int(row['calories']),
-                "protein": int(row['protein']),
-                "carbs": int(row['carbs']),
-                "fats": int(row['fats']),
-                "tags": row['tags_list'][:3] # Limit tags for table view
+                "id": card['id'],
+                "name": card['name'],
+                "calories": card['calories'],
+                "protein": card['protein'],
+                "carbs": card['carbs'],
+                "fats": card['fats'],
+                "tags": card['tags'][:3] # Limit tags for table view
             })
             
         return jsonify({
@@ -103,3 +108,21 @@ def get_meals_list():
     except Exception as e:
         print(f"Error in admin meals list: {e}")
         return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/admin/reload', methods=['POST'])
+@limiter.limit("5 per minute")
+@require_admin
+def reload_dataset():
+    # Rebuilds this worker's engine from the dataset file in the background;
+    # the current engine serves until the new one is swapped in. The other
+    # gunicorn workers pick the request up through their dataset watch
+    # (ENGINE_RELOAD_POLL_SECONDS); "all_workers" is false when it's off.
+    data = request.get_json(silent=True) or {}
+    service = RecommendationService.get_instance()
+    status = service.request_reload(force=bool(data.get('force')))
+    return jsonify(status), 202
+
+@admin_bp.route('/admin/reload', methods=['GET'])
+def reload_status():
+    service = RecommendationService.get_instance()
+    return jsonify(dict(service.reload_status, worker=os.getpid()))
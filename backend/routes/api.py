@@ -1,6 +1,7 @@
-from flask import Blueprint, request, jsonify
-from services.recommendation_service import RecommendationService
+from flask import Blueprint, Response, request, jsonify
+from services.recommendation_service import RecommendationService, MAX_FACETS
 from core.extensions import limiter
+from core.range_index import parse_range_args
 import os
 import smtplib
 from email.mime.text import MIMEText
@@ -8,6 +9,11 @@ from email.mime.multipart import MIMEMultipart
 
 api = Blueprint('api', __name__)
 
+MAX_BATCH_PROFILES = 500
+MAX_LOOKUP_IDS = 500
+MAX_AUTOCOMPLETE = 50
+MAX_PAGE_SIZE = 100
+
 @api.route('/recommend', methods=['POST'])
 @limiter.limit("5 per minute")
 def recommend():
@@ -21,14 +27,103 @@ def recommend():
         return jsonify(recommendations), 500
 
     return jsonify(recommendations)
+
+@api.route('/recommend/batch', methods=['POST'])
+@limiter.limit("5 per minute")
+def recommend_batch():
+    data = request.json or {}
+    profiles = data.get('profiles')
+
+    if not isinstance(profiles, list) or not profiles:
+        return jsonify({"error": "A non-empty 'profiles' list is required"}), 400
+    if len(profiles) > MAX_BATCH_PROFILES:
+        return jsonify({"error": f"At most {MAX_BATCH_PROFILES} profiles per batch"}), 400
+
+    service = RecommendationService.get_instance()
+    recommendations = service.get_batch_recommendations(profiles)
+
+    if "error" in recommendations:
+        return jsonify(recommendations), 500
+
+    return jsonify(recommendations)
     
 @api.route('/meals', methods=['GET'])
 def get_meals():
     query = request.args.get('query', '')
     tag = request.args.get('tag', 'all')
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    mode = request.args.get('mode')  # 'sparse' (default), 'bm25' or 'latent'; see engine.search_modes()
+    service = RecommendationService.get_instance()
+
+    try:
+        # e.g. max_minutes=30&min_calories=400&max_calories=600&min_protein=30
+        ranges = parse_range_args(request.args)
+        body, total, next_cursor = service.search_page_json(query, tag, limit, cursor, ranges, mode)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The body stays a plain array of meals; paging info travels in headers
+    response = Response(body, mimetype='application/json')
+    response.headers['X-Total-Count'] = str(total)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@api.route('/meals/facets', methods=['GET'])
+def get_meal_facets():
+    query = request.args.get('query', '')
+    tag = request.args.get('tag', 'all')
+    limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, MAX_FACETS))
+    mode = request.args.get('mode')
+    service = RecommendationService.get_instance()
+
+    # Same filters as /meals; served from the cached search entry
+    try:
+        ranges = parse_range_args(request.args)
+        return jsonify(service.search_facets(query, tag, ranges, limit, mode))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@api.route('/meals/autocomplete', methods=['GET'])
+def autocomplete_meals():
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, MAX_AUTOCOMPLETE))
+    service = RecommendationService.get_instance()
+    return jsonify({"prefix": prefix, "suggestions": service.autocomplete(prefix, limit)})
+
+@api.route('/meals/<int:meal_id>', methods=['GET'])
+def get_meal(meal_id):
+    service = RecommendationService.get_instance()
+    meal = service.get_meal_json(meal_id)
+    if meal is None:
+        return jsonify({"error": "Meal not found"}), 404
+    return Response(meal, mimetype='application/json')
+
+@api.route('/meals/<int:meal_id>/similar', methods=['GET'])
+def get_similar_meals(meal_id):
+    limit = request.args.get('limit', 10, type=int)
+    service = RecommendationService.get_instance()
+    similar = service.get_similar_meals(meal_id, max(1, limit))
+    if similar is None:
+        return jsonify({"error": "Meal not found"}), 404
+    return jsonify({"id": str(meal_id), "similar": similar})
+
+@api.route('/meals/lookup', methods=['POST'])
+def lookup_meals():
+    data = request.json or {}
+    ids = data.get('ids')
+
+    if not isinstance(ids, list):
+        return jsonify({"error": "An 'ids' list is required"}), 400
+    if len(ids) > MAX_LOOKUP_IDS:
+        return jsonify({"error": f"At most {MAX_LOOKUP_IDS} ids per lookup"}), 400
+
     service = RecommendationService.get_instance()
-    meals = service.search_meals(query, tag)
-    return jsonify(meals)
+    return Response(service.lookup_meals_json(ids), mimetype='application/json')
 
 @api.route('/api/reset-password', methods=['POST'])
 def reset_password():
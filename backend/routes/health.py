@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify
+from core.extensions import limiter
+from services.recommendation_service import RecommendationService
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/healthz', methods=['GET'])
+@limiter.exempt
+def healthz():
+    # Liveness: the process is serving requests (the engine may still be loading)
+    return jsonify({"status": "ok"})
+
+@health_bp.route('/readyz', methods=['GET'])
+@limiter.exempt
+def readyz():
+    # Readiness: only route traffic here once the engine is loaded
+    ready, details = RecommendationService.readiness()
+    return jsonify(details), (200 if ready else 503)
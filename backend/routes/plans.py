@@ -3,10 +3,12 @@ from core.supabase_client import get_supabase_client
 from services.ai_service import AIService
 from core.auth import require_auth
 from core.extensions import limiter
+from services.recommendation_service import RecommendationService
 import datetime
 
 plans_bp = Blueprint('plans', __name__)
 
+MAX_SWAP_CANDIDATES = 20
 
 
 @plans_bp.route('/plans', methods=['GET'])
@@ -34,6 +36,51 @@ def get_plan():
         print(f"Error fetching plan: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _swap_response(plan, data):
+    limit = data.get('limit', 5)
+    try:
+        limit = min(max(1, int(limit)), MAX_SWAP_CANDIDATES)
+        service = RecommendationService.get_instance()
+        result = service.swap_meal(plan, data.get('day'), data.get('slot'), data.get('profile'), limit)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if "error" in result:
+        # No dataset loaded yet
+        return jsonify(result), 503
+    return jsonify(result)
+
+@plans_bp.route('/plans/swap', methods=['POST'])
+def swap_meal():
+    # Body: {"plan", "day", "slot", optional "profile" and "limit"}
+    data = request.json or {}
+    if not isinstance(data.get('plan'), dict):
+        return jsonify({"error": "A 'plan' object is required"}), 400
+    return _swap_response(data['plan'], data)
+
+@plans_bp.route('/plans/saved/swap', methods=['POST'])
+@require_auth
+def swap_saved_meal():
+    # Same as /plans/swap, against the user's stored user_meal_plans row
+    supabase = get_supabase_client()
+    if not supabase:
+        return jsonify({"error": "Database not configured"}), 503
+
+    data = request.json or {}
+    try:
+        response = supabase.table('user_meal_plans')\
+            .select('*')\
+            .eq('user_id', g.user_id)\
+            .execute()
+        if response.error:
+            return jsonify({"error": str(response.error)}), 500
+    except Exception as e:
+        print(f"Error fetching plan: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    if not response.data:
+        return jsonify({"error": "No saved plan"}), 404
+    return _swap_response(response.data[0], data)
+
 @plans_bp.route('/plans/grocery-list', methods=['POST'])
 @require_auth
 @limiter.limit("5 per minute")
@@ -0,0 +1,57 @@
+"""
+Compares the old per-request NearestNeighbors refit against masked top-k
+selection on the precomputed scaled feature matrix.
+
+Usage: python scripts/benchmark_knn.py [n_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import knn
+
+K = 80
+SELECTIVITIES = [0.01, 0.05, 0.2, 0.5, 1.0]
+REPEATS = 20
+
+
+def refit_query(features, query, mask, k):
+    rows = np.flatnonzero(mask)
+    model = NearestNeighbors(n_neighbors=min(k, len(rows)), algorithm='brute', metric='euclidean')
+    model.fit(features[rows])
+    _, idx = model.kneighbors(query.reshape(1, -1))
+    return rows[idx[0]]
+
+
+def timed(fn, *args):
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, np.median(samples)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 230000
+    rng = np.random.default_rng(0)
+    features = rng.standard_normal((n_rows, 4))
+    sq_norms = knn.squared_norms(features)
+    query = rng.standard_normal(4)
+
+    print(f"{n_rows} rows, k={K}, median of {REPEATS} runs")
+    print(f"{'selectivity':>12} {'refit ms':>10} {'masked ms':>10} {'speedup':>8} {'same rows':>10}")
+    for selectivity in SELECTIVITIES:
+        mask = rng.random(n_rows) < selectivity
+        old_rows, old_ms = timed(refit_query, features, query, mask, K)
+        new_rows, new_ms = timed(knn.masked_top_k, features, sq_norms, query, mask, K)
+        same = set(old_rows.tolist()) == set(new_rows[0].tolist())
+        print(f"{selectivity:>12.0%} {old_ms:>10.2f} {new_ms:>10.2f} {old_ms / new_ms:>7.1f}x {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
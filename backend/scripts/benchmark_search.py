@@ -0,0 +1,87 @@
+"""
+Compares the old full cosine_similarity + argsort search against the sparse
+top-k TfidfSearchIndex over random queries drawn from the TF-IDF vocabulary,
+then reports latency and index memory for every search mode (sparse, latent).
+
+Usage: python scripts/benchmark_search.py [data_path] [n_queries]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.recommendation_engine import RecommendationEngine
+
+K = 20
+TAG_SHARE = 0.3
+
+
+def full_scan_search(engine, query, tag_mask, k):
+    sim_scores = cosine_similarity(engine.tfidf.transform([query]), engine.tfidf_matrix)
+    results = []
+    for idx in sim_scores.argsort()[0][::-1]:
+        if len(results) >= k: break
+        if tag_mask is not None and not tag_mask[idx]:
+            continue
+        results.append(int(idx))
+    return results
+
+
+def percentiles(samples):
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    data_path = sys.argv[1] if len(sys.argv) > 1 else None
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    engine = RecommendationEngine(data_path=data_path)
+    rng = np.random.default_rng(0)
+    vocabulary = np.array(sorted(engine.tfidf.vocabulary_))
+    tags = [engine.tag_index.tags[i] for i in np.argsort(-engine.tag_index.counts)[:50]]
+
+    queries = []
+    for _ in range(n_queries):
+        words = rng.choice(vocabulary, rng.integers(1, 4), replace=False)
+        tag = rng.choice(tags) if rng.random() < TAG_SHARE else None
+        queries.append((" ".join(words), tag))
+
+    old_ms, new_ms, agree = [], [], 0
+    for query, tag in queries:
+        tag_mask = engine.tag_index.mask(tag) if tag is not None else None
+
+        started = time.perf_counter()
+        old = full_scan_search(engine, query, tag_mask, K)
+        old_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        new = engine.search_index.search(query, K, tag_mask).tolist()
+        new_ms.append((time.perf_counter() - started) * 1000)
+
+        # The old path pads with zero-score rows; compare the scored prefix.
+        agree += set(new) <= set(old) or len(new) == K
+
+    print(f"{len(engine.data)} rows, {n_queries} queries ({TAG_SHARE:.0%} with a tag), k={K}")
+    print(f"{'':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'full scan':>12} {percentiles(old_ms)[0]:>8.2f} {percentiles(old_ms)[1]:>8.2f}")
+    print(f"{'sparse top-k':>12} {percentiles(new_ms)[0]:>8.2f} {percentiles(new_ms)[1]:>8.2f}")
+    print(f"result sets consistent for {agree}/{n_queries} queries")
+
+    print()
+    print(f"{'mode':>12} {'index MB':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode, index in engine.search_indexes.items():
+        samples = []
+        for query, tag in queries:
+            tag_mask = engine.tag_index.mask(tag) if tag is not None else None
+            started = time.perf_counter()
+            index.search(query, K, tag_mask)
+            samples.append((time.perf_counter() - started) * 1000)
+        p50, p99 = percentiles(samples)
+        print(f"{mode:>12} {index.nbytes / 1e6:>9.1f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Offline relevance and latency comparison of the search modes (sparse TF-IDF,
+latent, BM25F) without hand labels, on two query sets:
+
+- name-derived: two words taken from a sampled recipe name; relevant = every
+  recipe whose name contains both words. Biased towards BM25F, which weights
+  the name field x3 (the same field the labels come from), so its lead there
+  is not independent evidence.
+- ingredient/tag-derived: an ingredient from a sampled recipe, alone or with
+  one of its diet/cuisine tags ("vegan tofu"); relevant = every recipe whose
+  ingredient list (and tags) contain them. Names play no part in the labels.
+
+Reports MRR@K, precision@10, recall@K and p50/p99 latency per set.
+
+Usage: python scripts/evaluate_search.py [data_path] [n_queries]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.recommendation_engine import RecommendationEngine
+from core.facets import DIET_FACETS, CUISINE_FACETS
+
+K = 20
+
+
+def build_queries(engine, n_queries, rng):
+    names = [str(n).lower().split() for n in engine.data['name']]
+    word_rows = {}
+    for row, words in enumerate(names):
+        for word in set(words):
+            word_rows.setdefault(word, set()).add(row)
+
+    queries = []
+    for row in rng.permutation(len(names)):
+        words = [w for w in dict.fromkeys(names[row]) if len(w) > 2]
+        if len(words) < 2:
+            continue
+        picked = list(rng.choice(words, 2, replace=False))
+        relevant = word_rows[picked[0]] & word_rows[picked[1]]
+        queries.append((" ".join(picked), relevant))
+        if len(queries) == n_queries:
+            break
+    return queries
+
+
+def build_label_queries(engine, n_queries, rng):
+    """
+    Queries labelled from ingredient lists and diet/cuisine tags, not names:
+    every other query is "<tag> <ingredient>" when the sampled recipe has
+    such a tag, otherwise just "<ingredient>".
+    """
+    facet_tags = set(DIET_FACETS) | set(CUISINE_FACETS)
+    ingredient_rows, tag_rows = {}, {}
+    for row, items in enumerate(engine.ingredient_lists):
+        for item in set(i.lower() for i in items):
+            ingredient_rows.setdefault(item, set()).add(row)
+    for row, tags in enumerate(engine.tag_lists):
+        for tag in set(t.lower() for t in tags) & facet_tags:
+            tag_rows.setdefault(tag, set()).add(row)
+
+    queries = []
+    for row in rng.permutation(len(engine.data)):
+        ingredients = sorted(set(i.lower() for i in engine.ingredient_lists.row(row)))
+        if not ingredients:
+            continue
+        ingredient = str(rng.choice(ingredients))
+        tags = sorted(set(t.lower() for t in engine.tag_lists.row(row)) & facet_tags)
+        if len(queries) % 2 and tags:
+            tag = str(rng.choice(tags))
+            queries.append((f"{tag} {ingredient}", ingredient_rows[ingredient] & tag_rows[tag]))
+        else:
+            queries.append((ingredient, ingredient_rows[ingredient]))
+        if len(queries) == n_queries:
+            break
+    return queries
+
+
+def evaluate(index, queries):
+    mrr, precision, recall, latency = [], [], [], []
+    for query, relevant in queries:
+        started = time.perf_counter()
+        rows = index.search(query, K).tolist()
+        latency.append((time.perf_counter() - started) * 1000)
+
+        hits = [row in relevant for row in rows]
+        first = next((i for i, hit in enumerate(hits) if hit), None)
+        mrr.append(0.0 if first is None else 1.0 / (first + 1))
+        precision.append(sum(hits[:10]) / 10)
+        recall.append(sum(hits) / min(len(relevant), K))
+    return np.mean(mrr), np.mean(precision), np.mean(recall), np.percentile(latency, 50), np.percentile(latency, 99)
+
+
+def main():
+    data_path = sys.argv[1] if len(sys.argv) > 1 else None
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    engine = RecommendationEngine(data_path=data_path)
+    query_sets = [
+        ("name-derived", build_queries(engine, n_queries, np.random.default_rng(0)),
+         "labels come from names, which BM25F weights x3: biased towards bm25"),
+        ("ingredient/tag-derived", build_label_queries(engine, n_queries, np.random.default_rng(0)),
+         "labels come from ingredient lists and diet/cuisine tags only"),
+    ]
+
+    for label, queries, note in query_sets:
+        print(f"\n{len(engine.data)} rows, {len(queries)} {label} queries, k={K} ({note})")
+        print(f"{'mode':>8} {'MRR':>6} {'P@10':>6} {f'R@{K}':>6} {'p50 ms':>8} {'p99 ms':>8} {'index MB':>9}")
+        for mode, index in engine.search_indexes.items():
+            mrr, precision, recall, p50, p99 = evaluate(index, queries)
+            print(f"{mode:>8} {mrr:>6.3f} {precision:>6.3f} {recall:>6.3f} {p50:>8.2f} {p99:>8.2f} {index.nbytes / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,334 @@
 import sys
 import os
+import json
+import base64
+import contextvars
+import threading
+import time
 # Add parent directory to path to find core modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.recommendation_engine import RecommendationEngine
+from core import engine_cache
+from core.result_cache import ResultCache
+from core.facets import DEFAULT_FACET_LIMIT
+from core.memory_report import memory_report
+
+# Facet values kept per group in the search cache; requests can ask for fewer.
+MAX_FACETS = 25
+
+# Written under the engine cache dir by request_reload; every worker's dataset
+# watch polls it, so an admin reload reaches all gunicorn workers.
+RELOAD_REQUEST_FILE = 'reload-request.json'
+
+# Engine generation pinned for the current request (see RecommendationService.pin_engine)
+_pinned_engine = contextvars.ContextVar('pinned_engine', default=None)
+
+
+def normalize_search(query, tag):
+    """
+    Canonical (query, tag) for cache keys: case and whitespace don't change
+    TF-IDF or tag matching, and "all" means no tag filter.
+    """
+    query = ' '.join(str(query or '').lower().split())
+    tag = str(tag or '').strip().lower()
+    return query, ('' if tag == 'all' else tag)
+
+
+def encode_cursor(dataset_version, offset):
+    """
+    Opaque page cursor: the ranked position to resume from, bound to the
+    dataset version the ranking was computed on.
+    """
+    raw = json.dumps({"v": dataset_version, "o": int(offset)}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, dataset_version):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if data.get("v") != dataset_version:
+        raise ValueError("Cursor is from another dataset version; restart from the first page")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
 
 class RecommendationService:
     _instance = None
+    # Held while the engine is built, so concurrent first requests wait for one build
+    _lock = threading.Lock()
+    _warmup_thread = None
+    _load_error = None
+    _watch_thread = None
 
     @staticmethod
     def get_instance():
         if RecommendationService._instance is None:
-            RecommendationService._instance = RecommendationService()
+            with RecommendationService._lock:
+                if RecommendationService._instance is None:
+                    RecommendationService._instance = RecommendationService()
         return RecommendationService._instance
 
-    def __init__(self):
+    @staticmethod
+    def warm_up():
+        """
+        Starts building the engine on a background thread (once per process)
+        so no request pays for CSV parsing and index fitting. Returns the thread.
+        """
+        with RecommendationService._lock:
+            if RecommendationService._warmup_thread is None:
+                RecommendationService._warmup_thread = threading.Thread(
+                    target=RecommendationService._warm, name='engine-warmup', daemon=True)
+                RecommendationService._warmup_thread.start()
+        return RecommendationService._warmup_thread
+
+    @staticmethod
+    def _warm():
+        try:
+            RecommendationService.get_instance()
+        except Exception as e:
+            RecommendationService._load_error = str(e)
+            print(f"Engine warmup failed: {e}")
+
+    @staticmethod
+    def wait_until_loaded(timeout=None):
+        """
+        Waits for a running warmup, then returns the instance (building it if none ran).
+        """
+        thread = RecommendationService._warmup_thread
+        if thread is not None:
+            thread.join(timeout)
+        return RecommendationService.get_instance()
+
+    @staticmethod
+    def readiness():
+        """
+        (ready, details) for the readiness probe; ready once an engine with
+        recipes is loaded. Never blocks on a build in progress.
+        """
+        service = RecommendationService._instance
+        if service is None:
+            if RecommendationService._load_error:
+                state = "failed"
+            elif RecommendationService._lock.locked() or RecommendationService._warmup_thread is not None:
+                state = "loading"
+            else:
+                state = "not started"
+            details = {"ready": False, "state": state}
+            if RecommendationService._load_error:
+                details["error"] = RecommendationService._load_error
+            return False, details
+
+        engine = service.engine
+        ready = engine.data is not None and not engine.data.empty
+        return ready, {
+            "ready": ready,
+            "state": "ready" if ready else "no data",
+            "recipes": 0 if engine.data is None else int(len(engine.data)),
+            "load_seconds": engine.load_seconds,
+            "loaded_from": engine.loaded_from,
+            "reload": service.reload_status["state"],
+            "indexes": {
+                "dataset_version": engine.dataset_version,
+                "generation": service.generation,
+                "snapshot_version": engine_cache.SNAPSHOT_VERSION,
+                "search_modes": engine.search_modes(),
+                "similar_table": engine.similar_rows is not None,
+            },
+        }
+
+    def __init__(self, engine=None):
         if RecommendationService._instance is not None:
             raise Exception("This class is a singleton!")
-        self.engine = RecommendationEngine()
+        self._engine = engine or RecommendationEngine()
+        print(memory_report("engine ready", self._engine))
+        # Bumped every time a reload swaps in a new engine
+        self.generation = 1
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        # Id of the last reload request marker this process acted on
+        self._reload_request = None
+        self.reload_status = {"state": "idle", "generation": 1, "dataset_version": self._engine.dataset_version}
+        # (ranked int32 row positions, total hits, facets), keyed by dataset version and normalized query/tag/ranges
+        self.search_cache = ResultCache(
+            max_entries=int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", 4096)),
+            max_bytes=int(os.environ.get("SEARCH_CACHE_MAX_BYTES", 8 << 20)),
+        )
+        self._cache_version = self._engine.dataset_version
+
+    @property
+    def engine(self):
+        """
+        The engine generation pinned for the current request, else the live one.
+        """
+        pinned = _pinned_engine.get()
+        return self._engine if pinned is None else pinned
+
+    def pin_engine(self):
+        """
+        Makes the rest of the current request (thread) use the live engine
+        generation even if a reload swaps in a new one meanwhile, so row
+        positions, cards and the reported dataset version all come from one
+        engine. Undone by unpin_engine.
+        """
+        _pinned_engine.set(self._engine)
+
+    @staticmethod
+    def unpin_engine():
+        _pinned_engine.set(None)
+
+    def reload(self, force=False):
+        """
+        Starts building a new engine generation from the dataset file on a
+        background thread; the current engine keeps serving until the new one
+        is fully built, then the reference is swapped. Does nothing while a
+        reload is running. Unless force, an unchanged file (same dataset
+        version) is not rebuilt. Returns reload_status.
+        """
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return dict(self.reload_status)
+            self.reload_status = {
+                "state": "running",
+                "generation": self.generation,
+                "dataset_version": self._engine.dataset_version,
+                "started_at": time.time(),
+            }
+            self._reload_thread = threading.Thread(target=self._reload, args=(force,), name='engine-reload', daemon=True)
+            self._reload_thread.start()
+            return dict(self.reload_status)
+
+    def request_reload(self, force=False):
+        """
+        Reloads this process and writes a reload request marker that the
+        dataset watch of every other worker picks up on its next check.
+        Returns reload_status plus this worker's pid and whether it watches.
+        """
+        path = os.path.join(self._engine.cache_dir, RELOAD_REQUEST_FILE)
+        request_id = f"{os.getpid()}-{time.time_ns()}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"id": request_id, "force": bool(force)}, f)
+        os.replace(tmp, path)
+        self._reload_request = request_id
+
+        status = self.reload(force=force)
+        thread = RecommendationService._watch_thread
+        status.update({"worker": os.getpid(), "all_workers": thread is not None and thread.is_alive()})
+        return status
+
+    def _pending_reload_request(self):
+        # The marker's {"id", "force"} when it's one this process hasn't acted on yet
+        try:
+            with open(os.path.join(self._engine.cache_dir, RELOAD_REQUEST_FILE)) as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(marker, dict) or marker.get("id") == self._reload_request:
+            return None
+        return marker
+
+    def wait_for_reload(self, timeout=None):
+        """
+        Waits for a running reload, then returns reload_status.
+        """
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+        return dict(self.reload_status)
+
+    def _reload(self, force):
+        current = self._engine
+        status = dict(self.reload_status)
+        started = time.perf_counter()
+        try:
+            if not force and os.path.exists(current.data_path) and \
+                    engine_cache.dataset_version(engine_cache.source_fingerprint(current.data_path)) == current.dataset_version:
+                status["state"] = "unchanged"
+            else:
+                engine = RecommendationEngine(data_path=current.data_path, cache_dir=current.cache_dir)
+                if engine.data is None or engine.data.empty:
+                    # The engine logs its own load errors and comes back empty
+                    raise RuntimeError("The new dataset has no recipes; keeping the current engine")
+                self._swap_engine(engine)
+                status.update({"state": "swapped", "previous_version": current.dataset_version})
+                print(memory_report(f"engine generation {self.generation}", engine))
+        except Exception as e:
+            status.update({"state": "failed", "error": str(e)})
+            print(f"Engine reload failed: {e}")
+        status.update({
+            "generation": self.generation,
+            "dataset_version": self._engine.dataset_version,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        self.reload_status = status
+
+    def _swap_engine(self, engine):
+        # One reference assignment: requests that pinned the old engine finish
+        # on it, everything after sees the new one. Search cache keys carry the
+        # dataset version, so old entries are never served for the new engine
+        # (and are cleared by the next search).
+        self._engine = engine
+        self.generation += 1
+
+    @staticmethod
+    def watch_dataset(interval):
+        """
+        Starts a daemon thread (once per process) that checks the dataset
+        file's size and mtime every `interval` seconds and reloads the engine
+        once they have changed and then held still for one more check, so a
+        file that is still being copied is not loaded. It also acts on reload
+        requests written by request_reload in any worker. Returns the thread.
+        """
+        with RecommendationService._lock:
+            thread = RecommendationService._watch_thread
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=RecommendationService._watch, args=(interval,),
+                                          name='dataset-watch', daemon=True)
+                RecommendationService._watch_thread = thread
+                thread.start()
+        return thread
+
+    @staticmethod
+    def _watch(interval):
+        def signature(path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            return stat.st_size, stat.st_mtime_ns
+
+        service = RecommendationService.wait_until_loaded()
+        path = service._engine.data_path
+        loaded = previous = signature(path)
+        # Requests from before this process started were covered by its initial load
+        marker = service._pending_reload_request()
+        if marker is not None:
+            service._reload_request = marker.get("id")
+        # Runs until another watch replaces this one
+        while RecommendationService._watch_thread is threading.current_thread():
+            time.sleep(interval)
+            marker = service._pending_reload_request()
+            if marker is not None:
+                print("Reload requested by another worker; reloading the engine.")
+                service._reload_request = marker.get("id")
+                service.reload(force=bool(marker.get("force")))
+                service.wait_for_reload()
+                loaded = previous = signature(path)
+                continue
+            current = signature(path)
+            if current is not None and current != loaded and current == previous:
+                print(f"Dataset {path} changed; reloading the engine.")
+                service.reload()
+                service.wait_for_reload()
+                loaded = current
+            previous = current
 
     def get_recommendations(self, user_data):
         """
@@ -26,11 +337,113 @@ class RecommendationService:
         # Here we could add additional validation or logging before calling the engine
         return self.engine.recommend(user_data)
 
-    def search_meals(self, query, tag=None):
+    def get_batch_recommendations(self, profiles):
+        """
+        Get week plans for many user profiles in one call (no LLM calls).
+        """
+        return self.engine.recommend_batch(profiles)
+
+    def search_page(self, query, tag=None, limit=None, offset=0, ranges=None, mode=None):
+        """
+        (rows, total, next_offset) for one page of the ranking. The ranking
+        (up to engine.SEARCH_DEPTH rows) is computed once per query/tag and
+        kept in the LRU result cache, so later pages are slices of it.
+        next_offset is None on the last page.
+        """
+        limit = limit or self.engine.SEARCH_LIMIT
+        ranking, total, _ = self._search_ranking(query, tag, ranges, mode)
+        rows = ranking[offset:offset + limit].tolist()
+        next_offset = offset + limit if offset + limit < len(ranking) else None
+        return rows, total, next_offset
+
+    def search_page_json(self, query, tag=None, limit=None, cursor=None, ranges=None, mode=None):
+        """
+        (JSON array of cards, total hits, next cursor or None). Raises
+        ValueError for a malformed cursor, one from another dataset version,
+        or an unknown search mode.
+        """
+        offset = decode_cursor(cursor, self.engine.dataset_version) if cursor else 0
+        rows, total, next_offset = self.search_page(query, tag, limit, offset, ranges, mode)
+        next_cursor = None if next_offset is None else encode_cursor(self.engine.dataset_version, next_offset)
+        return self.engine.meal_cards_json(rows), total, next_cursor
+
+    def _search_ranking(self, query, tag, ranges=None, mode=None):
+        if self._cache_version != self._engine.dataset_version:
+            # Dataset was reloaded; cached row positions point into the old frame
+            self.search_cache.clear()
+            self._cache_version = self._engine.dataset_version
+
+        engine = self.engine
+        query, tag = normalize_search(query, tag)
+        ranges = tuple(sorted((ranges or {}).items()))
+        mode = mode or 'sparse'
+        key = (engine.dataset_version, query, tag, ranges, mode)
+        return self.search_cache.get_or_compute(
+            key, lambda: engine.search_with_facets(query, tag, ranges=dict(ranges), facet_limit=MAX_FACETS, mode=mode))
+
+    def search_facets(self, query, tag=None, ranges=None, limit=DEFAULT_FACET_LIMIT, mode=None):
+        """
+        {"total", "facets"} for a search, from the same cached entry as its pages.
+        """
+        _, total, facets = self._search_ranking(query, tag, ranges, mode)
+        return {"total": total, "facets": {name: values[:limit] for name, values in facets.items()}}
+
+    def autocomplete(self, prefix, limit=10):
+        """
+        Typeahead suggestions (id, name, calories, image) for a name prefix.
+        """
+        cards = self.engine._format_results(self.engine.autocomplete_rows(prefix, limit))
+        return [{key: card[key] for key in ('id', 'name', 'calories', 'image')} for card in cards]
+
+    def search_cache_stats(self):
+        return self.search_cache.stats()
+
+    def search_index_stats(self):
+        """
+        In-memory size of each search mode's index, e.g. sparse postings vs latent vectors.
+        """
+        return {mode: {"bytes": int(index.nbytes)} for mode, index in self.engine.search_indexes.items()}
+
+    def get_meal_json(self, meal_id):
+        """
+        Pre-serialized card for one recipe id, or None if unknown.
+        """
+        row = self.engine.row_for_id(meal_id)
+        return None if row is None else self.engine.meal_card_json(row)
+
+    def get_similar_meals(self, meal_id, limit=None):
+        """
+        Cards of the most similar recipes (blended macros + text), each with a
+        "similarity" score, or None if the id is unknown.
+        """
+        row = self.engine.row_for_id(meal_id)
+        if row is None:
+            return None
+        rows, scores = self.engine.similar_meals(row, limit)
+        return [dict(card, similarity=round(score, 3)) for card, score in zip(self.engine._format_results(rows), scores)]
+
+    def swap_meal(self, plan, day, slot, user_data=None, limit=None):
+        """
+        Replacement candidates for one meal of a week plan (see
+        RecommendationEngine.swap_meal). plan may be the week itself, a
+        /recommend response (its "week_plan" and "target_calories") or a
+        user_meal_plans row (its "plan_data").
+        """
+        user_data = dict(user_data or {})
+        if isinstance(plan, dict) and isinstance(plan.get('plan_data'), dict):
+            plan = plan['plan_data']
+        if isinstance(plan, dict) and isinstance(plan.get('week_plan'), dict):
+            if plan.get('target_calories') and not user_data.get('target_calories'):
+                user_data['target_calories'] = plan['target_calories']
+            plan = plan['week_plan']
+        return self.engine.swap_meal(plan, day, slot, user_data, limit)
+
+    def lookup_meals_json(self, meal_ids):
         """
-        Search for meals by query string and optional tag.
+        {"meals": [...], "missing": [...]} for many recipe ids in one call.
         """
-        return self.engine.search_meals(query, tag)
+        rows, missing = self.engine.lookup_rows(meal_ids)
+        return b'{"meals":' + self.engine.meal_cards_json(rows) + b',"missing":' + json.dumps(missing).encode('utf-8') + b'}'
 
     def get_engine(self):
         return self.engine
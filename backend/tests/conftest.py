@@ -1,4 +1,9 @@
+import csv
+import os
 import pytest
+
+# Tests build their own small engines; don't load the real dataset in the background
+os.environ.setdefault("ENGINE_WARMUP", "0")
 from app import app as flask_app
 
 @pytest.fixture
@@ -11,3 +16,45 @@ def app():
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+# Small Food.com-style rows: name, id, minutes, tags, nutrition, steps, ingredients
+SAMPLE_RECIPES = [
+    ("spinach omelette", 101, 15, ['breakfast', 'vegetarian', 'low-carb', 'easy'], [320.0, 35.0, 5.0, 12.0, 40.0, 30.0, 2.0], ['whisk eggs', 'cook with spinach'], ['eggs', 'spinach', 'butter']),
+    ("peanut chicken stir fry", 102, 25, ['dinner', 'main-dish', 'asian'], [610.0, 40.0, 20.0, 30.0, 90.0, 25.0, 15.0], ['slice chicken', 'stir fry with sauce'], ['chicken breast', 'peanut butter', 'soy sauce', 'rice']),
+    ("vegan lentil curry", 103, 45, ['dinner', 'vegan', 'vegetarian', 'main-dish', 'healthy'], [450.0, 15.0, 10.0, 20.0, 35.0, 5.0, 25.0], ['simmer lentils', 'add curry paste'], ['lentils', 'coconut milk', 'curry paste', 'onion']),
+    ("nutmeg oatmeal", 104, 10, ['breakfast', 'vegetarian', 'easy'], [280.0, 8.0, 30.0, 2.0, 15.0, 4.0, 18.0], ['boil oats', 'sprinkle nutmeg'], ['oats', 'milk', 'nutmeg']),
+    ("beef lasagna", 105, 90, ['dinner', 'italian', 'main-dish'], [780.0, 55.0, 15.0, 40.0, 95.0, 60.0, 22.0], ['brown beef', 'layer pasta', 'bake'], ['ground beef', 'lasagna noodles', 'ricotta cheese', 'tomato sauce']),
+    ("grilled salmon salad", 106, 20, ['lunch', 'low-carb', 'healthy', 'gluten-free'], [420.0, 38.0, 6.0, 10.0, 70.0, 15.0, 4.0], ['grill salmon', 'toss salad'], ['salmon', 'lettuce', 'olive oil', 'lemon']),
+    ("walnut brownies", 107, 40, ['dessert', 'vegetarian'], [510.0, 45.0, 120.0, 8.0, 12.0, 50.0, 20.0], ['mix batter', 'bake'], ['flour', 'sugar', 'walnuts', 'cocoa', 'eggs']),
+    ("shrimp tacos", 108, 30, ['lunch', 'dinner', 'mexican'], [390.0, 20.0, 4.0, 25.0, 60.0, 10.0, 12.0], ['cook shrimp', 'assemble tacos'], ['shrimp', 'tortillas', 'cabbage', 'lime']),
+    ("tofu scramble", 109, 15, ['breakfast', 'vegan', 'vegetarian', 'dairy-free'], [260.0, 20.0, 3.0, 15.0, 45.0, 5.0, 3.0], ['crumble tofu', 'fry with turmeric'], ['tofu', 'turmeric', 'olive oil']),
+    ("chicken caesar wrap", 110, 15, ['lunch', 'easy'], [540.0, 35.0, 6.0, 30.0, 70.0, 25.0, 14.0], ['slice chicken', 'wrap'], ['chicken breast', 'tortillas', 'parmesan cheese', 'lettuce']),
+    ("paleo beef stew", 111, 120, ['dinner', 'paleo', 'gluten-free', 'main-dish'], [560.0, 30.0, 8.0, 20.0, 85.0, 35.0, 6.0], ['brown beef', 'simmer'], ['beef chuck', 'carrots', 'onion', 'beef broth']),
+    ("lemon water", 112, 2, ['beverages', 'vegan'], [10.0, 0.0, 2.0, 0.0, 0.0, 0.0, 1.0], ['squeeze lemon'], ['lemon', 'water']),
+]
+
+def write_recipes_csv(path, recipes=SAMPLE_RECIPES):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'id', 'minutes', 'contributor_id', 'submitted', 'tags', 'nutrition', 'n_steps', 'steps', 'description', 'ingredients', 'n_ingredients'])
+        for name, rid, minutes, tags, nutrition, steps, ingredients in recipes:
+            writer.writerow([name, rid, minutes, 1, '2005-01-01', str(tags), str(nutrition), len(steps), str(steps), '', str(ingredients), len(ingredients)])
+    return path
+
+@pytest.fixture
+def recipes_csv(tmp_path):
+    return str(write_recipes_csv(tmp_path / 'recipes.csv'))
+
+@pytest.fixture
+def engine(recipes_csv, tmp_path):
+    from core.recommendation_engine import RecommendationEngine
+    return RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'cache'))
+
+@pytest.fixture
+def service(engine, monkeypatch):
+    # Route tests run against the small fixture engine instead of the real dataset
+    from services.recommendation_service import RecommendationService
+    monkeypatch.setattr(RecommendationService, '_instance', None)
+    svc = RecommendationService(engine)
+    monkeypatch.setattr(RecommendationService, '_instance', svc)
+    return svc
@@ -0,0 +1,45 @@
+import numpy as np
+
+from core.autocomplete import AutocompleteIndex, popularity_scores
+
+NAMES = ["Chicken Curry", "chicken  curry", "curried chicken", "beef curry", "chocolate cake", "cheese " * 10 + "pie"]
+
+
+def test_word_start_prefixes():
+    index = AutocompleteIndex(NAMES, np.zeros(len(NAMES)))
+    rows = index.complete("cur").tolist()
+    # Duplicate names collapse to one row; name-start matches rank first
+    assert rows == [2, 0, 3]
+    assert index.complete("CH", 10).tolist() == [0, 4, 5, 2]
+    assert len(index.complete("x")) == 0 and len(index.complete("")) == 0
+    assert len(index.complete("ch", 1)) == 1
+
+
+def test_long_prefix_and_popularity():
+    index = AutocompleteIndex(NAMES, np.zeros(len(NAMES)))
+    assert index.complete("cheese " * 9 + "pi").tolist() == [5]
+    assert len(index.complete("cheese " * 9 + "cake")) == 0
+
+    popularity = np.zeros(len(NAMES))
+    popularity[3] = 0.9
+    index = AutocompleteIndex(NAMES, popularity)
+    assert index.complete("cur").tolist() == [2, 3, 0]
+
+
+def test_duplicate_popular_names_do_not_crowd_out_matches():
+    names = ["chicken curry"] * 10 + ["chicken soup"]
+    index = AutocompleteIndex(names, popularity_scores(names))
+    assert index.complete("chi", 2).tolist() == [0, 10]
+
+
+def test_popularity_scores_prefer_common_words():
+    scores = popularity_scores(["chicken curry", "chicken soup", "zzz", ""])
+    assert scores[0] > scores[2] and scores[1] > scores[2]
+    assert scores[3] == 0.0 and scores.max() < 1.0
+
+
+def test_autocomplete_route(client, service):
+    body = client.get("/meals/autocomplete?prefix=chick").get_json()
+    assert [s["name"].lower() for s in body["suggestions"]] == ["chicken caesar wrap", "peanut chicken stir fry"]
+    assert set(body["suggestions"][0]) == {"id", "name", "calories", "image"}
+    assert client.get("/meals/autocomplete?prefix=").get_json()["suggestions"] == []
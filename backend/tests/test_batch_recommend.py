@@ -0,0 +1,29 @@
+PROFILE = {
+    "age": 30, "weight": 75, "height": 175, "gender": "male", "goal": "weight-loss",
+    "activity_level": "moderately_active", "diet_type": "any", "allergies": []
+}
+
+
+def test_batch_matches_single_profile_results(engine):
+    profiles = [
+        PROFILE,
+        dict(PROFILE, gender="female", goal="muscle-gain", diet_type="vegetarian"),
+        dict(PROFILE, allergies=["Nuts"]),
+        {"age": "unknown"},
+    ]
+
+    batch = engine.recommend_batch(profiles)
+
+    assert batch["groups"] == 3
+    assert batch["results"][3] == {"error": "Invalid numeric values"}
+    for profile, result in zip(profiles[:3], batch["results"]):
+        single = engine._run_recommendation_logic(profile, model_type='planner')
+        assert result["target_calories"] == single["target_calories"]
+        assert result["meals"] == single["meals"]
+        assert result["week_plan"] == single["week_plan"]
+        assert result["model_used"] == "planner"
+
+
+def test_batch_route_validates_payload(client):
+    assert client.post("/recommend/batch", json={}).status_code == 400
+    assert client.post("/recommend/batch", json={"profiles": [PROFILE] * 501}).status_code == 400
@@ -0,0 +1,55 @@
+import numpy as np
+
+from core.bm25 import BM25Index, build_postings, FIELD_WEIGHTS, FIELD_B, K1
+
+
+def brute_force_bm25f(fields, query_terms):
+    n = len(next(iter(fields.values())))
+    tokens = {f: [doc.lower().split() for doc in docs] for f, docs in fields.items()}
+    avg = {f: np.mean([len(t) for t in toks]) for f, toks in tokens.items()}
+    scores = np.zeros(n)
+    for term in query_terms:
+        df = sum(any(term in tokens[f][r] for f in fields) for r in range(n))
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        for r in range(n):
+            tf = sum(FIELD_WEIGHTS[f] * tokens[f][r].count(term) / (1 - FIELD_B[f] + FIELD_B[f] * len(tokens[f][r]) / avg[f])
+                     for f in fields)
+            scores[r] += idf * tf * (K1 + 1) / (tf + K1) if tf else 0.0
+    return scores
+
+
+FIELDS = {
+    'name': ["chicken curry", "beef stew", "curry soup", "lentil salad"],
+    'ingredients': ["chicken curry paste rice", "beef potato carrot onion", "lentil coconut curry", "lentil tomato"],
+    'tags': ["dinner indian", "dinner", "soup vegan", "lunch vegan"],
+}
+
+
+def test_impacts_match_bm25f_formula():
+    index = BM25Index(*build_postings(FIELDS))
+    for query in (["curry"], ["lentil"], ["curry", "lentil"], ["vegan", "soup"]):
+        rows, scores = index.score(" ".join(query))
+        order = np.argsort(rows)
+        rows, scores = rows[order], scores[order]
+        expected = brute_force_bm25f(FIELDS, query)
+        assert rows.tolist() == np.flatnonzero(expected).tolist()
+        assert np.allclose(scores, expected[rows], rtol=1e-3)
+
+
+def test_name_field_outweighs_ingredients():
+    index = BM25Index(*build_postings(FIELDS))
+    # "lentil" is in the name and ingredients of row 3, only the ingredients of row 2
+    assert index.search("lentil", 3).tolist() == [3, 2]
+    assert index.search("chicken", 5, mask=np.array([False, True, True, True])).tolist() == []
+    assert len(index.search("the", 5)) == 0
+
+
+def test_bm25_mode(engine, recipes_csv, tmp_path):
+    assert engine.bm25_postings.dtype == np.uint16
+    assert engine.bm25_postings.indices.dtype == np.int32
+    rows, total = engine.search_ranking("lentil", mode="bm25")
+    assert engine.data["name"].iloc[rows[0]].lower() == "vegan lentil curry"
+
+    from core.recommendation_engine import RecommendationEngine
+    restored = RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'cache'))
+    assert restored.search_ranking("beef", mode="bm25")[0].tolist() == engine.search_ranking("beef", mode="bm25")[0].tolist()
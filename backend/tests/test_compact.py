@@ -0,0 +1,84 @@
+import numpy as np
+
+from core.compact import (InternedLists, InternedListsBuilder, BlobBuilder, GrowableArray, TextColumn, column_bytes,
+                          smallest_int_dtype)
+
+
+def test_interned_lists_round_trip():
+    lists = [['dinner', 'easy'], [], ['easy'], ['vegan', 'dinner', 'easy']]
+    interned = InternedLists.from_lists(lists)
+    assert list(interned) == lists
+    assert interned.ids.dtype == np.int32 and len(interned.vocabulary) == 3
+    assert interned.take([3, 1]) == [lists[3], []]
+    assert interned.joined() == ['dinner easy', '', 'easy', 'vegan dinner easy']
+
+
+def test_builders_append_across_batches():
+    lists = [['dinner', 'easy'], [], ['easy'], ['vegan', 'dinner', 'easy']]
+    builder = InternedListsBuilder()
+    builder.extend(lists[:1])
+    builder.extend(lists[1:])
+    batched, whole = builder.finish(), InternedLists.from_lists(lists)
+    assert batched.vocabulary == whole.vocabulary
+    assert np.array_equal(batched.ids, whole.ids) and np.array_equal(batched.offsets, whole.offsets)
+
+    column = GrowableArray(np.float32, capacity=2)
+    for start in range(0, 10, 3):
+        column.extend(np.arange(start, min(start + 3, 10)))
+    assert column.finish().tolist() == list(range(10))
+
+    blob = BlobBuilder()
+    blob.extend([b'ab', b''])
+    blob.extend([b'cde'])
+    assert list(TextColumn(*blob.finish())) == ['ab', '', 'cde']
+
+
+def test_text_column_contains_matches_per_row_scan():
+    strings = ['chicken curry', 'curry', '', 'lentil soup', 'soupcurry', 'cur', 'ry']
+    column = TextColumn.from_strings(strings)
+    assert list(column) == strings
+    for needle in ['curry', 'soup', 'cur', 'ry', 'rycur', 'x', 'c']:
+        # Matches never span two rows ("cur" + "ry")
+        assert column.contains(needle).tolist() == [needle in s for s in strings], needle
+
+
+def test_smallest_int_dtype():
+    assert smallest_int_dtype([0, 120, 32767]) == np.int16
+    assert smallest_int_dtype([0, 40000]) == np.int32
+    assert smallest_int_dtype([0, 2 ** 40]) == np.int64
+
+
+def test_engine_uses_compact_layout(engine):
+    assert engine.data.dtypes['calories'] == np.float32
+    assert engine.data.dtypes['minutes'] == np.int16
+    assert list(engine.data.columns) == engine.NUMERIC_COLUMNS + ['name']
+    assert engine.tag_lists.row(0) == ['breakfast', 'vegetarian', 'low-carb', 'easy']
+    assert engine.search_text.contains('coconut').sum() == 1
+
+    usage = column_bytes(engine.data, {'tags': engine.tag_lists})
+    assert usage['calories'] == 4 * len(engine.data) and usage['tags'] == engine.tag_lists.nbytes
+
+
+def test_json_rows_decode_on_access(engine):
+    from core.compact import JsonRows
+
+    cards = engine.meal_cards
+    assert isinstance(cards, JsonRows) and len(cards) == len(engine.data)
+    assert cards[-1] == cards[len(cards) - 1]
+    # Each access is a fresh copy, so callers may annotate cards freely
+    cards[0]["similarity"] = 1.0
+    assert "similarity" not in cards[0]
+
+
+def test_chunked_ingestion_matches_single_chunk(engine, recipes_csv, tmp_path, monkeypatch):
+    from core.recommendation_engine import RecommendationEngine
+
+    # 12 fixture rows in chunks of 5; the filtered 10-calorie row is in the last one
+    monkeypatch.setenv("ENGINE_CSV_CHUNK_ROWS", "5")
+    chunked = RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'chunked'))
+
+    assert chunked.loaded_from == 'csv'
+    assert chunked.data.equals(engine.data)
+    assert list(chunked.tag_lists) == list(engine.tag_lists)
+    assert list(chunked.search_text) == list(engine.search_text)
+    assert list(chunked.meal_cards) == list(engine.meal_cards)
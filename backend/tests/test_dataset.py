@@ -22,14 +22,14 @@ def test_engine():
     
     # Check a sample row
     print("\n--- 2. Checking Sample Data ---")
-    sample = engine.data.iloc[0]
+    sample = engine.meal_cards[0]
     print(f"Name: {sample['name']}")
-    print(f"Steps (Type: {type(sample['steps_list'])}): {sample['steps_list'][:2]}...")
-    print(f"Ingredients (Type: {type(sample['ingredients_list'])}): {sample['ingredients_list'][:3]}...")
+    print(f"Steps (Type: {type(sample['steps'])}): {sample['steps'][:2]}...")
+    print(f"Ingredients (Type: {type(sample['ingredients'])}): {sample['ingredients'][:3]}...")
     print(f"Calories: {sample['calories']}")
     print(f"Protein (g): {sample['protein']:.1f}")
     
-    if not isinstance(sample['steps_list'], list) or not isinstance(sample['ingredients_list'], list):
+    if not isinstance(sample['steps'], list) or not isinstance(sample['ingredients'], list):
         print("FAILED: Steps or Ingredients not parsed as lists.")
         return
 
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+
+from core import engine_cache
+from core.recommendation_engine import RecommendationEngine
+
+
+def test_snapshot_written_and_restored(engine, recipes_csv, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    snapshot_dir = engine_cache.snapshot_path(cache_dir, engine_cache.source_fingerprint(recipes_csv))
+    assert os.path.exists(os.path.join(snapshot_dir, 'meta.json'))
+
+    restored = RecommendationEngine(data_path=recipes_csv, cache_dir=cache_dir)
+
+    assert restored.data.equals(engine.data)
+    assert np.allclose(restored.features, engine.features)
+    assert (restored.tfidf_matrix != engine.tfidf_matrix).nnz == 0
+    assert restored.search_meals('curry') == engine.search_meals('curry')
+
+
+def test_changed_source_is_reparsed(engine, recipes_csv, tmp_path):
+    with open(recipes_csv, 'a') as f:
+        f.write('extra pasta,999,30,1,2005-01-01,"[\'dinner\']","[700.0, 30.0, 5.0, 5.0, 40.0, 10.0, 30.0]",1,"[\'boil\']",,"[\'pasta\']",1\n')
+
+    reloaded = RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'cache'))
+
+    assert len(reloaded.data) == len(engine.data) + 1
+    assert reloaded.dataset_version != engine.dataset_version
+
+
+def test_snapshot_arrays_are_memory_mapped(engine, recipes_csv, tmp_path, monkeypatch):
+    from core.memory_report import array_memory, is_mapped
+
+    cache_dir = str(tmp_path / 'cache')
+    restored = RecommendationEngine(data_path=recipes_csv, cache_dir=cache_dir)
+    assert is_mapped(restored.features) and is_mapped(restored.search_index.words.term_rows.data)
+    assert array_memory(restored.numeric_arrays())["private"] == 0
+    assert restored.search_meals('curry') == engine.search_meals('curry')
+    assert restored.swap_meal({"Monday": {"lunch": restored.meal_cards[0]}}, "Monday", "lunch")["candidates"]
+
+    monkeypatch.setenv("ENGINE_MMAP", "0")
+    in_heap = RecommendationEngine(data_path=recipes_csv, cache_dir=cache_dir)
+    assert not is_mapped(in_heap.features)
+    assert in_heap.search_meals('curry') == engine.search_meals('curry')
+
+
+def test_concurrent_builds_parse_once(recipes_csv, tmp_path):
+    import threading
+
+    cache_dir = str(tmp_path / 'shared')
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(RecommendationEngine(data_path=recipes_csv, cache_dir=cache_dir)))
+               for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    # The first build holds the lock; the others wait and restore its snapshot
+    assert sorted(e.loaded_from for e in engines) == ['csv', 'snapshot', 'snapshot']
@@ -0,0 +1,41 @@
+import numpy as np
+
+from core.facets import facet_counts
+from core.tag_index import TagIndex
+
+
+def test_counts_within_matches_brute_force():
+    rng = np.random.default_rng(5)
+    vocabulary = [f"tag{i}" for i in range(30)]
+    tags_lists = [list(rng.choice(vocabulary, rng.integers(0, 6), replace=False)) for _ in range(400)]
+    index = TagIndex(tags_lists)
+
+    # Small subsets take the gather path, large ones the bitmap path
+    for size in (3, 50, 400):
+        rows = rng.choice(400, size, replace=False)
+        counts = index.counts_within(rows)
+        for tag, tag_id in index.vocabulary.items():
+            assert counts[tag_id] == sum(tag in tags_lists[r] for r in rows)
+    assert (index.counts_within(None) == index.counts).all()
+
+
+def test_facet_groups():
+    index = TagIndex([['vegan', 'italian', 'easy', 'course'], ['vegan', 'mexican', 'easy'], ['dinner', 'italian']])
+    facets = facet_counts(index, np.array([0, 1]), limit=5)
+    assert facets["diet"] == [{"value": "vegan", "count": 2}]
+    assert sorted(f["value"] for f in facets["cuisine"]) == ["italian", "mexican"]
+    # Structural tags like "course" are not facets
+    assert facets["tags"] == [{"value": "easy", "count": 2}]
+
+
+def test_facets_route_and_admin_top_tags(client, service):
+    body = client.get("/meals/facets?query=chicken").get_json()
+    assert body["total"] == 2
+    assert {"value": "lunch", "count": 1} in body["facets"]["tags"]
+
+    body = client.get("/meals/facets?tag=vegetarian&limit=1").get_json()
+    assert body["total"] == 5
+    assert body["facets"]["diet"] == [{"value": "vegetarian", "count": 5}]
+
+    stats = client.get("/admin/stats").get_json()
+    assert stats["top_tags"]["vegetarian"] == 5
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from services import recommendation_service
+from services.recommendation_service import RecommendationService
+
+
+def test_healthz(client):
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ok"}
+
+
+def test_readyz_reports_loaded_engine(client, service):
+    response = client.get("/readyz")
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["ready"] and body["recipes"] == 11
+    assert body["indexes"]["dataset_version"] == service.engine.dataset_version
+    assert "sparse" in body["indexes"]["search_modes"]
+    assert body["load_seconds"] is not None and body["loaded_from"] == "csv"
+
+
+def test_readyz_before_warmup(client, monkeypatch):
+    monkeypatch.setattr(RecommendationService, '_instance', None)
+    monkeypatch.setattr(RecommendationService, '_warmup_thread', None)
+    monkeypatch.setattr(RecommendationService, '_load_error', None)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json() == {"ready": False, "state": "not started"}
+
+
+def test_warmup_builds_engine_once(engine, monkeypatch):
+    builds = []
+    release = threading.Event()
+
+    def slow_engine():
+        builds.append(1)
+        release.wait(5)
+        return engine
+
+    monkeypatch.setattr(RecommendationService, '_instance', None)
+    monkeypatch.setattr(RecommendationService, '_warmup_thread', None)
+    monkeypatch.setattr(RecommendationService, '_load_error', None)
+    monkeypatch.setattr(recommendation_service, 'RecommendationEngine', slow_engine)
+
+    RecommendationService.warm_up()
+    while not builds:
+        time.sleep(0.01)
+    assert RecommendationService.readiness()[1]["state"] == "loading"
+
+    # Requests arriving mid-build wait for the warmup instead of building again
+    seen = []
+    requests = [threading.Thread(target=lambda: seen.append(RecommendationService.get_instance())) for _ in range(4)]
+    for t in requests:
+        t.start()
+    release.set()
+    for t in requests:
+        t.join(5)
+
+    assert RecommendationService.wait_until_loaded(5) is seen[0]
+    assert len(builds) == 1 and len(set(map(id, seen))) == 1
+    assert RecommendationService.readiness()[0]
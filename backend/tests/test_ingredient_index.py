@@ -0,0 +1,26 @@
+import numpy as np
+
+from core.ingredient_index import IngredientIndex, ALLERGEN_SYNONYMS
+
+
+def test_whole_token_matching_and_synonyms():
+    lists = [['Walnuts', 'coconut milk'], ['nutmeg'], ['mixed nuts'], ['pine nuts', 'eggs']]
+
+    def excluded(allergies, synonyms=ALLERGEN_SYNONYMS):
+        index = IngredientIndex(lists, synonyms=synonyms)
+        return np.flatnonzero(~index.exclude(np.ones(len(lists), dtype=bool), allergies)).tolist()
+
+    assert excluded(['nut'], synonyms=None) == [2, 3]
+    assert excluded(['Nuts']) == [0, 2, 3]
+    assert excluded([' tree nuts']) == [0, 3]
+    # Multi-word allergens need every token in one ingredient list
+    assert excluded(['coconut milk']) == [0]
+    assert excluded(['', 'kiwi']) == []
+
+
+def test_engine_allergy_exclusion(engine):
+    mask = engine.ingredient_index.exclude(np.ones(len(engine.data), dtype=bool), ['nuts'])
+    kept = set(engine.data.loc[mask, 'id'])
+
+    assert 102 not in kept and 107 not in kept  # peanut butter, walnuts
+    assert 104 in kept and 103 in kept  # nutmeg, coconut milk
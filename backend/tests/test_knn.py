@@ -0,0 +1,28 @@
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+from core import knn
+
+
+def test_masked_top_k_matches_refit_nearest_neighbors():
+    rng = np.random.default_rng(1)
+    features = rng.standard_normal((500, 4))
+    query = rng.standard_normal(4)
+    sq_norms = knn.squared_norms(features)
+
+    for selectivity in (0.02, 0.5, 1.0):
+        mask = rng.random(len(features)) < selectivity
+        rows = np.flatnonzero(mask)
+        model = NearestNeighbors(n_neighbors=min(20, len(rows)), algorithm='brute').fit(features[rows])
+        expected_dist, expected_idx = model.kneighbors(query.reshape(1, -1))
+
+        top, distances = knn.masked_top_k(features, sq_norms, query, mask, 20)
+
+        assert top.tolist() == rows[expected_idx[0]].tolist()
+        assert np.allclose(distances, expected_dist[0])
+
+
+def test_masked_top_k_empty_mask():
+    features = np.ones((3, 4))
+    top, distances = knn.masked_top_k(features, knn.squared_norms(features), np.zeros(4), np.zeros(3, dtype=bool), 5)
+    assert len(top) == 0 and len(distances) == 0
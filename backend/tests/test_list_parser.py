@@ -0,0 +1,28 @@
+import numpy as np
+
+from core import list_parser
+
+
+def test_float_lists_bulk_and_fallback():
+    parsed = list_parser.parse_float_lists(["[1, 2.5]", "[broken", "[]", "[3e2, -1]", None])
+
+    assert parsed.rows() == [[1.0, 2.5], [], [], [300.0, -1.0], []]
+    assert parsed.offsets.tolist() == [0, 2, 2, 2, 4, 4]
+    assert np.array_equal(parsed.column(1), [2.5, 0.0, 0.0, -1.0, 0.0])
+    assert parsed.fallback_rows == 2
+
+
+def test_string_lists_match_literal_eval():
+    cells = ["['eggs', 'spinach']", "['mom\\'s pie', \"say 'hi'\"]", "[]", float('nan')]
+    parsed = list_parser.parse_string_lists(cells)
+
+    assert parsed.rows() == [['eggs', 'spinach'], ["mom's pie", "say 'hi'"], [], []]
+    assert parsed.values == ['eggs', 'spinach', "mom's pie", "say 'hi'"]
+    assert parsed.fallback_rows == 2
+
+
+def test_string_lists_keep_control_characters():
+    parsed = list_parser.parse_string_lists(["['whisk\tfold', 'line\nbreak']", "['c']"])
+
+    assert parsed.rows() == [['whisk\tfold', 'line\nbreak'], ['c']]
+    assert parsed.fallback_rows == 0
@@ -0,0 +1,16 @@
+import json
+
+
+def test_cards_and_json_fragments_match(engine):
+    assert len(engine.meal_cards) == len(engine.data)
+
+    card = engine.meal_cards[0]
+    row = engine.data.iloc[0]
+    assert card["id"] == str(row["id"])
+    assert card["calories"] == int(row["calories"])
+    assert card["time"] == f"{row['minutes']} min"
+    assert card["tags"] == engine.tag_lists.row(0)[:4]
+
+    rows = engine.search_rows('curry')
+    assert json.loads(engine.meal_cards_json(rows)) == engine.search_meals('curry')
+    assert engine.meal_cards_json([]) == b'[]'
@@ -0,0 +1,26 @@
+def test_row_for_id(engine):
+    row = engine.row_for_id("105")
+    assert engine.data.iloc[row]["id"] == 105
+    assert engine.row_for_id("105.0") == row
+    assert engine.row_for_id("abc") is None
+    assert engine.row_for_id("inf") is None and engine.row_for_id("1e400") is None
+    assert engine.row_for_id(999999) is None
+
+
+def test_meal_routes(client, service):
+    response = client.get("/meals/103")
+    assert response.status_code == 200
+    assert response.get_json()["name"] == "Vegan Lentil Curry"
+
+    assert client.get("/meals/999999").status_code == 404
+
+    response = client.post("/meals/lookup", json={"ids": [106, "101", 42]})
+    body = response.get_json()
+    assert [m["id"] for m in body["meals"]] == ["106", "101"]
+    assert body["missing"] == [42]
+
+    response = client.post("/meals/lookup", json={"ids": ["101", "inf"]})
+    assert response.status_code == 200
+    assert response.get_json()["missing"] == ["inf"]
+
+    assert client.post("/meals/lookup", json={}).status_code == 400
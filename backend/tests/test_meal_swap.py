@@ -0,0 +1,79 @@
+import pytest
+
+
+def _plan(engine, days):
+    return {day: {slot: engine.meal_cards[engine.row_for_id(mid)] for slot, mid in meals.items()}
+            for day, meals in days.items()}
+
+
+def test_swap_keeps_day_totals_near_current(engine):
+    plan = _plan(engine, {"Monday": {"breakfast": 101, "lunch": 106, "dinner": 105}})
+    result = engine.swap_meal(plan, "monday", "Dinner")
+
+    assert result["day"] == "Monday" and result["slot"] == "dinner"
+    assert result["current"]["id"] == "105"
+    day = [plan["Monday"][slot] for slot in ("breakfast", "lunch", "dinner")]
+    expected = {col: sum(m[col] for m in day) for col in ("calories", "protein", "carbs", "fats")}
+    # Totals use the dataset's unrounded values, cards show whole numbers
+    assert result["target"] == result["day_totals"]
+    assert all(abs(result["day_totals"][col] - expected[col]) <= 3 for col in expected)
+
+    ids = [m["id"] for m in result["candidates"]]
+    # Meals already in the day are never offered; dinners come first
+    assert not {"101", "105", "106"} & set(ids)
+    assert ids[0] == "102"
+    deviations = [m["deviation"] for m in result["candidates"]]
+    assert deviations == sorted(deviations)
+    assert abs(result["candidates"][0]["day_totals"]["calories"] - (320 + 420 + 610)) <= 1
+
+
+def test_swap_applies_diet_filter_and_profile_target(engine):
+    plan = _plan(engine, {"Monday": {"breakfast": 104, "lunch": 110, "dinner": 102}})
+    profile = {"age": 30, "weight": 70, "height": 175, "gender": "female", "diet_type": "vegan"}
+    result = engine.swap_meal(plan, "Monday", "dinner", profile)
+
+    target = engine._daily_target(engine.calculate_targets([engine._parse_profile(profile)]), 0)
+    assert result["target"]["calories"] == round(target[0])
+    assert {m["id"] for m in result["candidates"]} <= {"103", "109"}
+
+
+def test_swap_rejects_bad_requests(engine):
+    plan = _plan(engine, {"Monday": {"breakfast": 101, "lunch": 106, "dinner": 105}})
+    with pytest.raises(ValueError):
+        engine.swap_meal(plan, "Funday", "dinner")
+    with pytest.raises(ValueError):
+        engine.swap_meal(plan, "Monday", "snack")
+    with pytest.raises(ValueError):
+        engine.swap_meal({"Monday": {"breakfast": None, "lunch": None, "dinner": None}}, "Monday", "lunch")
+
+
+def test_swap_route(client, service):
+    plan = _plan(service.engine, {"Monday": {"breakfast": 101, "lunch": 106, "dinner": 105}})
+    body = client.post("/plans/swap", json={
+        "plan": {"week_plan": plan, "target_calories": 1800}, "day": "Monday", "slot": "lunch", "limit": 2,
+    }).get_json()
+    assert body["target"]["calories"] == 1800
+    assert len(body["candidates"]) == 2
+
+    # Ids that don't fit an int are treated as unknown meals, not a server error
+    plan["Monday"]["breakfast"] = dict(plan["Monday"]["breakfast"], id="1e400")
+    response = client.post("/plans/swap", json={"plan": plan, "day": "Monday", "slot": "lunch"})
+    assert response.status_code == 200
+
+    assert client.post("/plans/swap", json={"day": "Monday", "slot": "lunch"}).status_code == 400
+    assert client.post("/plans/swap", json={"plan": plan, "day": "Monday", "slot": "brunch"}).status_code == 400
+    assert client.post("/plans/saved/swap", json={"day": "Monday", "slot": "lunch"}).status_code == 401
+
+
+def test_swap_without_dataset(client, tmp_path, monkeypatch):
+    from core.recommendation_engine import RecommendationEngine
+    from services.recommendation_service import RecommendationService
+
+    engine = RecommendationEngine(data_path=str(tmp_path / 'missing.csv'), cache_dir=str(tmp_path / 'cache'))
+    assert engine.swap_meal({"Monday": {"lunch": None}}, "Monday", "lunch") == {"error": "Data not loaded"}
+
+    monkeypatch.setattr(RecommendationService, '_instance', None)
+    monkeypatch.setattr(RecommendationService, '_instance', RecommendationService(engine))
+    response = client.post("/plans/swap", json={"plan": {"Monday": {"lunch": None}}, "day": "Monday", "slot": "lunch"})
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Data not loaded"}
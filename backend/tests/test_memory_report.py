@@ -0,0 +1,23 @@
+from core.memory_report import parse_smaps_rollup, memory_report
+
+SMAPS = """55d0c0a00000-7ffc8e5f2000 ---p 00000000 00:00 0                          [rollup]
+Rss:              204800 kB
+Pss:              120000 kB
+Shared_Clean:     100000 kB
+Shared_Dirty:      50000 kB
+Private_Clean:     10000 kB
+Private_Dirty:     44800 kB
+Swap:                  0 kB
+"""
+
+
+def test_parse_smaps_rollup():
+    memory = parse_smaps_rollup(SMAPS)
+    assert memory == {"rss": 204800 * 1024, "pss": 120000 * 1024, "shared": 150000 * 1024,
+                      "private": 54800 * 1024, "swap": 0}
+
+
+def test_memory_report_line(engine):
+    line = memory_report("test", engine)
+    assert line.startswith("[test] pid ")
+    assert "engine arrays" in line
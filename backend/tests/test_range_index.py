@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from core.range_index import RangeIndex, parse_range_args
+
+
+def test_rows_match_brute_force():
+    rng = np.random.default_rng(3)
+    columns = {"calories": rng.integers(100, 900, 500), "minutes": rng.integers(1, 120, 500)}
+    index = RangeIndex(columns)
+
+    for ranges in ({"calories": (400, 600)}, {"minutes": (None, 30)},
+                   {"calories": (400, 600), "minutes": (None, 30)}, {"calories": (950, None)}):
+        expected = np.ones(500, dtype=bool)
+        for col, (lo, hi) in ranges.items():
+            if lo is not None: expected &= columns[col] >= lo
+            if hi is not None: expected &= columns[col] <= hi
+        assert index.rows(ranges).tolist() == np.flatnonzero(expected).tolist()
+        assert (index.mask(ranges) == expected).all()
+
+
+def test_parse_range_args():
+    assert parse_range_args({"max_minutes": "30", "min_calories": "400", "max_calories": "600"}) == {
+        "calories": (400.0, 600.0), "minutes": (None, 30.0)}
+    assert parse_range_args({"min_protein": ""}) == {}
+    with pytest.raises(ValueError):
+        parse_range_args({"min_fats": "lots"})
+    with pytest.raises(ValueError):
+        parse_range_args({"min_carbs": "50", "max_carbs": "10"})
+
+
+def test_meals_range_filters(client, service):
+    response = client.get("/meals?max_minutes=30&min_calories=300&max_calories=600")
+    assert response.headers["X-Total-Count"] == "4"
+    assert sorted(m["id"] for m in response.get_json()) == ["101", "106", "108", "110"]
+
+    response = client.get("/meals?query=chicken&max_calories=600")
+    assert [m["id"] for m in response.get_json()] == ["110"]
+    assert client.get("/meals?min_calories=abc").status_code == 400
+
+    body = client.get("/admin/meals?max_minutes=30&min_calories=300&max_calories=600&search=salmon").get_json()
+    assert body["total"] == 1 and body["meals"][0]["id"] == "106"
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from core import auth
+from core.extensions import limiter
+from core.recommendation_engine import RecommendationEngine
+from services import recommendation_service
+
+ADMIN = {"Authorization": "Bearer admin-token"}
+
+
+class FakeAuthResponse:
+    status_code = 200
+
+    def __init__(self, email):
+        self.email = email
+
+    def json(self):
+        return {"id": self.email, "email": self.email}
+
+
+@pytest.fixture
+def admin_auth(monkeypatch):
+    # Tokens resolve to "<token>@example.com"; only admin-token's email is an admin
+    monkeypatch.setattr(auth, 'SUPABASE_URL', 'https://supabase.test')
+    monkeypatch.setattr(auth, 'SUPABASE_KEY', 'key')
+    monkeypatch.setattr(auth, 'ADMIN_EMAILS', {'admin-token@example.com'})
+    monkeypatch.setattr(auth.requests, 'get', lambda url, headers: FakeAuthResponse(
+        headers["Authorization"].split(' ')[1] + '@example.com'))
+    limiter.reset()
+
+
+def add_recipe(recipes_csv):
+    with open(recipes_csv, 'a') as f:
+        f.write('smoked paprika chili,113,60,1,2005-01-01,"[\'dinner\']","[650.0, 30.0, 10.0, 20.0, 80.0, 20.0, 20.0]",'
+                '1,"[\'simmer\']",,"[\'ground beef\', \'beans\']",2\n')
+
+
+def test_reload_swaps_in_new_dataset(client, service, recipes_csv, admin_auth):
+    old = service.engine
+    assert client.get("/meals/113").status_code == 404
+
+    add_recipe(recipes_csv)
+    response = client.post("/admin/reload", headers=ADMIN)
+    body = response.get_json()
+    assert response.status_code == 202 and body["state"] == "running"
+    assert body["worker"] == os.getpid() and body["all_workers"] is False
+    status = service.wait_for_reload(30)
+
+    assert status["state"] == "swapped" and status["generation"] == 2
+    assert status["previous_version"] == old.dataset_version
+    assert service.engine is not old and status["dataset_version"] == service.engine.dataset_version
+    response = client.get("/meals/113")
+    assert response.get_json()["name"] == "Smoked Paprika Chili"
+    assert response.headers["X-Dataset-Version"] == service.engine.dataset_version
+    assert client.get("/admin/reload").get_json()["state"] == "swapped"
+
+
+def test_reload_route_requires_admin(client, service, admin_auth):
+    assert client.post("/admin/reload").status_code == 401
+    assert client.post("/admin/reload", headers={"Authorization": "Bearer user"}).status_code == 403
+    assert service.reload_status["state"] == "idle"
+
+
+def test_reload_skips_unchanged_dataset(service):
+    old = service.engine
+    service.reload()
+    assert service.wait_for_reload(30)["state"] == "unchanged"
+    assert service.engine is old and service.generation == 1
+
+
+def test_failed_reload_keeps_serving_old_engine(client, service, recipes_csv):
+    old = service.engine
+    os.remove(recipes_csv)
+    service.reload()
+    status = service.wait_for_reload(30)
+
+    assert status["state"] == "failed" and "no recipes" in status["error"]
+    assert service.engine is old
+    assert client.get("/meals?query=curry").get_json()[0]["id"] == "103"
+
+
+def test_requests_stay_on_their_generation_during_reload(client, service, recipes_csv, monkeypatch):
+    old = service.engine
+    release = threading.Event()
+
+    def slow_engine(**kwargs):
+        release.wait(5)
+        return RecommendationEngine(**kwargs)
+
+    monkeypatch.setattr(recommendation_service, 'RecommendationEngine', slow_engine)
+    add_recipe(recipes_csv)
+    service.reload()
+    assert service.reload()["state"] == "running"
+
+    # The old engine answers while the new one is built
+    response = client.get("/meals?query=curry")
+    assert response.status_code == 200
+    assert response.headers["X-Dataset-Version"] == old.dataset_version
+
+    # A request that started before the swap finishes on the engine it started with
+    service.pin_engine()
+    try:
+        release.set()
+        service.wait_for_reload(30)
+        assert service.engine is old
+    finally:
+        service.unpin_engine()
+    assert service.engine is not old and service.generation == 2
+
+
+def test_dataset_watch_reloads_changed_file(service, recipes_csv, monkeypatch):
+    monkeypatch.setattr(recommendation_service.RecommendationService, '_watch_thread', None)
+    old = service.engine
+    recommendation_service.RecommendationService.watch_dataset(0.05)
+    time.sleep(0.1)
+    add_recipe(recipes_csv)
+
+    deadline = time.time() + 30
+    while service.generation == 1 and time.time() < deadline:
+        time.sleep(0.05)
+    assert service.engine is not old and service.engine.row_for_id(113) is not None
+
+
+def test_dataset_watch_acts_on_other_workers_reload_requests(service, monkeypatch):
+    monkeypatch.setattr(recommendation_service.RecommendationService, '_watch_thread', None)
+    old = service.engine
+    recommendation_service.RecommendationService.watch_dataset(0.05)
+    time.sleep(0.1)
+    # What request_reload in another worker leaves behind
+    with open(os.path.join(old.cache_dir, recommendation_service.RELOAD_REQUEST_FILE), 'w') as f:
+        json.dump({"id": "other-worker", "force": True}, f)
+
+    deadline = time.time() + 30
+    while service.generation == 1 and time.time() < deadline:
+        time.sleep(0.05)
+    # Forced, so the unchanged dataset is rebuilt; the request is acted on once
+    assert service.engine is not old and service.generation == 2
+    time.sleep(0.2)
+    assert service.wait_for_reload(30)["state"] == "swapped" and service.generation == 2
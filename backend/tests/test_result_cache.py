@@ -0,0 +1,44 @@
+import numpy as np
+
+from core.result_cache import ResultCache
+
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", np.arange(3))
+    cache.put("b", np.arange(3))
+    assert cache.get("a") is not None  # a is now most recent
+    cache.put("c", np.arange(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_eviction_by_bytes():
+    cache = ResultCache(max_entries=100, max_bytes=1000)
+    for i in range(10):
+        cache.put(i, np.zeros(50, dtype=np.int32))  # ~200 bytes + key
+    assert cache.bytes <= 1000
+    assert len(cache) < 10
+    assert cache.get(9) is not None
+
+    cache.put("huge", np.zeros(10000))
+    assert cache.get("huge") is None
+
+
+def test_service_search_cache(service):
+    assert service.search_page("Lentil ", None) == service.search_page("lentil", "ALL")
+    stats = service.search_cache_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+
+    service.search_page_json("", "vegan")
+    service.search_page_json(None, "Vegan")
+    assert service.search_cache_stats()["hits"] == 2
+
+    # A different dataset version invalidates everything cached so far
+    service.engine.dataset_version = "reloaded"
+    service.search_page("lentil")
+    assert service.search_cache_stats()["entries"] == 1
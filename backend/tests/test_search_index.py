@@ -0,0 +1,91 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from core.search_index import TfidfSearchIndex, top_k
+
+DOCS = [
+    "chicken curry rice",
+    "vegan lentil curry",
+    "beef stew potatoes",
+    "chicken salad lemon",
+    "chocolate cake",
+    "lentil soup",
+]
+
+
+def test_search_matches_full_cosine_ranking():
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(DOCS)
+    index = TfidfSearchIndex(vectorizer, matrix)
+
+    for query in ("curry", "chicken curry", "lentil", "cake"):
+        scores = cosine_similarity(vectorizer.transform([query]), matrix)[0]
+        expected = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0][:3]
+        assert index.search(query, 3).tolist() == expected
+
+    assert len(index.search("pizza", 3)) == 0
+
+
+def test_search_applies_mask_before_top_k():
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(DOCS)
+    index = TfidfSearchIndex(vectorizer, matrix)
+
+    mask = np.zeros(len(DOCS), dtype=bool)
+    mask[[1, 5]] = True
+    assert sorted(index.search("curry lentil chicken", 1, mask).tolist()) == [1]
+    assert set(index.search("curry lentil chicken", 5, mask).tolist()) == {1, 5}
+
+
+def test_top_k_breaks_ties_by_row():
+    rows, scores = top_k(np.array([7, 3, 5, 1]), np.array([0.5, 0.9, 0.5, 0.5]), 3)
+    assert rows.tolist() == [3, 1, 5]
+    assert scores.tolist() == [0.9, 0.5, 0.5]
+
+
+def test_engine_search(engine):
+    names = [m["name"] for m in engine.search_meals("lentil")]
+    assert names and all("Lentil" in n for n in names)
+    assert engine.search_meals("lentil", tag="no-such-tag") == []
+    assert len(engine.search_meals(None, tag="vegan")) == 2
+
+
+def test_browse_sample_is_stable(engine):
+    first = engine.search_rows(None, "vegan")
+    assert first == engine.search_rows(None, "vegan")
+    assert sorted(engine.search_rows(None, None)) == sorted(set(engine.search_rows(None, None)))
+
+
+def test_typo_tolerant_fallback(engine, recipes_csv, tmp_path, monkeypatch):
+    names = [m["name"].lower() for m in engine.search_meals("chiken")]
+    assert set(names[:2]) == {"chicken caesar wrap", "peanut chicken stir fry"}
+    assert engine.search_meals("lasagne")[0]["name"].lower() == "beef lasagna"
+
+    # The trigram index is restored from the snapshot written by the first engine
+    from core.recommendation_engine import RecommendationEngine
+    restored = RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'cache'))
+    assert (restored.char_tfidf_matrix != engine.char_tfidf_matrix).nnz == 0
+    assert restored.search_rows("chiken") == engine.search_rows("chiken")
+
+    monkeypatch.setenv("SEARCH_TYPO_TOLERANCE", "0")
+    strict = RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'cache'))
+    assert strict.search_meals("chiken") == []
+
+
+def test_latent_search_mode(engine, recipes_csv, tmp_path, client, service):
+    assert engine.search_modes() == ["sparse", "latent", "bm25"]
+    assert engine.latent_vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(engine.latent_vectors, axis=1), 1.0, atol=1e-5)
+
+    rows, total = engine.search_ranking("lentil curry", mode="latent")
+    assert total >= 1 and engine.data["name"].iloc[rows[0]].lower() == "vegan lentil curry"
+
+    from core.recommendation_engine import RecommendationEngine
+    restored = RecommendationEngine(data_path=recipes_csv, cache_dir=str(tmp_path / 'cache'))
+    assert np.array_equal(restored.latent_vectors, engine.latent_vectors)
+
+    assert client.get("/meals?query=curry&mode=latent").status_code == 200
+    assert client.get("/meals?query=curry&mode=bogus").status_code == 400
+    stats = client.get("/admin/stats").get_json()["search_indexes"]
+    assert set(stats) == {"sparse", "latent", "bm25"} and stats["latent"]["bytes"] > 0
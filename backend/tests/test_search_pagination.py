@@ -0,0 +1,65 @@
+import json
+
+from services.recommendation_service import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("abc123", 40)
+    assert decode_cursor(cursor, "abc123") == 40
+    for bad in ("", "not-a-cursor", encode_cursor("other", 40)):
+        try:
+            decode_cursor(bad, "abc123")
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted")
+
+
+def test_engine_ranking_total(engine):
+    rows, total = engine.search_ranking(None, "vegetarian")
+    assert total == 5 and len(rows) == 5
+    rows, total = engine.search_ranking("chicken", None)
+    assert total == 2
+    assert engine.search_ranking(None, "no-such-tag")[1] == 0
+
+
+def test_meals_pages_from_cached_ranking(client, service):
+    first = client.get("/meals?tag=all&limit=4")
+    assert first.headers["X-Total-Count"] == "11"
+    pages = [first.get_json()]
+    cursor = first.headers.get("X-Next-Cursor")
+    while cursor:
+        response = client.get(f"/meals?tag=all&limit=4&cursor={cursor}")
+        pages.append(response.get_json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert [len(p) for p in pages] == [4, 4, 3]
+    ids = [m["id"] for page in pages for m in page]
+    assert len(set(ids)) == 11
+    # Only the first page computed the ranking
+    stats = service.search_cache_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 2
+
+    # Default first page matches the unpaginated search
+    assert client.get("/meals?tag=vegan").get_json() == json.loads(service.search_page_json("", "vegan")[0])
+    assert client.get("/meals?cursor=garbage").status_code == 400
+
+
+def test_search_on_empty_dataset_returns_no_hits(tmp_path):
+    from core.recommendation_engine import RecommendationEngine
+
+    engine = RecommendationEngine(data_path=str(tmp_path / 'missing.csv'), cache_dir=str(tmp_path / 'cache'))
+    rows, total = engine.search_ranking('chicken', mode='sparse')
+    assert len(rows) == 0 and total == 0
+
+
+def test_facets_on_empty_dataset(client, tmp_path, monkeypatch):
+    from core.recommendation_engine import RecommendationEngine
+    from services.recommendation_service import RecommendationService
+
+    engine = RecommendationEngine(data_path=str(tmp_path / 'missing.csv'), cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(RecommendationService, '_instance', None)
+    monkeypatch.setattr(RecommendationService, '_instance', RecommendationService(engine))
+
+    response = client.get("/meals/facets?query=chicken")
+    assert response.status_code == 200
+    assert response.get_json() == {"total": 0, "facets": {"diet": [], "cuisine": [], "tags": []}}
@@ -0,0 +1,35 @@
+import numpy as np
+from scipy import sparse
+
+from core.similar import build_similar_table
+
+
+def test_table_matches_brute_force_over_all_rows():
+    rng = np.random.default_rng(2)
+    features = rng.standard_normal((60, 4))
+    tfidf = sparse.random(60, 30, density=0.2, random_state=2, format='csr')
+    norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1))).ravel()
+    tfidf = sparse.diags(1 / np.maximum(norms, 1e-12)) @ tfidf
+
+    # With every row as a candidate the table is the exact blended top-k
+    rows, scores = build_similar_table(features, tfidf, k=5, candidates=59, block_rows=16)
+    assert rows.dtype == np.int32 and scores.dtype == np.float16
+
+    dense = tfidf.toarray()
+    for i in range(60):
+        distances = np.linalg.norm(features - features[i], axis=1)
+        blended = 0.5 * dense @ dense[i] + 0.5 / (1 + distances)
+        blended[i] = -np.inf
+        expected = np.argsort(-blended, kind='stable')[:5]
+        assert i not in rows[i]
+        assert np.allclose(scores[i], blended[expected], atol=2e-3)
+        assert np.all(np.diff(scores[i].astype(float)) <= 0)
+
+
+def test_similar_route(client, service):
+    body = client.get("/meals/103/similar?limit=3").get_json()
+    assert body["id"] == "103"
+    assert len(body["similar"]) == 3
+    assert "103" not in [m["id"] for m in body["similar"]]
+    assert all("similarity" in m and "calories" in m for m in body["similar"])
+    assert client.get("/meals/999999/similar").status_code == 404
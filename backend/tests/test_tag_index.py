@@ -0,0 +1,22 @@
+from core.tag_index import TagIndex, popcount, unpack
+
+
+def test_exact_and_partial_tag_bitmaps():
+    index = TagIndex([['Breakfast', 'low-carb'], ['dinner'], ['low-fat', 'breakfast'], []])
+
+    assert index.mask('breakfast').tolist() == [True, False, True, False]
+    # The engine's tag filter: any tag containing the fragment, as a packed bitmap
+    bits = index.bitmap_containing('low')
+    assert unpack(bits, 4).tolist() == [True, False, True, False] and popcount(bits) == 2
+    assert popcount(index.bitmap_containing('brunch')) == 0
+    assert index.count('BREAKFAST') == 2
+    assert index.count('unknown') == 0
+    assert not index.mask('unknown').any()
+
+
+def test_engine_filters_use_tag_index(engine):
+    results = engine.search_meals('', 'vegan')
+
+    # lemon water is tagged vegan but dropped by the 200 kcal floor
+    assert {int(meal['id']) for meal in results} == {103, 109}
+    assert engine.tag_index.count('vegan') == 2
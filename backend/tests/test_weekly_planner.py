@@ -0,0 +1,54 @@
+import numpy as np
+
+from core.weekly_planner import WeeklyPlanner, day_cost
+
+
+def test_plan_respects_repeats_suitability_and_targets():
+    rng = np.random.default_rng(3)
+    macros = np.column_stack([
+        rng.uniform(250, 900, 60),  # calories
+        rng.uniform(5, 60, 60),     # protein
+        rng.uniform(10, 100, 60),   # carbs
+        rng.uniform(5, 40, 60),     # fats
+    ])
+    suitability = np.ones((60, 3), dtype=bool)
+    suitability[:20, 1:] = False  # breakfast-only recipes
+    suitability[20:, 0] = False
+    target = np.array([1800.0, 120.0, 180.0, 60.0])
+
+    plan = WeeklyPlanner().plan(macros, suitability, target)
+
+    assert plan.shape == (7, 3)
+    assert np.bincount(plan.ravel()).max() <= 2
+    assert all(len(set(day)) == 3 for day in plan.tolist())
+    assert suitability[plan[:, 0], 0].all() and suitability[plan[:, 1:], 1:].all()
+    daily_calories = macros[plan, 0].sum(axis=1)
+    assert np.abs(daily_calories - target[0]).max() < 0.1 * target[0]
+    assert np.array_equal(plan, WeeklyPlanner().plan(macros, suitability, target))
+
+
+def test_small_pool_relaxes_repeat_cap():
+    macros = np.array([[600.0, 30, 60, 20], [500.0, 25, 50, 15], [700.0, 40, 70, 25], [400.0, 20, 40, 10]])
+    plan = WeeklyPlanner().plan(macros, np.zeros((4, 3), dtype=bool), np.array([1800.0, 90, 180, 60]))
+
+    assert plan.shape == (7, 3)
+    assert all(len(set(day)) == 3 for day in plan.tolist())
+
+
+def test_engine_planner_model(engine):
+    result = engine.recommend({"age": 30, "weight": 70, "height": 170, "gender": "female",
+                               "goal": "maintenance", "model_type": "planner"})
+
+    assert result["model_used"] == "planner"
+    assert set(result["week_plan"]) == {'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'}
+    assert all(set(day) == {'breakfast', 'lunch', 'dinner'} for day in result["week_plan"].values())
+
+
+def test_planner_scores_days_with_day_cost():
+    # The swap ranker uses day_cost directly; both must score a day the same
+    planner = WeeklyPlanner(macro_weights=[1.0, 3.0, 0.5, 0.25])
+    target = np.array([2000.0, 150.0, 200.0, 70.0])
+    macros = np.array([[600.0, 40.0, 60.0, 20.0], [700.0, 50.0, 70.0, 25.0], [650.0, 45.0, 55.0, 22.0]])
+    planner.plan(macros, np.ones((3, 3), dtype=bool), target)
+    totals = macros.sum(axis=0)
+    assert np.isclose(planner._day_cost(totals), day_cost(totals, target, planner.macro_weights))